@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The bot's modules live in the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# A manual script that writes test_excel.xlsx into the working directory
+collect_ignore = ['test_excel.py']
@@ -0,0 +1,77 @@
+from contextlib import contextmanager
+
+
+class FakeCursor:
+    """Answers queries from FakeConnection.results, a list of (substring, rows) pairs"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+        self.rowcount = 0
+        self.lastrowid = None
+
+    def execute(self, query, params=()):
+        self.connection.executed.append((' '.join(query.split()), params))
+        self.rows = []
+        for needle, rows in self.connection.results:
+            if needle in query:
+                self.rows = list(rows() if callable(rows) else rows)
+                break
+        self.rowcount = len(self.rows) or 1
+        self.connection.last_id += 1
+        self.lastrowid = self.connection.last_id
+
+    def executemany(self, query, rows):
+        for params in rows:
+            self.execute(query, params)
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, results=()):
+        self.results = list(results)
+        self.executed = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.last_id = 0
+        self.closed = False
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        self.closed = True
+
+    def queries(self):
+        return [query for query, _ in self.executed]
+
+
+def use_fake_connection(database, connection):
+    """Make database run every query on connection"""
+    @contextmanager
+    def connection_scope():
+        yield connection
+    database.connection_scope = connection_scope
+    return connection
@@ -0,0 +1,45 @@
+import os
+import time
+
+from blob_store import BlobStore
+
+
+def store_blob(store, sha256, content=b'data', age=0):
+    temp_path = store.temp_path()
+    with open(temp_path, 'wb') as handle:
+        handle.write(content)
+    path, _ = store.put_file(temp_path, sha256)
+    if age:
+        old = time.time() - age
+        os.utime(path, (old, old))
+    return path
+
+
+def test_identical_uploads_share_one_blob(tmp_path):
+    store = BlobStore(root=str(tmp_path / 'blobs'), derived_dir=str(tmp_path / 'derived'))
+    first = store_blob(store, 'ab' * 32)
+    second = store_blob(store, 'ab' * 32)
+    assert first == second
+    assert store.stats()['stored'] == 1
+    assert store.stats()['deduplicated'] == 1
+    assert store.resolve(store.ref('ab' * 32)) == first
+
+
+def test_garbage_collection_removes_orphans_and_their_derived_files(tmp_path):
+    store = BlobStore(root=str(tmp_path / 'blobs'), gc_grace=60, derived_dir=str(tmp_path / 'derived'))
+    orphan, kept, young = 'aa' * 32, 'bb' * 32, 'cc' * 32
+    store_blob(store, orphan, age=3600)
+    store_blob(store, kept, age=3600)
+    store_blob(store, young)
+    for sha256 in (orphan, kept):
+        os.makedirs(tmp_path / 'derived' / sha256)
+        (tmp_path / 'derived' / sha256 / 'thumbnail.jpg').write_bytes(b'jpg')
+
+    removed, removed_bytes = store.collect_garbage({kept})
+
+    assert removed == [orphan]
+    assert removed_bytes == 4
+    assert not os.path.exists(store.path_for(orphan))
+    assert not os.path.exists(tmp_path / 'derived' / orphan)
+    assert os.path.exists(tmp_path / 'derived' / kept / 'thumbnail.jpg')
+    assert os.path.exists(store.path_for(young))
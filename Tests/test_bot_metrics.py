@@ -0,0 +1,45 @@
+import bot
+from metrics import registry
+
+
+def scrape():
+    return registry.render().splitlines()
+
+
+def test_post_processing_backlog_is_exported():
+    assert 'postprocess_queue_depth 0' in scrape()
+    bot.post_processor._tasks.add(object())
+    try:
+        assert 'postprocess_queue_depth 1' in scrape()
+    finally:
+        bot.post_processor._tasks.clear()
+
+
+def test_per_user_queues_are_exported(monkeypatch):
+    import asyncio
+
+    from dispatcher import UserDispatcher
+
+    async def run():
+        release = asyncio.Event()
+
+        async def handler(message):
+            await release.wait()
+
+        dispatcher = UserDispatcher(handler, max_queue=10, idle_timeout=60)
+        monkeypatch.setattr(bot, 'dispatcher', dispatcher)
+        for message in range(3):
+            dispatcher.dispatch('111', message)
+        dispatcher.dispatch('222', 0)
+        # Let both actors pick up their first message
+        while dispatcher.stats()['queued'] > 2:
+            await asyncio.sleep(0)
+        lines = scrape()
+        release.set()
+        await dispatcher.close()
+        return lines
+
+    lines = asyncio.run(run())
+    assert 'dispatch_actors 2' in lines
+    assert 'dispatch_queued_messages 2' in lines
+    assert 'dispatch_max_queue_depth 2' in lines
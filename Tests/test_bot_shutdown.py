@@ -0,0 +1,44 @@
+import asyncio
+
+import bot
+from session_store import SQLiteSessionStore
+from uploads import UploadPipeline
+
+
+def test_shutdown_flushes_sessions_changed_since_the_last_write(tmp_path, monkeypatch):
+    path = str(tmp_path / 'sessions.db')
+
+    async def run():
+        store = SQLiteSessionStore(path=path, flush_interval=3600, ttl=3600)
+        monkeypatch.setattr(bot, 'user_data', store)
+        await store.open()
+        store['111'] = {'awaiting_input': 'email'}
+        store['222'] = {'awaiting_input': 'phone'}
+        await store.flush()
+        # 222 finishes onboarding just before the bot is stopped
+        del store['222']
+        store['111']['email'] = 'jane@example.com'
+        store.save('111')
+        await bot.shutdown()
+
+        reopened = SQLiteSessionStore(path=path, flush_interval=3600, ttl=3600)
+        await reopened.open()
+        try:
+            return {user_id: reopened[user_id] for user_id in ('111', '222') if user_id in reopened}
+        finally:
+            await reopened.close()
+
+    assert asyncio.run(run()) == {'111': {'awaiting_input': 'email', 'email': 'jane@example.com'}}
+
+
+def test_shutdown_closes_the_upload_http_session(monkeypatch):
+    pipeline = UploadPipeline()
+    monkeypatch.setattr(bot, 'upload_pipeline', pipeline)
+
+    async def run():
+        session = pipeline._get_session()
+        await bot.shutdown()
+        return session
+
+    assert asyncio.run(run()).closed
+    assert pipeline._session is None
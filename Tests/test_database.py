@@ -0,0 +1,105 @@
+from database import Database
+from fake_mysql import FakeConnection, use_fake_connection
+
+
+def make_database(results=()):
+    database = Database(auto_connect=False)
+    connection = use_fake_connection(database, FakeConnection(results))
+    return database, connection
+
+
+def test_status_update_with_lower_case_code_invalidates_cached_member():
+    database, connection = make_database([
+        ('FOR UPDATE', [(7, 'Active')]),
+    ])
+    member = (7, 'ABCD1234', 111, 'Jane Doe', 'Active')
+    database.member_cache.put(('entry_code', 'ABCD1234'), [member], database.member_cache.begin())
+    database.member_cache.put(('user_id', '111'), [member], database.member_cache.begin())
+
+    assert database.update_member_status('abcd1234', 'Inactive')
+
+    assert database.member_cache.get(('entry_code', 'ABCD1234')) is None
+    assert database.member_cache.get(('user_id', '111')) is None
+    assert any('member_status_history' in query for query in connection.queries())
+
+
+def test_status_update_of_unknown_code():
+    database, connection = make_database()
+    assert database.update_member_status('NOPE0000', 'Inactive') is False
+    assert connection.rollbacks == 1
+
+
+def inserted_codes(connection):
+    codes = []
+    for query, params in connection.executed:
+        if query.startswith("INSERT INTO members"):
+            codes.extend(params[0::9])
+    return codes
+
+
+def test_bulk_save_skips_entry_codes_owned_by_another_user():
+    records = [
+        {'entry_code': 'taken001', 'user_id': '111', 'full_name': 'jane doe',
+         'email': 'jane@example.com', 'id_number': '123'},
+        {'entry_code': 'REPLAY01', 'user_id': '222', 'full_name': 'john doe', 'email': 'john@example.com'},
+        {'user_id': '333', 'full_name': 'new member', 'email': 'new@example.com'},
+    ]
+    database, connection = make_database([
+        # TAKEN001 belongs to user 999; REPLAY01 is an earlier import of the same record
+        ('SELECT entry_code, user_id', [('TAKEN001', 999), ('REPLAY01', 222)]),
+        ('SELECT entry_code, id', lambda: [(code, i) for i, code in enumerate(inserted_codes(connection), 10)]),
+    ])
+
+    codes = database.save_members_bulk(records)
+
+    assert codes[0] is None
+    assert codes[1] == 'REPLAY01'
+    assert codes[2] is not None
+    assert 'TAKEN001' not in inserted_codes(connection)
+    # The skipped record's identity must not be attached to anyone
+    assert not any(query.startswith("INSERT INTO identity_info") for query in connection.queries())
+
+
+def test_bulk_save_dedupes_entry_codes_repeated_within_the_call():
+    records = [
+        {'entry_code': 'ab12cd34', 'user_id': '111', 'full_name': 'jane doe',
+         'email': 'jane@example.com', 'id_number': '123'},
+        # Same code and user, spelled differently: one member
+        {'entry_code': 'AB12CD34', 'user_id': '111', 'full_name': 'jane doe',
+         'email': 'jane@example.com', 'id_number': '123'},
+        # Same code, someone else: must not take over Jane's identity row
+        {'entry_code': 'Ab12Cd34', 'user_id': '222', 'full_name': 'john roe',
+         'email': 'john@example.com', 'id_number': '999'},
+    ]
+    database, connection = make_database([
+        ('SELECT entry_code, user_id', []),
+        ('SELECT entry_code, id', lambda: [(code, 10) for code in set(inserted_codes(connection))]),
+    ])
+
+    assert database.save_members_bulk(records) == ['AB12CD34', 'AB12CD34', None]
+    assert inserted_codes(connection) == ['AB12CD34']
+    identity_params = [
+        params for query, params in connection.executed if query.startswith("INSERT INTO identity_info")
+    ]
+    assert len(identity_params) == 1
+    assert '999' not in identity_params[0]
+
+
+def test_user_upload_bytes_sums_the_users_stored_blobs():
+    database, connection = make_database([('SUM(size_bytes)', [(123456,)])])
+    assert database.get_user_upload_bytes('111') == 123456
+    query, params = connection.executed[0]
+    assert "SELECT file_path FROM members WHERE user_id = %s" in query
+    assert params == ('111',)
+
+
+def test_upload_metadata_is_returned_by_column_name():
+    row = ('ab' * 32, 'image/jpeg', 2048, 800, 600, None, '/d/display.jpg', '/d/thumbnail.jpg', None, None)
+    database, connection = make_database([('JOIN upload_metadata u', [row])])
+    metadata = database.get_upload_metadata('ABCD1234')
+    assert metadata['mime_type'] == 'image/jpeg'
+    assert metadata['thumbnail_path'] == '/d/thumbnail.jpg'
+    assert connection.executed[0][1] == ('ABCD1234',)
+
+    database, _ = make_database()
+    assert database.get_upload_metadata('NOPE0000') is None
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+from mysql.connector import Error
+
+from db_pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    def __init__(self):
+        self.pings = 0
+        self.alive = True
+        self.closed = False
+        self.in_transaction = False
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if not self.alive:
+            raise Error("server has gone away")
+
+    def is_connected(self):
+        self.pings += 1
+        return self.alive
+
+    def rollback(self):
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakePool(ConnectionPool):
+    def _create(self):
+        return FakeConnection()
+
+
+def test_recently_used_connection_is_not_pinged():
+    pool = FakePool(min_size=1, max_size=1, health_check_interval=30)
+    pool.fill()
+    with pool.connection() as connection:
+        pass
+    with pool.connection() as again:
+        assert again is connection
+    assert connection.pings == 0
+
+
+def test_idle_connection_is_pinged_and_replaced_when_dead():
+    pool = FakePool(min_size=1, max_size=1, health_check_interval=0)
+    pool.fill()
+    with pool.connection() as connection:
+        pass
+    connection.alive = False
+    with pool.connection() as replacement:
+        assert replacement is not connection
+    assert connection.closed
+    assert pool.stats()['discarded'] == 1
+
+
+def test_acquire_times_out_when_pool_is_exhausted():
+    pool = FakePool(min_size=0, max_size=1, acquire_timeout=0.05)
+    held = pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    assert pool.stats()['timeouts'] == 1
+    pool.release(held)
+
+
+def test_waiting_acquire_gets_released_connection():
+    pool = FakePool(min_size=0, max_size=1, acquire_timeout=2)
+    held = pool.acquire()
+    threading.Timer(0.05, pool.release, args=(held,)).start()
+    started = time.monotonic()
+    assert pool.acquire() is held
+    assert time.monotonic() - started < 1
+
+
+def test_open_transaction_is_rolled_back_on_release():
+    pool = FakePool(min_size=0, max_size=1)
+    connection = pool.acquire()
+    connection.in_transaction = True
+    pool.release(connection)
+    assert not connection.in_transaction
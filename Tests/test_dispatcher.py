@@ -0,0 +1,72 @@
+import asyncio
+
+from dispatcher import UserDispatcher
+
+
+def test_messages_of_one_user_run_in_order_and_users_in_parallel():
+    events = []
+
+    async def handler(message):
+        user, index = message
+        events.append(('start', user, index))
+        await asyncio.sleep(0.01)
+        events.append(('end', user, index))
+
+    async def run():
+        dispatcher = UserDispatcher(handler, max_queue=10, idle_timeout=0.05)
+        for index in range(3):
+            dispatcher.dispatch('a', ('a', index))
+            dispatcher.dispatch('b', ('b', index))
+        await asyncio.sleep(0.2)
+        return dispatcher
+
+    dispatcher = asyncio.run(run())
+    for user in 'ab':
+        own = [event for event in events if event[1] == user]
+        # Strictly one at a time: start/end pairs never interleave
+        assert own == [(kind, user, index) for index in range(3) for kind in ('start', 'end')]
+    # The two users overlapped
+    assert events[:2] == [('start', 'a', 0), ('start', 'b', 0)]
+    # Idle actors retired themselves
+    assert dispatcher.stats()['actors'] == 0
+    assert dispatcher.stats()['processed'] == 6
+
+
+def test_full_mailbox_drops_and_errors_do_not_stop_the_actor():
+    handled = []
+
+    async def handler(message):
+        if message == 'boom':
+            raise RuntimeError(message)
+        handled.append(message)
+
+    async def run():
+        dispatcher = UserDispatcher(handler, max_queue=2, idle_timeout=0.05)
+        accepted = [dispatcher.dispatch('a', message) for message in ('boom', 'one', 'two')]
+        await asyncio.sleep(0.1)
+        return dispatcher, accepted
+
+    dispatcher, accepted = asyncio.run(run())
+    assert accepted == [True, True, False]
+    assert handled == ['one']
+    assert dispatcher.stats()['dropped'] == 1
+    assert dispatcher.stats()['errors'] == 1
+
+
+def test_close_stops_an_actor_that_was_just_taking_a_message():
+    handled = []
+
+    async def handler(message):
+        handled.append(message)
+
+    async def run():
+        dispatcher = UserDispatcher(handler, max_queue=10, idle_timeout=60)
+        dispatcher.dispatch('a', 1)
+        # Close right as the actor's mailbox read completes, which
+        # asyncio.wait_for on Python 3.11 answers by ignoring the cancel
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        await asyncio.wait_for(dispatcher.close(), 1)
+
+    asyncio.run(run())
+    assert handled == []
@@ -0,0 +1,51 @@
+from entry_codes import EntryCodeAllocator, ENTRY_CODE_ALPHABET
+
+
+def test_codes_are_distinct_and_well_formed():
+    allocator = EntryCodeAllocator(block_size=50)
+    codes = [allocator.next_code() for _ in range(120)]
+    assert len(set(codes)) == len(codes)
+    assert all(len(code) == 8 and set(code) <= set(ENTRY_CODE_ALPHABET) for code in codes)
+    # 120 codes from blocks of 50
+    assert allocator.stats()['blocks_reserved'] == 3
+
+
+def test_collision_rate_tracks_recent_attempts():
+    allocator = EntryCodeAllocator(block_size=10, window=4)
+    for _ in range(4):
+        allocator.next_code()
+    allocator.record_collision('AAAAAAAA')
+    allocator.record_success('BBBBBBBB')
+    allocator.record_success('CCCCCCCC')
+    allocator.record_success('DDDDDDDD')
+    stats = allocator.stats()
+    assert stats['collisions'] == 1
+    assert stats['collision_rate'] == 0.25
+    assert stats['recent_collision_rate'] == 0.25
+    assert stats['estimated_codes_in_use'] == stats['keyspace'] // 4
+
+    # Older outcomes fall out of the window
+    for _ in range(4):
+        allocator.record_success('EEEEEEEE')
+    assert allocator.stats()['recent_collision_rate'] == 0.0
+
+
+def test_collisions_are_exported(monkeypatch):
+    import entry_codes
+    from metrics import registry
+
+    def value(series):
+        for line in registry.render().splitlines():
+            if line.startswith(series + ' '):
+                return float(line.split()[-1])
+        return 0.0
+
+    allocator = EntryCodeAllocator(block_size=10)
+    monkeypatch.setattr(entry_codes, 'entry_codes', allocator)
+    collisions = value('entry_code_attempts_total{outcome="collision"}')
+    allocator.record_collision(allocator.next_code())
+    for _ in range(3):
+        allocator.record_success(allocator.next_code())
+
+    assert value('entry_code_attempts_total{outcome="collision"}') == collisions + 1
+    assert value('entry_code_recent_collision_rate') == 0.25
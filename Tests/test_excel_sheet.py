@@ -0,0 +1,70 @@
+from openpyxl import Workbook, load_workbook
+
+from excel_sheet import IncrementalSheet, MAX_WIDTH
+
+HEADERS = ['Entry Code', 'Full Name', 'Status']
+
+
+def test_new_sheet_gets_headers_and_rows(tmp_path):
+    filename = str(tmp_path / 'members.xlsx')
+    sheet = IncrementalSheet(filename, 'Members', HEADERS, key_column='Entry Code')
+    assert sheet.append(['AAAA0001', 'Jane', 'Active']) == 2
+    assert sheet.row_for('AAAA0001') == 2
+    sheet.set_cell(2, 'Status', 'Inactive')
+    assert sheet.save()
+    assert not sheet.save()  # nothing changed since
+
+    rows = list(load_workbook(filename).active.iter_rows(values_only=True))
+    assert rows == [tuple(HEADERS), ('AAAA0001', 'Jane', 'Inactive')]
+
+
+def test_upsert_replaces_by_normalized_key(tmp_path):
+    filename = str(tmp_path / 'identity.xlsx')
+    sheet = IncrementalSheet(filename, 'Identity', ['Full Name', 'ID Number'], key_column='Full Name',
+                             normalize_key=lambda name: str(name).lower())
+    sheet.upsert(['Jane Doe', '123'])
+    sheet.upsert(['JANE DOE', '456'])
+    sheet.save()
+    rows = list(load_workbook(filename).active.iter_rows(values_only=True))
+    assert rows[1:] == [('Jane Doe', '456')]
+
+
+def test_existing_file_is_indexed_and_reloaded_after_outside_changes(tmp_path):
+    filename = str(tmp_path / 'members.xlsx')
+    book = Workbook()
+    book.active.append(HEADERS)
+    book.active.append(['AAAA0001', 'Jane', 'Active'])
+    book.save(filename)
+
+    sheet = IncrementalSheet(filename, 'Members', HEADERS, key_column='Entry Code')
+    assert sheet.row_for('AAAA0001') == 2
+
+    # Someone else rewrites the workbook
+    book.active.append(['AAAA0002', 'John', 'Active'])
+    book.save(filename)
+    import os
+    stat = os.stat(filename)
+    os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert sheet.row_for('AAAA0002') == 3
+
+
+def test_column_width_is_capped(tmp_path):
+    sheet = IncrementalSheet(str(tmp_path / 'members.xlsx'), 'Members', HEADERS, key_column='Entry Code')
+    sheet.append(['AAAA0001', 'x' * 200, 'Active'])
+    assert sheet.ws.column_dimensions['B'].width == MAX_WIDTH
+
+
+def test_status_update_finds_the_member_whatever_the_case(tmp_path):
+    import asyncio
+
+    from excel_writer import ExcelWriterWorker
+
+    async def run():
+        writer = ExcelWriterWorker(str(tmp_path / 'onboarding.xlsx'), batch_size=10, flush_interval=0.05)
+        try:
+            await writer.add_member('ABCD1234', 1, {'full_name': 'jane doe'})
+            return await writer.update_status('abcd1234', 'Inactive')
+        finally:
+            writer.stop()
+
+    assert asyncio.run(run()) == 'Jane Doe'
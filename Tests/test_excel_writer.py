@@ -0,0 +1,53 @@
+import asyncio
+
+from openpyxl import load_workbook
+
+from excel_writer import ExcelWriterWorker
+
+
+def test_jobs_are_batched_into_one_save(tmp_path):
+    filename = str(tmp_path / 'onboarding.xlsx')
+
+    async def run():
+        writer = ExcelWriterWorker(filename, batch_size=10, flush_interval=0.2)
+        try:
+            futures = [
+                writer.add_member(f'CODE000{i}', 100 + i, {'full_name': f'member {i}', 'email': f'M{i}@X.COM'})
+                for i in range(3)
+            ]
+            futures.append(writer.update_status('CODE0001', 'Inactive'))
+            futures.append(writer.update_status('MISSING0', 'Inactive'))
+            return await asyncio.gather(*futures), writer
+        finally:
+            writer.stop()
+
+    results, writer = asyncio.run(run())
+    assert results == [True, True, True, 'Member 1', None]
+    assert writer.stats()['flushes'] == 1
+    assert writer.stats()['jobs_written'] == 5
+
+    rows = list(load_workbook(filename).active.iter_rows(values_only=True))
+    assert rows[0][0] == 'Entry Code'
+    assert [row[0] for row in rows[1:]] == ['CODE0000', 'CODE0001', 'CODE0002']
+    assert rows[2][3] == 'm1@x.com' and rows[2][-1] == 'Inactive'
+    identities = list(load_workbook(str(tmp_path / 'onboarding_identity.xlsx')).active.iter_rows(values_only=True))
+    assert len(identities) == 4
+
+
+def test_failed_batch_rejects_every_job(tmp_path):
+    # A directory where the workbook should be makes the save fail
+    filename = tmp_path / 'onboarding.xlsx'
+    filename.mkdir()
+
+    async def run():
+        writer = ExcelWriterWorker(str(filename), batch_size=10, flush_interval=0.05)
+        try:
+            return await asyncio.gather(
+                writer.add_member('CODE0000', 1, {'full_name': 'a'}),
+                return_exceptions=True,
+            )
+        finally:
+            writer.stop()
+
+    [error] = asyncio.run(run())
+    assert isinstance(error, Exception)
@@ -0,0 +1,100 @@
+import csv
+import asyncio
+from datetime import datetime
+
+import mysql.connector
+import pytest
+from openpyxl import load_workbook
+
+from exporter import Exporter, build_export_query, export_members, parse_export_args
+from fake_mysql import FakeConnection
+
+ROWS = [
+    ('ABCD1234', '1234567890123456789', 'Jane Doe', 'jane@example.com', '0700', '1990-01-01',
+     datetime(2025, 1, 2, 9, 30), 'Active'),
+    ('EFGH5678', '987', 'John Roe', 'john@example.com', '0711', '1985-05-05',
+     datetime(2025, 2, 3, 10, 0), 'Pending'),
+]
+
+
+def test_parse_export_args():
+    options = parse_export_args(['status=active', 'from=2025-01-01', 'to=2025-06-30', 'FORMAT=CSV'])
+    assert options == {
+        'status': 'Active',
+        'date_from': datetime(2025, 1, 1),
+        'date_to': datetime(2025, 6, 30),
+        'fmt': 'csv',
+    }
+    assert parse_export_args([])['fmt'] == 'xlsx'
+
+
+@pytest.mark.parametrize('args, message', [
+    (['status'], 'key=value'),
+    (['from=01/02/2025'], 'YYYY-MM-DD'),
+    (['format=pdf'], 'Format must be'),
+    (['colour=red'], 'Unknown option'),
+])
+def test_parse_export_args_rejects_bad_input(args, message):
+    with pytest.raises(ValueError, match=message):
+        parse_export_args(args)
+
+
+def test_build_export_query():
+    query, params = build_export_query()
+    assert query.endswith("FROM members  ORDER BY id")
+    assert "CAST(user_id AS CHAR) AS user_id" in query
+    assert params == []
+
+    query, params = build_export_query('Active', datetime(2025, 1, 1), datetime(2025, 6, 30))
+    assert "WHERE status = %s AND registration_date >= %s AND registration_date < %s" in query
+    assert query.endswith("ORDER BY registration_date, id")
+    # date_to is inclusive, so the bound is the following midnight
+    assert params == ['Active', datetime(2025, 1, 1), datetime(2025, 7, 1)]
+
+
+@pytest.fixture
+def fake_connect(monkeypatch):
+    connection = FakeConnection([('FROM members', ROWS)])
+    monkeypatch.setattr(mysql.connector, 'connect', lambda **params: connection)
+    return connection
+
+
+def test_export_members_csv(tmp_path, fake_connect):
+    path = tmp_path / 'members.csv'
+    assert export_members(str(path), 'csv', {}, status='Active', batch_size=1) == 2
+    with open(path, newline='', encoding='utf-8') as handle:
+        rows = list(csv.reader(handle))
+    assert rows[0][:3] == ['Entry Code', 'User ID', 'Full Name']
+    assert rows[1][:3] == ['ABCD1234', '1234567890123456789', 'Jane Doe']
+    assert len(rows) == 3
+    assert fake_connect.executed[0][1] == ['Active']
+    assert fake_connect.closed
+
+
+def test_export_members_xlsx(tmp_path, fake_connect):
+    path = tmp_path / 'members.xlsx'
+    assert export_members(str(path), 'xlsx', {}) == 2
+    sheet = load_workbook(path)['Onboarding Data']
+    assert [cell.value for cell in sheet[1]][:2] == ['Entry Code', 'User ID']
+    # Snowflakes stay exact because they are written as text
+    assert sheet['B2'].value == '1234567890123456789'
+    assert sheet.max_row == 3
+
+
+def test_failed_export_leaves_no_file(tmp_path):
+    exporter = Exporter({}, export_dir=str(tmp_path))
+
+    class FailingExecutor:
+        def submit(self, fn, path, *args):
+            # Start writing, then die the way a lost connection would
+            open(path, 'w').close()
+            raise mysql.connector.Error("connection lost")
+
+        def shutdown(self, wait=True):
+            pass
+
+    exporter._executor = FailingExecutor()
+    with pytest.raises(mysql.connector.Error):
+        asyncio.run(exporter.export(fmt='csv'))
+    assert list(tmp_path.iterdir()) == []
+    assert exporter.running == 0
@@ -0,0 +1,90 @@
+import pytest
+
+from flow_engine import Flow, State, Transition, FlowEngine, STATE_KEY, DONE
+from onboarding_flow import onboarding, validate_id_number, validate_passport, validate_kra
+
+
+def run(engine, session, *answers):
+    result = None
+    for answer in answers:
+        result = engine.step(session, answer)
+    return result
+
+
+def test_national_id_path_to_upload():
+    session = {}
+    assert onboarding.begin(session) == "What is your full name?"
+    result = run(onboarding, session, 'Jane Doe', ' JANE@Example.com ', '0700000000', '01/01/1990',
+                 'Y', '12345678', 'no')
+    assert session['email'] == 'jane@example.com'
+    assert session['id_type'] == 'yes'
+    assert session['kra'] == 'Not provided'
+    assert session[STATE_KEY] == 'ask_file_upload'
+    assert result.messages == ["Would you like to upload a file? (yes/no)"]
+
+    result = onboarding.step(session, 'yes')
+    assert session[STATE_KEY] == 'file_upload'
+    assert onboarding.step(session, 'here it is').upload
+    result = onboarding.complete_upload(session, {'file_uploaded': True})
+    assert result.done
+    assert session[STATE_KEY] is None and session['file_uploaded']
+
+
+def test_invalid_answer_repeats_the_question():
+    session = {}
+    onboarding.begin(session)
+    run(onboarding, session, 'Jane', 'jane@x.com', '0700', '01/01/1990', 'no')
+    result = onboarding.step(session, 'A1234')
+    assert result.messages[0].startswith("❌ Invalid passport number")
+    assert session[STATE_KEY] == 'passport'
+    onboarding.step(session, 'ab12345')
+    assert session['passport'] == 'AB12345'
+
+
+def test_skip_finishes_without_a_file():
+    session = {}
+    onboarding.begin(session)
+    result = run(onboarding, session, 'Jane', 'jane@x.com', '0700', '01/01/1990', 'yes', '12345',
+                 'yes', 'skip', 'no')
+    assert result.done
+    assert session['kra'] == 'Not provided'
+    assert session['file_path'] == 'None'
+
+
+def test_keyword_state_rejects_free_text():
+    session = {}
+    onboarding.begin(session)
+    run(onboarding, session, 'Jane', 'jane@x.com', '0700', '01/01/1990')
+    assert onboarding.step(session, 'maybe').messages == ["❌ Please answer with 'yes' or 'no'."]
+
+
+def test_step_without_a_session_does_nothing():
+    result = onboarding.step({}, 'hello')
+    assert result.messages == [] and not result.done
+
+
+def test_flow_rejects_unknown_targets_and_unanswerable_states():
+    with pytest.raises(ValueError):
+        Flow('broken', start='a', states=[State('a', "A?", field='a', next='missing')])
+    with pytest.raises(ValueError):
+        Flow('broken', start='a', states=[State('a', "A?")])
+    with pytest.raises(ValueError):
+        Flow('broken', start='nowhere', states=[State('a', "A?", field='a')])
+
+
+def test_transition_message_comes_before_the_next_prompt():
+    flow = Flow('tiny', start='a', states=[
+        State('a', "A?", choices={'yes': Transition('b', {'x': 1}, message="Noted.")}),
+        State('b', "B?", field='b', next=DONE),
+    ])
+    engine = FlowEngine(flow)
+    session = {}
+    engine.begin(session)
+    assert engine.step(session, 'y').messages == ["Noted.", "B?"]
+    assert session['x'] == 1
+
+
+def test_validators():
+    assert validate_id_number('12345') and not validate_id_number('1234') and not validate_id_number('12a45')
+    assert validate_passport('AB12345') and not validate_passport('A123456')
+    assert validate_kra('A123456789B') and not validate_kra('A12345678-B')
@@ -0,0 +1,86 @@
+from openpyxl import Workbook
+
+from importer import import_members, validate_batch
+
+
+def write_workbook(path, rows):
+    book = Workbook()
+    sheet = book.active
+    sheet.append(['Entry Code', 'User ID', 'Full Name', 'Email', 'Phone', 'Date of Birth',
+                  'Registration Date', 'Status'])
+    for row in rows:
+        sheet.append(row)
+    book.save(path)
+
+
+class FakeDatabase:
+    """save_members_bulk that treats TAKEN codes as owned by someone else"""
+
+    def __init__(self):
+        self.saved = []
+
+    def save_members_bulk(self, records):
+        codes = []
+        for record in records:
+            if record['entry_code'].startswith('TAKEN'):
+                codes.append(None)
+            else:
+                self.saved.append(record)
+                codes.append(record['entry_code'])
+        return codes
+
+
+def test_validate_batch_rejects_bad_rows():
+    batch = [
+        (2, {'entry_code': 'AAAA0001', 'user_id': '1', 'full_name': 'Jane', 'email': 'j@x.com',
+             'registration_date': '2024-01-01 10:00:00', 'status': 'active'}),
+        (3, {'entry_code': 'AAAA0001', 'user_id': '2', 'full_name': 'John', 'email': 'k@x.com',
+             'registration_date': '2024-01-01 10:00:00'}),
+        (4, {'entry_code': 'TOOLONGCODE', 'user_id': '3', 'full_name': 'Joe', 'email': 'l@x.com',
+             'registration_date': '2024-01-01 10:00:00'}),
+        (5, {'entry_code': 'AAAA0002', 'user_id': '4', 'full_name': 'Ann', 'email': 'no-at-sign',
+             'registration_date': '2024-01-01 10:00:00'}),
+    ]
+    records, rejected = validate_batch(batch, {}, set())
+    assert [record['entry_code'] for record in records] == ['AAAA0001']
+    assert records[0]['status'] == 'Active'
+    assert [row for row, _ in rejected] == [3, 4, 5]
+
+
+def test_duplicate_entry_codes_match_whatever_the_case():
+    seen_codes = {'CCCC0001'}
+    batch = [
+        (2, {'entry_code': 'ab12cd34', 'user_id': '1', 'full_name': 'Jane', 'email': 'j@x.com',
+             'registration_date': '2024-01-01 10:00:00'}),
+        (3, {'entry_code': 'AB12CD34', 'user_id': '2', 'full_name': 'John', 'email': 'k@x.com',
+             'registration_date': '2024-01-01 10:00:00'}),
+        # Seen in an earlier batch
+        (4, {'entry_code': 'cccc0001', 'user_id': '3', 'full_name': 'Joe', 'email': 'l@x.com',
+             'registration_date': '2024-01-01 10:00:00'}),
+    ]
+    records, rejected = validate_batch(batch, {}, seen_codes)
+    assert [record['entry_code'] for record in records] == ['ab12cd34']
+    assert rejected == [(3, 'duplicate entry code AB12CD34'), (4, 'duplicate entry code cccc0001')]
+    assert seen_codes == {'CCCC0001', 'AB12CD34'}
+
+
+def test_import_rejects_codes_owned_by_another_member_and_resumes(tmp_path):
+    source = tmp_path / 'members.xlsx'
+    write_workbook(source, [
+        ['AAAA0001', 1, 'Jane Doe', 'jane@x.com', '0700', '01/01/1990', '2024-01-01 10:00:00', 'Active'],
+        ['TAKEN001', 2, 'John Doe', 'john@x.com', '0700', '01/01/1990', '2024-01-01 10:00:00', 'Active'],
+        ['AAAA0003', 3, 'Ann Lee', 'ann@x.com', '0700', '01/01/1990', '2024-01-01 10:00:00', 'Active'],
+    ])
+    rejects = tmp_path / 'rejects.txt'
+    database = FakeDatabase()
+
+    checkpoint = import_members(database, str(source), batch_size=2, rejects_path=str(rejects))
+
+    assert checkpoint.imported == 2
+    assert checkpoint.rejected == 1
+    assert 'row 3: entry code TAKEN001 already belongs to another member' in rejects.read_text()
+
+    # Everything is checkpointed, so a second run imports nothing new
+    again = import_members(database, str(source), batch_size=2, rejects_path=str(rejects))
+    assert again.imported == 2
+    assert len(database.saved) == 2
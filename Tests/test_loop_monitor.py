@@ -0,0 +1,75 @@
+import asyncio
+import json
+import logging
+import time
+import traceback
+
+from loop_monitor import LoopMonitor, blocking_site, PROJECT_DIR
+from metrics import LOOP_STALLS
+
+
+def blocking_call():
+    time.sleep(0.3)
+
+
+async def handler():
+    await asyncio.sleep(0.1)
+    blocking_call()
+
+
+def test_stall_is_attributed_to_the_blocking_call(caplog):
+    async def run():
+        monitor = LoopMonitor(interval=0.02, threshold_ms=100)
+        monitor.start()
+        try:
+            await asyncio.create_task(handler(), name='slow-handler')
+            await asyncio.sleep(0.1)
+        finally:
+            monitor.stop()
+        return monitor
+
+    with caplog.at_level(logging.WARNING, logger='loop_monitor'):
+        monitor = asyncio.run(run())
+
+    assert monitor.stats()['stalls'] == 1
+    assert monitor.stats()['longest_ms'] >= 250
+    [record] = caplog.records
+    event = json.loads(record.getMessage())
+    assert event['event'] == 'loop_stall'
+    assert event['site'] == 'test_loop_monitor.py:blocking_call'
+    assert event['task'] == 'slow-handler'
+    assert event['coroutine'] == 'handler'
+    assert event['stack'][-1].endswith('in blocking_call')
+    assert LOOP_STALLS._series[('test_loop_monitor.py:blocking_call',)] >= 1
+
+
+def test_no_stall_on_a_responsive_loop(caplog):
+    async def run():
+        monitor = LoopMonitor(interval=0.02, threshold_ms=200)
+        monitor.start()
+        await asyncio.sleep(0.2)
+        monitor.stop()
+        return monitor
+
+    with caplog.at_level(logging.WARNING, logger='loop_monitor'):
+        assert asyncio.run(run()).stats()['stalls'] == 0
+    assert not caplog.records
+
+
+def test_disabled_with_zero_threshold():
+    async def run():
+        monitor = LoopMonitor(threshold_ms=0)
+        monitor.start()
+        return monitor._task
+
+    assert asyncio.run(run()) is None
+
+
+def test_blocking_site_skips_library_frames():
+    frames = traceback.StackSummary.from_list([
+        (f'{PROJECT_DIR}/bot.py', 10, 'process_user_message', None),
+        (f'{PROJECT_DIR}/database.py', 20, 'get_all_members', None),
+        ('/usr/lib/python3/site-packages/mysql/connector/cursor.py', 30, 'execute', None),
+    ])
+    assert blocking_site(frames) == 'database.py:get_all_members'
+    assert blocking_site(frames[2:]) is None
@@ -0,0 +1,98 @@
+import time
+
+from member_cache import MemberCache
+
+
+def row(member_id=1, entry_code='ABCD1234', user_id=111, status='Active'):
+    return (member_id, entry_code, user_id, 'Jane Doe', status)
+
+
+def cached(cache, key, rows):
+    cache.put(key, rows, cache.begin())
+
+
+def test_hit_and_miss():
+    cache = MemberCache(max_size=10, ttl=60)
+    assert cache.get(('entry_code', 'ABCD1234')) is None
+    cached(cache, ('entry_code', 'ABCD1234'), [row()])
+    assert cache.get(('entry_code', 'ABCD1234')) == [row()]
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_entry_code_keys_are_case_insensitive():
+    cache = MemberCache(max_size=10, ttl=60)
+    cached(cache, ('entry_code', 'abcd1234'), [row()])
+    assert cache.get(('entry_code', 'ABCD1234')) == [row()]
+    cache.invalidate(entry_code='aBcD1234')
+    assert cache.get(('entry_code', 'ABCD1234')) is None
+
+
+def test_invalidate_by_member_id_drops_every_lookup_of_the_member():
+    cache = MemberCache(max_size=10, ttl=60)
+    cached(cache, ('entry_code', 'ABCD1234'), [row()])
+    cached(cache, ('user_id', '111'), [row()])
+    cache.invalidate(member_id=1)
+    assert cache.get(('entry_code', 'ABCD1234')) is None
+    assert cache.get(('user_id', '111')) is None
+
+
+def test_invalidate_by_user_id_reaches_entry_code_lookups():
+    cache = MemberCache(max_size=10, ttl=60)
+    cached(cache, ('entry_code', 'ABCD1234'), [row()])
+    cache.invalidate(user_id=111)
+    assert cache.get(('entry_code', 'ABCD1234')) is None
+
+
+def test_stale_read_is_not_stored():
+    cache = MemberCache(max_size=10, ttl=60)
+    token = cache.begin()
+    cache.invalidate(member_id=1)
+    cache.put(('entry_code', 'ABCD1234'), [row()], token)
+    assert cache.get(('entry_code', 'ABCD1234')) is None
+
+
+def test_lru_eviction():
+    cache = MemberCache(max_size=2, ttl=60)
+    cached(cache, ('entry_code', 'AAAAAAAA'), [row(1, 'AAAAAAAA', 1)])
+    cached(cache, ('entry_code', 'BBBBBBBB'), [row(2, 'BBBBBBBB', 2)])
+    cache.get(('entry_code', 'AAAAAAAA'))
+    cached(cache, ('entry_code', 'CCCCCCCC'), [row(3, 'CCCCCCCC', 3)])
+    assert cache.get(('entry_code', 'BBBBBBBB')) is None
+    assert cache.get(('entry_code', 'AAAAAAAA')) is not None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_expiry():
+    cache = MemberCache(max_size=10, ttl=0.01)
+    cached(cache, ('entry_code', 'ABCD1234'), [row()])
+    time.sleep(0.02)
+    assert cache.get(('entry_code', 'ABCD1234')) is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_lookups_and_evictions_are_exported():
+    from metrics import registry
+
+    def value(series):
+        for line in registry.render().splitlines():
+            if line.startswith(series + ' '):
+                return float(line.split()[-1])
+        return 0.0
+
+    before = {series: value(series) for series in (
+        'member_cache_lookups_total{outcome="hit"}',
+        'member_cache_lookups_total{outcome="miss"}',
+        'member_cache_evictions_total{reason="size"}',
+    )}
+    cache = MemberCache(max_size=1, ttl=60)
+    cache.get(('user_id', 111))
+    cached(cache, ('user_id', 111), [row()])
+    cache.get(('user_id', 111))
+    cached(cache, ('user_id', 222), [row(2, 'EFGH5678', 222)])
+
+    assert {series: value(series) - count for series, count in before.items()} == {
+        'member_cache_lookups_total{outcome="hit"}': 1,
+        'member_cache_lookups_total{outcome="miss"}': 1,
+        'member_cache_evictions_total{reason="size"}': 1,
+    }
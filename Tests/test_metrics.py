@@ -0,0 +1,74 @@
+import pytest
+
+from metrics import Registry, statement_name
+
+
+def test_statement_name_is_verb_and_first_table():
+    assert statement_name("SELECT m.* FROM members m LEFT JOIN identity_info i ON 1") == 'select members'
+    assert statement_name("  INSERT INTO `upload_metadata` (a) VALUES (%s)") == 'insert upload_metadata'
+    assert statement_name("UPDATE members SET status = %s") == 'update members'
+    assert statement_name("SELECT VERSION()") == 'select'
+    assert statement_name("") == 'empty'
+
+
+def test_render_counters_gauges_and_histograms():
+    registry = Registry()
+    requests = registry.counter('requests_total', 'Requests', ['outcome'])
+    sessions = registry.gauge('sessions', 'Sessions', function=lambda: 3)
+    latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    requests.inc(outcome='ok')
+    requests.inc(2, outcome='ok')
+    requests.inc(outcome='say "hi"\n')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    lines = registry.render().splitlines()
+    assert '# TYPE requests_total counter' in lines
+    assert 'requests_total{outcome="ok"} 3' in lines
+    assert 'requests_total{outcome="say \\"hi\\"\\n"} 1' in lines
+    assert 'sessions 3' in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum 5.55' in lines
+    assert 'latency_seconds_count 3' in lines
+    assert sessions.function() == 3
+
+
+def test_labels_must_match_and_names_are_unique():
+    registry = Registry()
+    counter = registry.counter('things_total', 'Things', ['kind'])
+    with pytest.raises(ValueError):
+        counter.inc(other='x')
+    with pytest.raises(ValueError):
+        registry.counter('things_total', 'Things again')
+
+
+def test_metrics_endpoint_serves_the_registry():
+    import asyncio
+    import socket
+
+    import aiohttp
+
+    from metrics import start_metrics_server
+
+    registry = Registry()
+    registry.counter('pings_total', 'Pings').inc()
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+
+    async def scrape():
+        runner = await start_metrics_server(registry, host='127.0.0.1', port=port)
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f'http://127.0.0.1:{port}/metrics') as response:
+                    return response.status, response.headers['Content-Type'], await response.text()
+        finally:
+            await runner.cleanup()
+
+    status, content_type, body = asyncio.run(scrape())
+    assert status == 200
+    assert content_type.startswith('text/plain; version=0.0.4')
+    assert 'pings_total 1' in body
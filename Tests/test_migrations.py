@@ -0,0 +1,220 @@
+import re
+
+import pytest
+from mysql.connector import Error, errorcode
+
+import migrations
+from migrations import LATEST_VERSION, Migration, migrate
+
+
+class SchemaCursor:
+    """Just enough of MySQL for the migration runner and its steps"""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.row = None
+
+    def execute(self, query, params=()):
+        query = ' '.join(query.split())
+        self.schema.executed.append(query)
+        self.row = None
+        schema = self.schema
+        if query.startswith("SELECT MAX(version) FROM schema_version"):
+            if schema.versions is None:
+                raise Error(msg="Table 'schema_version' doesn't exist", errno=errorcode.ER_NO_SUCH_TABLE)
+            self.row = (max(schema.versions, default=None),)
+        elif query.startswith("CREATE TABLE IF NOT EXISTS schema_version"):
+            if schema.versions is None:
+                schema.versions = []
+        elif query.startswith("INSERT INTO schema_version"):
+            schema.versions.append(params[0])
+        elif query.startswith("SELECT GET_LOCK"):
+            self.row = (1 if schema.lock_available else 0,)
+        elif query.startswith("SELECT RELEASE_LOCK"):
+            schema.released = True
+            self.row = (1,)
+        elif 'information_schema.statistics' in query:
+            self.row = (1,) if tuple(params) in schema.indexes else None
+        elif 'information_schema.columns' in query:
+            value = schema.columns.get(tuple(params))
+            self.row = None if value is None else (value,)
+        elif query.startswith("SELECT COUNT(*) FROM"):
+            table = query.split()[3]
+            self.row = (schema.bad_rows.get(table, 0),)
+        elif query.startswith("ALTER TABLE"):
+            self._alter(query)
+
+    def _alter(self, query):
+        table = query.split()[2]
+        if 'ALGORITHM=INPLACE' in query and table in self.schema.copy_only:
+            raise Error(
+                msg="ALGORITHM=INPLACE is not supported", errno=errorcode.ER_ALTER_OPERATION_NOT_SUPPORTED_REASON
+            )
+        added = re.search(r"ADD (?:UNIQUE )?INDEX (\w+)", query)
+        if added:
+            self.schema.indexes.add((table, added.group(1)))
+        dropped = re.search(r"DROP INDEX (\w+)", query)
+        if dropped:
+            self.schema.indexes.discard((table, dropped.group(1)))
+        modified = re.search(r"MODIFY COLUMN (\w+) (\w+(?:\(\d+\))?(?: UNSIGNED)?)", query)
+        if modified:
+            self.schema.columns[(table, modified.group(1))] = modified.group(2).lower()
+
+    def fetchone(self):
+        return self.row
+
+    def close(self):
+        pass
+
+
+class FakeSchema:
+    """A database's schema state; versions is None until schema_version exists"""
+
+    def __init__(self, versions=None, indexes=(), columns=None):
+        self.versions = versions
+        self.indexes = set(indexes)
+        self.columns = dict(columns or {})
+        self.bad_rows = {}
+        self.copy_only = set()
+        self.lock_available = True
+        self.released = False
+        self.executed = []
+        self.commits = 0
+
+    def cursor(self, **kwargs):
+        return SchemaCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def changes(self):
+        """Statements other than SELECTs"""
+        return [query for query in self.executed if not query.startswith('SELECT')]
+
+
+def test_fresh_database_gets_every_migration():
+    schema = FakeSchema()
+    assert migrate(schema) == list(range(1, LATEST_VERSION + 1))
+    assert schema.versions == list(range(1, LATEST_VERSION + 1))
+    assert schema.commits == LATEST_VERSION
+    assert schema.released
+
+
+def test_up_to_date_schema_costs_one_query():
+    schema = FakeSchema(versions=list(range(1, LATEST_VERSION + 1)))
+    assert migrate(schema) == []
+    assert schema.executed == ["SELECT MAX(version) FROM schema_version"]
+
+
+def test_migrate_stops_at_target():
+    schema = FakeSchema()
+    assert migrate(schema, target=2) == [1, 2]
+    assert migrate(schema) == list(range(3, LATEST_VERSION + 1))
+
+
+def test_lock_timeout_runs_no_ddl():
+    schema = FakeSchema()
+    schema.lock_available = False
+    with pytest.raises(Error, match='migration lock'):
+        migrate(schema)
+    assert schema.versions is None
+    assert schema.changes() == []
+
+
+def test_failed_migration_is_not_recorded_and_is_retried(monkeypatch):
+    calls = []
+
+    def failing_step(cursor):
+        calls.append(1)
+        if len(calls) == 1:
+            raise Error(msg="lost connection")
+
+    monkeypatch.setattr(migrations, 'MIGRATIONS', migrations.MIGRATIONS[:1] + [
+        Migration(2, 'flaky', ['CREATE TABLE IF NOT EXISTS marker (id INT)', failing_step]),
+    ])
+    schema = FakeSchema()
+    with pytest.raises(Error):
+        migrate(schema, target=2)
+    assert schema.versions == [1]
+    assert schema.released
+
+    assert migrate(schema, target=2) == [2]
+    assert schema.versions == [1, 2]
+
+
+def test_datetime_migration_rewrites_strings_before_changing_the_type():
+    schema = FakeSchema(versions=[1, 2], columns={
+        ('members', 'registration_date'): 'varchar(50)',
+        ('identity_info', 'last_updated'): 'varchar(50)',
+    })
+    assert migrate(schema, target=3) == [3]
+
+    changes = schema.changes()
+    updates = [query for query in changes if query.startswith('UPDATE members')]
+    # Trim microseconds, then fall back to created_at, keeping updated_at as it was
+    assert len(updates) == 2
+    assert 'LEFT(registration_date, 19)' in updates[0]
+    assert all('updated_at = updated_at' in query for query in updates)
+    assert changes.index(updates[1]) < changes.index(next(
+        query for query in changes if 'MODIFY COLUMN registration_date DATETIME NOT NULL' in query
+    ))
+    assert schema.columns[('members', 'registration_date')] == 'datetime'
+    assert ('members', 'idx_registration_date') in schema.indexes
+    assert ('identity_info', 'idx_last_updated') in schema.indexes
+
+
+def test_datetime_migration_skips_columns_already_converted():
+    schema = FakeSchema(
+        versions=[1, 2],
+        columns={('members', 'registration_date'): 'datetime', ('identity_info', 'last_updated'): 'datetime'},
+        indexes={('members', 'idx_registration_date'), ('identity_info', 'idx_last_updated')},
+    )
+    assert migrate(schema, target=3) == [3]
+    assert not [query for query in schema.changes() if query.startswith(('UPDATE', 'ALTER'))]
+
+
+def migrated_to_3(**kwargs):
+    return FakeSchema(versions=[1, 2, 3], indexes={
+        ('members', 'idx_user_id'), ('members', 'idx_entry_code'),
+    }, columns={
+        ('members', 'user_id'): 'varchar(255)',
+        ('members', 'entry_code'): 'varchar(255)',
+    }, **kwargs)
+
+
+def test_key_migration_narrows_columns_and_swaps_indexes():
+    schema = migrated_to_3()
+    assert migrate(schema) == [4]
+    assert schema.columns[('members', 'user_id')] == 'bigint unsigned'
+    assert schema.columns[('members', 'entry_code')] == 'char(8)'
+    assert schema.indexes == {('members', 'idx_user_id_id')}
+    assert all('ALGORITHM=INPLACE, LOCK=NONE' in query for query in schema.changes() if query.startswith('ALTER'))
+
+    # Every step checks before it changes anything, so a retry is harmless
+    schema.executed.clear()
+    migrations.MIGRATIONS[-1].apply(schema.cursor())
+    assert schema.changes() == []
+
+
+def test_key_migration_refuses_rows_that_would_not_fit():
+    schema = migrated_to_3()
+    schema.bad_rows['members'] = 2
+    with pytest.raises(Error, match='2 row'):
+        migrate(schema)
+    assert schema.versions == [1, 2, 3]
+    assert schema.columns[('members', 'user_id')] == 'varchar(255)'
+
+
+def test_online_alter_falls_back_to_a_shared_lock_copy():
+    schema = migrated_to_3()
+    schema.copy_only.add('members')
+    assert migrate(schema) == [4]
+    copies = [query for query in schema.changes() if 'ALGORITHM=COPY, LOCK=SHARED' in query]
+    assert len(copies) == 5
+
+
+def test_column_type_ignores_integer_display_width():
+    schema = FakeSchema(columns={('members', 'user_id'): b'BIGINT(20) UNSIGNED'})
+    cursor = schema.cursor()
+    assert migrations.column_type(cursor, 'members', 'user_id') == 'bigint unsigned'
+    assert migrations.column_type(cursor, 'members', 'missing') is None
@@ -0,0 +1,47 @@
+import asyncio
+
+import postprocess
+from postprocess import PostProcessor, sniff_mime, process_upload
+
+
+def test_sniff_mime():
+    assert sniff_mime(b'%PDF-1.7') == 'application/pdf'
+    assert sniff_mime(b'\x89PNG\r\n\x1a\n....') == 'image/png'
+    assert sniff_mime(b'hello') == 'text/plain'
+    assert sniff_mime(b'\xff\xfe\x00') == 'application/octet-stream'
+
+
+def test_process_pdf(tmp_path):
+    path = tmp_path / 'doc'
+    path.write_bytes(b'%PDF-1.4\n1 0 obj << /Type /Pages >>\n2 0 obj << /Type /Page >>\n3 0 obj << /Type/Page >>')
+    metadata = process_upload('ab' * 32, str(path), str(tmp_path / 'derived'), 2048, 256)
+    assert metadata['mime_type'] == 'application/pdf'
+    assert metadata['page_count'] == 2
+
+
+def test_identical_uploads_processed_once_and_seen_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(postprocess, 'SEEN_LIMIT', 2)
+    saved = []
+
+    async def save_metadata(metadata):
+        saved.append(metadata['sha256'])
+
+    async def run():
+        processor = PostProcessor(save_metadata, workers=1, derived_dir=str(tmp_path / 'derived'))
+        path = tmp_path / 'blob'
+        path.write_bytes(b'plain text')
+        try:
+            tasks = [processor.submit(sha256, str(path)) for sha256 in ('a', 'a', 'b', 'c')]
+            assert tasks[1] is None
+            await asyncio.gather(*[task for task in tasks if task])
+            # 'a' was pushed out by 'b' and 'c', so it is processed again
+            assert len(processor._seen) == 2
+            await processor.submit('a', str(path))
+            processor.forget(['c'])
+            await processor.submit('c', str(path))
+        finally:
+            await processor.close()
+
+    asyncio.run(run())
+    assert sorted(saved[:3]) == ['a', 'b', 'c']
+    assert saved[3:] == ['a', 'c']
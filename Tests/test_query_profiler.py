@@ -0,0 +1,84 @@
+import json
+
+from database import Database
+from query_profiler import QueryProfiler, fingerprint
+from fake_mysql import FakeConnection, use_fake_connection
+
+
+def test_fingerprint_replaces_literals_and_collapses_lists():
+    assert fingerprint("SELECT * FROM members WHERE id = 5 AND email = 'a@b.c'") == \
+        "SELECT * FROM members WHERE id = ? AND email = ?"
+    assert fingerprint("SELECT id FROM members WHERE entry_code IN (%s, %s, %s)") == \
+        fingerprint("SELECT id FROM members WHERE entry_code IN (%s)")
+    assert fingerprint("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)") == "INSERT INTO t (a, b) VALUES (...)"
+
+
+def test_fingerprint_ignores_comments_but_not_their_look_alikes_in_strings():
+    assert fingerprint("SELECT 1 -- why\nFROM t /* hint */ WHERE a = 'x -- y'") == "SELECT ? FROM t WHERE a = ?"
+
+
+def test_record_aggregates_and_logs_slow_calls(tmp_path):
+    log = tmp_path / 'slow.log'
+    profiler = QueryProfiler(enabled=True, slow_ms=100, log_path=str(log))
+    profiler.record("SELECT * FROM members WHERE id = %s", (1,), 0.01, 1)
+    profiler.record("SELECT * FROM members WHERE id = %s", (2,), 0.3, 1)
+    profiler.record("SELECT * FROM members WHERE id = %s", (3,), 0.02, 0, failed=True)
+
+    [stats] = profiler.top()
+    assert stats['calls'] == 3
+    assert stats['errors'] == 1
+    assert stats['slow'] == 1
+    assert stats['max'] == 0.3
+    assert stats['rows'] == 2
+
+    [entry] = [json.loads(line) for line in log.read_text().splitlines()]
+    assert entry['statement'] == "SELECT * FROM members WHERE id = ?"
+    assert entry['ms'] == 300.0
+    # Parameters hold personal details and are never logged
+    assert '"2"' not in log.read_text() and 'params' not in entry
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = QueryProfiler(enabled=False)
+    profiler.record("SELECT 1", None, 1.0, 1)
+    assert profiler.top() == []
+
+
+def profiled_database(results=()):
+    database = Database(auto_connect=False)
+    database.profiler = QueryProfiler(enabled=True, log_path='')
+    connection = use_fake_connection(database, FakeConnection(results))
+    return database, connection
+
+
+def test_status_update_statements_are_profiled():
+    database, _ = profiled_database([('FOR UPDATE', [(7, 'Active')])])
+    assert database.update_member_status('ABCD1234', 'Inactive')
+    statements = {stats['statement'] for stats in database.profiler.top(10)}
+    assert "SELECT id, status FROM members WHERE entry_code = ? FOR UPDATE" in statements
+    assert "UPDATE members SET status = ? WHERE id = ?" in statements
+    assert any(statement.startswith("INSERT INTO member_status_history") for statement in statements)
+
+
+def test_bulk_insert_statements_are_profiled():
+    records = [
+        {'user_id': '111', 'full_name': 'jane doe', 'email': 'jane@example.com', 'id_number': '123'},
+        {'user_id': '222', 'full_name': 'john doe', 'email': 'john@example.com'},
+    ]
+    database, connection = profiled_database([
+        ('SELECT entry_code, id', lambda: [(code, i) for i, code in enumerate(pending_codes(connection), 1)]),
+    ])
+    database.save_members_bulk(records)
+    statements = {stats['statement']: stats for stats in database.profiler.top(10)}
+    assert any(statement.startswith("INSERT INTO members") for statement in statements)
+    assert any(statement.startswith("SELECT entry_code, id FROM members") for statement in statements)
+    assert any(statement.startswith("INSERT INTO identity_info") for statement in statements)
+
+
+def pending_codes(connection):
+    """Entry codes of the members inserted so far on connection"""
+    codes = []
+    for query, params in connection.executed:
+        if query.startswith("INSERT INTO members"):
+            codes.extend(params[0::9])
+    return codes
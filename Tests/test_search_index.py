@@ -0,0 +1,66 @@
+from search_index import MemberSearchIndex, word_trigrams, query_trigrams
+
+
+def member(member_id, name='Jane Doe'):
+    return (member_id, f'CODE{member_id}', name, f'user{member_id}@example.com', '0700000000')
+
+
+def loaded_index(rows):
+    index = MemberSearchIndex()
+    index.begin_load()
+    index.add_many(rows)
+    index.finish_load()
+    return index
+
+
+def test_word_trigrams_mark_word_start():
+    assert word_trigrams('ann') == {'  a', ' an', 'ann', 'nn '}
+    assert query_trigrams('an') == {' an'}
+    assert query_trigrams('anne') == {'ann', 'nne'}
+
+
+def test_exact_word_ranks_above_prefix_and_substring():
+    index = loaded_index([
+        member(1, 'Mary Ann'),
+        member(2, 'Annette Smith'),
+        member(3, 'Joanna Lee'),
+    ])
+    assert [row[0] for row in index.search('ann')] == ['CODE1', 'CODE2', 'CODE3']
+
+
+def test_newest_member_first_among_equal_scores():
+    index = loaded_index([member(i) for i in range(1, 50)])
+    assert [row[0] for row in index.search('jane', 3)] == ['CODE49', 'CODE48', 'CODE47']
+
+
+def test_member_saved_during_load_stays_newest():
+    index = MemberSearchIndex()
+    index.begin_load()
+    # save_member indexes a new member while the keyset load is still running
+    index.add(*member(5000))
+    index.add_many(member(i) for i in range(1, 4000))
+    index.finish_load()
+    assert [row[0] for row in index.search('jane', 3)] == ['CODE5000', 'CODE3999', 'CODE3998']
+
+
+def test_search_past_the_newest_candidates():
+    rows = [member(i, 'Jane Doe') for i in range(1, 3000)]
+    rows[0] = member(1, 'Jane Zebra')
+    index = loaded_index(rows)
+    assert [row[0] for row in index.search('jane zebra')] == ['CODE1']
+
+
+def test_adds_ignored_before_load_and_duplicates():
+    index = MemberSearchIndex()
+    index.add(*member(1))
+    assert index.search('jane') == []
+    index.begin_load()
+    index.add(*member(2))
+    index.add(*member(2))
+    assert index.stats()['members'] == 1
+
+
+def test_no_match():
+    index = loaded_index([member(1)])
+    assert index.search('zzz') == []
+    assert index.search('   ') == []
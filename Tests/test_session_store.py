@@ -0,0 +1,93 @@
+import asyncio
+import sqlite3
+
+from session_store import SessionStore, SQLiteSessionStore
+
+
+def test_idle_sessions_are_evicted():
+    store = SessionStore(ttl=60, max_sessions=10)
+    store['1'] = {'awaiting_input': 'email'}
+    store['2'] = {'awaiting_input': 'phone'}
+    store._last_active['1'] -= 120
+    assert store.evict_idle() == ['1']
+    assert '1' not in store and '2' in store
+
+
+def test_least_recently_used_session_goes_first_over_the_limit():
+    store = SessionStore(ttl=60, max_sessions=2)
+    store['1'] = {}
+    store['2'] = {}
+    store.save('1')
+    store['3'] = {}
+    assert '2' not in store
+    assert '1' in store and '3' in store
+    assert store.stats()['evicted'] == 1
+
+
+def test_sqlite_store_round_trip(tmp_path):
+    path = str(tmp_path / 'sessions.db')
+
+    async def first_run():
+        store = SQLiteSessionStore(path=path, flush_interval=60, ttl=3600)
+        await store.open()
+        store['111'] = {'awaiting_input': 'email', 'full_name': 'Jane Doe'}
+        store['222'] = {'awaiting_input': 'phone'}
+        store['111']['email'] = 'jane@example.com'
+        store.save('111')
+        del store['222']
+        await store.close()
+
+    async def second_run():
+        store = SQLiteSessionStore(path=path, flush_interval=60, ttl=3600)
+        await store.open()
+        try:
+            return {user_id: store[user_id] for user_id in ('111', '222') if user_id in store}
+        finally:
+            await store.close()
+
+    asyncio.run(first_run())
+    assert asyncio.run(second_run()) == {
+        '111': {'awaiting_input': 'email', 'full_name': 'Jane Doe', 'email': 'jane@example.com'},
+    }
+
+
+def test_expired_sessions_are_not_restored(tmp_path):
+    path = str(tmp_path / 'sessions.db')
+
+    async def run():
+        store = SQLiteSessionStore(path=path, flush_interval=60, ttl=3600)
+        await store.open()
+        store['111'] = {'awaiting_input': 'email'}
+        store._last_active['111'] -= 7200
+        await store.close()
+        store = SQLiteSessionStore(path=path, flush_interval=60, ttl=3600)
+        await store.open()
+        try:
+            return len(store)
+        finally:
+            await store.close()
+
+    assert asyncio.run(run()) == 0
+
+
+def test_failed_open_is_retried(tmp_path):
+    folder = tmp_path / 'state'
+    store = SQLiteSessionStore(path=str(folder / 'sessions.db'), flush_interval=60, ttl=3600)
+
+    async def run():
+        try:
+            await store.open()
+        except sqlite3.Error:
+            pass
+        else:
+            raise AssertionError("opening a file in a missing folder should fail")
+        assert store._flusher is None
+        # The next on_ready tries again
+        folder.mkdir()
+        await store.open()
+        try:
+            assert store._flusher is not None
+        finally:
+            await store.close()
+
+    asyncio.run(run())
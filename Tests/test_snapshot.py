@@ -0,0 +1,67 @@
+import json
+from datetime import datetime
+
+import mysql.connector
+import pytest
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+from fake_mysql import FakeConnection
+from snapshot import SnapshotJob, arrow_schema, mask_value, to_record_batch
+
+NOW = datetime(2025, 3, 4, 12, 0, 0)
+UPDATED = datetime(2025, 3, 4, 11, 0, 0)
+
+
+def test_mask_value():
+    assert mask_value('12345678') == '*****678'
+    assert mask_value('12') == '**'
+    assert mask_value(None) is None
+    assert mask_value('N/A') is None
+
+
+def test_record_batch_masks_identity_numbers_and_parses_timestamps():
+    rows = [(1, 7, '12345678', None, 'A001234567Z', '2025-03-01 08:00:00', UPDATED, UPDATED)]
+    batch = to_record_batch('identity_info', rows, arrow_schema('identity_info'))
+    record = batch.to_pylist()[0]
+    assert record['id_number'] == '*****678'
+    assert record['passport_number'] is None
+    assert record['kra_number'] == '********67Z'
+    # Strings from a database that hasn't been migrated yet still become timestamps
+    assert record['last_updated'] == datetime(2025, 3, 1, 8, 0)
+
+
+def member_row(member_id, user_id):
+    return (member_id, 'ABCD1234', user_id, 'Jane Doe', 'jane@example.com', '0700', '1990-01-01',
+            'blob:ab', UPDATED, 'Active', UPDATED, UPDATED)
+
+
+def test_run_writes_parts_and_advances_watermarks(tmp_path, monkeypatch):
+    connection = FakeConnection([
+        ('SELECT NOW()', [(NOW,)]),
+        ('FROM members', [member_row(1, 1234567890123456789), member_row(2, 5)]),
+    ])
+    monkeypatch.setattr(mysql.connector, 'connect', lambda **params: connection)
+    job = SnapshotJob({}, out_dir=str(tmp_path), lag=5, batch_size=1)
+
+    assert job.run() == {'members': 2, 'identity_info': 0, 'member_status_history': 0}
+
+    parts = list((tmp_path / 'members' / 'dt=2025-03-04').glob('part-*.parquet'))
+    assert len(parts) == 1
+    table = pq.read_table(parts[0])
+    assert table.column('user_id').to_pylist() == ['1234567890123456789', '5']
+    # Empty tables get no file
+    assert not (tmp_path / 'identity_info').exists()
+
+    watermarks = json.loads((tmp_path / '_watermarks.json').read_text())
+    assert watermarks == {table: '2025-03-04 11:59:55' for table in watermarks}
+    assert len(watermarks) == 3
+
+    # The next run only asks for rows changed since the watermark
+    connection.executed.clear()
+    job.run()
+    members_query, params = next(
+        (query, params) for query, params in connection.executed if 'FROM members' in query
+    )
+    assert members_query.endswith("WHERE updated_at < %s AND updated_at >= %s")
+    assert params == ['2025-03-04 11:59:55', '2025-03-04 11:59:55']
@@ -0,0 +1,37 @@
+import os
+import sys
+import json
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from profile_startup import LAZY_MODULES, parse_report  # noqa: E402
+
+CHECK = """
+import sys, json
+import bot, database
+print(json.dumps({
+    'loaded': [name for name in %r if name in sys.modules],
+    'db_created': database._db is not None,
+}))
+"""
+
+
+def test_importing_the_bot_defers_heavy_modules_and_the_database():
+    result = subprocess.run(
+        [sys.executable, '-c', CHECK % (LAZY_MODULES,)],
+        cwd=ROOT, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    assert report == {'loaded': [], 'db_created': False}
+
+
+def test_parse_report_reads_importtime_lines():
+    lines = [
+        'import time: self [us] | cumulative | imported package',
+        'import time:       120 |        120 |   json.decoder',
+        'import time:       300 |        420 | json',
+    ]
+    assert parse_report(lines) == [('json.decoder', 120, 120, 1), ('json', 300, 420, 0)]
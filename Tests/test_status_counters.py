@@ -0,0 +1,39 @@
+from database import Database
+from status_counters import StatusCounters
+from fake_mysql import FakeConnection, use_fake_connection
+
+
+def test_counts_follow_inserts_and_changes():
+    counters = StatusCounters()
+    counters.load({'Active': 3, 'Inactive': 1})
+    counters.record_insert('Active')
+    counters.record_change('Active', 'Suspended')
+    counters.record_change('Inactive', 'Inactive')
+    assert counters.snapshot() == {'Active': 3, 'Inactive': 1, 'Suspended': 1}
+
+
+def test_updates_are_ignored_until_loaded():
+    counters = StatusCounters()
+    counters.record_insert('Active')
+    assert counters.snapshot() is None
+    counters.load({'Active': 2})
+    counters.invalidate()
+    assert not counters.loaded
+
+
+def test_reload_reports_drift():
+    counters = StatusCounters()
+    counters.load({'Active': 3})
+    counters.load({'Active': 5, 'Inactive': 1})
+    assert counters.drift == 3
+    assert counters.reconciliations == 2
+
+
+def test_database_reloads_invalidated_counts_from_mysql():
+    database = Database(auto_connect=False)
+    use_fake_connection(database, FakeConnection([
+        ('GROUP BY status', [('Active', 4), ('Inactive', 2)]),
+    ]))
+    assert database.get_status_counts() == {'Active': 4, 'Inactive': 2, 'Suspended': 0}
+    database.status_counters.record_insert('Active')
+    assert database.get_status_counts()['Active'] == 5
@@ -0,0 +1,138 @@
+import os
+import asyncio
+import hashlib
+
+import pytest
+
+from blob_store import BlobStore
+from uploads import UploadPipeline, UploadRejected
+
+
+class FakeAttachment:
+    def __init__(self, content, size=None, filename='id.jpg'):
+        self.url = 'https://cdn.example/' + filename
+        self.size = len(content) if size is None else size
+        self.filename = filename
+
+
+class FakeContent:
+    def __init__(self, body):
+        self.body = body
+
+    async def iter_chunked(self, size):
+        for start in range(0, len(self.body), size):
+            yield self.body[start:start + size]
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.content = FakeContent(body)
+
+    def raise_for_status(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """Serves the same body for every URL"""
+
+    closed = False
+
+    def __init__(self, body):
+        self.body = body
+
+    def get(self, url):
+        return FakeResponse(self.body)
+
+
+def make_pipeline(tmp_path, body, **limits):
+    store = BlobStore(root=str(tmp_path / 'blobs'), derived_dir=str(tmp_path / 'derived'))
+    pipeline = UploadPipeline(blob_store=store, chunk_size=4, **limits)
+    pipeline._get_session = lambda: FakeSession(body)
+    return pipeline, store
+
+
+def test_download_is_hashed_and_stored_once(tmp_path):
+    body = b'passport scan bytes'
+    pipeline, store = make_pipeline(tmp_path, body, max_file_bytes=1024, max_user_bytes=4096)
+
+    async def run():
+        first = await pipeline.ingest(FakeAttachment(body), 1)
+        second = await pipeline.ingest(FakeAttachment(body), 2)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first.sha256 == hashlib.sha256(body).hexdigest()
+    assert first.size == len(body)
+    assert not first.deduplicated and second.deduplicated
+    assert first.path == second.path
+    with open(first.path, 'rb') as handle:
+        assert handle.read() == body
+    assert store.resolve(first.ref) == first.path
+    assert pipeline.stats()['completed'] == 2
+
+
+def test_declared_size_over_the_limit_is_rejected_before_downloading(tmp_path):
+    pipeline, _ = make_pipeline(tmp_path, b'x' * 10, max_file_bytes=100, max_user_bytes=1000)
+    with pytest.raises(UploadRejected, match='too large'):
+        asyncio.run(pipeline.ingest(FakeAttachment(b'x' * 10, size=101), 1))
+    assert pipeline.stats()['rejected'] == 1
+    assert pipeline.bytes_downloaded == 0
+
+
+def test_body_larger_than_declared_is_cut_off_and_cleaned_up(tmp_path):
+    pipeline, store = make_pipeline(tmp_path, b'x' * 50, max_file_bytes=20, max_user_bytes=1000)
+    with pytest.raises(UploadRejected):
+        asyncio.run(pipeline.ingest(FakeAttachment(b'x' * 50, size=10), 1))
+    # The quota is given back and no partial file is left behind
+    assert pipeline._usage['1'] == 0
+    leftovers = [name for _, _, names in os.walk(store.root) for name in names]
+    assert leftovers == []
+
+
+def test_per_user_quota(tmp_path):
+    body = b'y' * 30
+    pipeline, _ = make_pipeline(tmp_path, body, max_file_bytes=100, max_user_bytes=50)
+
+    async def run():
+        await pipeline.ingest(FakeAttachment(body), 1)
+        with pytest.raises(UploadRejected, match='upload limit'):
+            await pipeline.ingest(FakeAttachment(body), 1)
+        # Someone else's quota is separate
+        await pipeline.ingest(FakeAttachment(body), 2)
+
+    asyncio.run(run())
+    assert pipeline._usage == {'1': 30, '2': 30}
+
+
+def test_quota_counts_uploads_saved_before_a_restart(tmp_path):
+    body = b'z' * 30
+    pipeline, _ = make_pipeline(tmp_path, body, max_file_bytes=100, max_user_bytes=50)
+    lookups = []
+
+    async def stored_usage(user_id):
+        lookups.append(user_id)
+        if user_id == '3' and lookups.count('3') == 1:
+            raise ConnectionError("database unavailable")
+        return {'1': 40}.get(user_id, 0)
+
+    pipeline.stored_usage = stored_usage
+
+    async def run():
+        with pytest.raises(UploadRejected, match='upload limit'):
+            await pipeline.ingest(FakeAttachment(body), 1)
+        await pipeline.ingest(FakeAttachment(body), 2)
+        # An unreachable database doesn't block the upload, and is asked again
+        await pipeline.ingest(FakeAttachment(body), 3)
+        with pytest.raises(UploadRejected, match='upload limit'):
+            await pipeline.ingest(FakeAttachment(body), 3)
+
+    asyncio.run(run())
+    assert lookups == ['1', '2', '3', '3']
+    assert pipeline._usage == {'1': 40, '2': 30, '3': 30}
@@ -0,0 +1,50 @@
+import asyncio
+
+from views import MemberPageView, format_summary, format_page, format_upload, MESSAGE_LIMIT, PAGE_SIZE
+
+
+def member_row(member_id, name='Jane Doe', email='jane@example.com', status='Active'):
+    return (member_id, f'CODE{member_id:04d}', name, email, '2024-01-01 10:00:00', status)
+
+
+def render(rows):
+    async def build():
+        # discord.ui.View needs a running loop
+        summary = format_summary({'Active': 5, 'Inactive': 2, 'Suspended': 1})
+        return MemberPageView(1, summary, rows, has_more=True).render()
+    return asyncio.run(build())
+
+
+def test_page_lists_every_member():
+    message = render([member_row(i) for i in range(1, 4)])
+    assert '**Total Members:** 8' in message
+    assert message.count('Jane Doe') == 3
+
+
+def test_page_with_long_names_and_emails_fits_in_one_message():
+    rows = [member_row(i, name='N' * 255, email='e' * 240 + '@example.com', status='Suspended')
+            for i in range(PAGE_SIZE)]
+    message = render(rows)
+    assert len(message) <= MESSAGE_LIMIT
+    # Every member is still on the page, just shortened
+    assert all(f'CODE{i:04d}' in message for i in range(PAGE_SIZE))
+    assert '…' in format_page(rows[:1], 1)
+
+
+def test_format_upload():
+    image = format_upload('ABCD1234', {
+        'sha256': 'ab' * 32, 'mime_type': 'image/jpeg', 'size_bytes': 3 * 1024 * 1024,
+        'width': 800, 'height': 600, 'page_count': None, 'error': None, 'processed_at': None,
+    })
+    assert '**Type:** image/jpeg' in image
+    assert '**Size:** 3.0 MB' in image
+    assert '800 × 600' in image
+    assert 'Pages' not in image and 'failed' not in image
+
+    broken = format_upload('ABCD1234', {
+        'sha256': 'cd' * 32, 'mime_type': 'application/pdf', 'size_bytes': 1536,
+        'page_count': 2, 'error': 'x' * 1000,
+    })
+    assert '**Size:** 1.5 KB' in broken
+    assert '**Pages:** 2' in broken
+    assert len(broken) < 500
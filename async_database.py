@@ -0,0 +1,216 @@
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from mysql.connector import Error, errorcode
+from database import Database
+from db_pool import ConnectionPool
+
+
+class AsyncDatabase:
+    """Awaitable data-access layer backed by a bounded connection pool.
+
+    Every call runs the blocking mysql.connector work on a dedicated thread
+    pool sized to the connection pool, so a slow query only holds up the
+    coroutine that issued it instead of the whole event loop.
+    """
+
+    def __init__(self, min_size=None, max_size=None, acquire_timeout=None,
+                 health_check_interval=None):
+        self._pool_options = {
+            'min_size': min_size,
+            'max_size': max_size,
+            'acquire_timeout': acquire_timeout,
+            'health_check_interval': health_check_interval,
+        }
+        self.pool = None
+        self.db = None
+        self._executor = None
+        self._start_lock = None
+        self._reconcile_task = None
+        self._search_task = None
+        self.reconcile_interval = float(os.getenv('STATUS_RECONCILE_INTERVAL', '300'))
+
+    async def start(self):
+        """Create the pool and apply any pending migrations (idempotent)"""
+        if self.db is not None:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.db is not None:
+                return
+            db = Database(auto_connect=False)
+            pool = ConnectionPool(**self._pool_options, **db.connection_params())
+            db.pool = pool
+            self._executor = ThreadPoolExecutor(
+                max_workers=pool.max_size, thread_name_prefix='db'
+            )
+            loop = asyncio.get_running_loop()
+            try:
+                try:
+                    await loop.run_in_executor(self._executor, pool.fill)
+                except Error as e:
+                    if e.errno != errorcode.ER_BAD_DB_ERROR:
+                        raise
+                    # First run: the database itself doesn't exist yet
+                    await loop.run_in_executor(self._executor, db.create_database)
+                    await loop.run_in_executor(self._executor, pool.fill)
+                await loop.run_in_executor(self._executor, db.initialize_database)
+            except Exception:
+                pool.close()
+                self._executor.shutdown(wait=False)
+                self._executor = None
+                raise
+            self.pool = pool
+            self.db = db
+            print(f"Database pool ready ({pool.min_size}-{pool.max_size} connections)")
+            self._reconcile_task = asyncio.create_task(self._reconcile_loop())
+            self.ensure_search_index()
+
+    def ensure_search_index(self):
+        """Start loading the search index unless it is loaded or loading"""
+        if self.db is None or self.db.search_index.loaded:
+            return
+        if self._search_task is None or self._search_task.done():
+            self._search_task = asyncio.create_task(self._load_search_index())
+
+    async def _load_search_index(self):
+        """Build the member search index without holding up start()"""
+        loop = asyncio.get_running_loop()
+        try:
+            stats = await loop.run_in_executor(self._executor, self.db.load_search_index)
+            print(f"Search index ready ({stats['members']} members)")
+        except Exception as e:
+            print(f"Error loading search index: {e}")
+
+    async def _reconcile_loop(self):
+        """Periodically correct the status counters against the members table"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(self._executor, self.db.reconcile_status_counts)
+            except Exception as e:
+                print(f"Error reconciling status counters: {e}")
+            await asyncio.sleep(self.reconcile_interval)
+
+    async def close(self):
+        """Release every pooled connection"""
+        if self._reconcile_task is not None:
+            self._reconcile_task.cancel()
+            self._reconcile_task = None
+        if self.pool is not None:
+            self.pool.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self.pool = None
+        self.db = None
+        self._executor = None
+
+    async def _run(self, method, *args, **kwargs):
+        await self.start()
+        loop = asyncio.get_running_loop()
+        call = functools.partial(getattr(self.db, method), *args, **kwargs)
+        return await loop.run_in_executor(self._executor, call)
+
+    async def execute_query(self, query, params=None, fetch=False, commit=False):
+        """Execute a SQL query on a pooled connection"""
+        return await self._run('execute_query', query, params, fetch=fetch, commit=commit)
+
+    async def save_member(self, user_id, data):
+        """Save member data to the database"""
+        return await self._run('save_member', user_id, data)
+
+    async def save_members_bulk(self, records, chunk_size=500):
+        """Save many onboarding records in one transaction"""
+        return await self._run('save_members_bulk', records, chunk_size=chunk_size)
+
+    async def get_member(self, entry_code=None, user_id=None):
+        """Get member data by entry code or user ID"""
+        return await self._run('get_member', entry_code=entry_code, user_id=user_id)
+
+    async def update_member_status(self, entry_code, status):
+        """Update member status"""
+        return await self._run('update_member_status', entry_code, status)
+
+    async def get_all_members(self):
+        """Get all members with their details"""
+        return await self._run('get_all_members')
+
+    async def get_members_page(self, before_id=None, after_id=None, limit=10, status=None):
+        """Get one keyset-paginated page of members, newest first"""
+        return await self._run(
+            'get_members_page', before_id=before_id, after_id=after_id, limit=limit, status=status
+        )
+
+    async def get_members_registered_between(self, start=None, end=None, status=None, limit=None):
+        """Members registered in [start, end), oldest first"""
+        return await self._run(
+            'get_members_registered_between', start=start, end=end, status=status, limit=limit
+        )
+
+    async def get_identity_updated_since(self, since, limit=None):
+        """Members whose identity info changed at or after since"""
+        return await self._run('get_identity_updated_since', since, limit=limit)
+
+    async def search_members(self, text, limit=10):
+        """Members matching text in name, email or phone, best first"""
+        return await self._run('search_members', text, limit=limit)
+
+    def search_ready(self):
+        """True once the search index has been loaded"""
+        return self.db is not None and self.db.search_index.loaded
+
+    async def count_members_by_status(self):
+        """Number of members per status value"""
+        return await self._run('count_members_by_status')
+
+    async def get_blob_references(self):
+        """Hashes of every upload blob referenced by a member"""
+        return await self._run('get_blob_references')
+
+    async def get_user_upload_bytes(self, user_id):
+        """Bytes of uploads already stored for a Discord user"""
+        return await self._run('get_user_upload_bytes', user_id)
+
+    async def save_upload_metadata(self, metadata):
+        """Record post-processing results for an upload blob"""
+        return await self._run('save_upload_metadata', metadata)
+
+    async def get_upload_metadata(self, entry_code):
+        """Post-processing results for a member's uploaded file, or None"""
+        return await self._run('get_upload_metadata', entry_code)
+
+    async def delete_upload_metadata(self, hashes):
+        """Drop post-processing results for deleted blobs"""
+        return await self._run('delete_upload_metadata', hashes)
+
+    async def get_status_counts(self):
+        """Member totals per status from the maintained counters"""
+        counts = self.db.status_counters.snapshot() if self.db is not None else None
+        if counts is not None:
+            return counts
+        return await self._run('get_status_counts')
+
+    def stats(self):
+        """Pool, cache, entry code, search index and profiler counters, empty until started"""
+        if self.db is None:
+            return {}
+        return {
+            'pool': self.pool.stats(),
+            'member_cache': self.db.member_cache.stats(),
+            'entry_codes': self.db.entry_codes.stats(),
+            'search_index': self.db.search_index.stats(),
+            'query_profiler': self.db.profiler.stats(),
+        }
+
+    def top_queries(self, limit=10):
+        """Statements with the most total time (in memory, no query needed); None until started"""
+        if self.db is None:
+            return None
+        return self.db.profiler.top(limit)
+
+
+# Shared instance used by the bot
+async_db = AsyncDatabase()
@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import argparse
+
+# Allow running as `python benchmarks/bench_flow.py` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from onboarding_flow import onboarding
+
+# Scripted conversations covering every branch of the onboarding flow
+CONVERSATIONS = {
+    'national_id': [
+        "Jane Doe", "JANE@EXAMPLE.COM", "0712345678", "01/02/1990",
+        "yes", "12345678", "yes", "A123456789Z", "no",
+    ],
+    'passport_with_retries': [
+        "John Smith", "john@example.com", "0722000000", "15/06/1985",
+        "maybe", "n", "12345", "ab12345", "y", "short", "skip", "n",
+    ],
+    'upload_skipped': [
+        "Mary Jane", "mary@example.com", "0733111222", "30/11/2000",
+        "y", "1234567", "no", "yes", "skip",
+    ],
+}
+
+
+def replay(script):
+    """Feed one scripted conversation through the engine"""
+    session = {}
+    onboarding.begin(session)
+    for text in script:
+        result = onboarding.step(session, text)
+        if result.done:
+            return session
+    raise AssertionError(f"Conversation did not finish: {session}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay scripted onboarding conversations through the flow engine")
+    parser.add_argument('--iterations', type=int, default=20000, help="replays per conversation")
+    args = parser.parse_args()
+
+    print(f"Replaying {len(CONVERSATIONS)} conversations x {args.iterations} iterations")
+    total_messages = 0
+    total_seconds = 0.0
+    for name, script in CONVERSATIONS.items():
+        replay(script)  # warm up and sanity check
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            replay(script)
+        elapsed = time.perf_counter() - started
+        messages = len(script) * args.iterations
+        total_messages += messages
+        total_seconds += elapsed
+        print(f"  {name:<24} {messages / elapsed:>12,.0f} msg/s  {elapsed / messages * 1e6:6.2f} us/msg")
+    print(f"  {'overall':<24} {total_messages / total_seconds:>12,.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+# Allow running as `python benchmarks/bench_member_lookup.py` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database, MEMBER_BY_ENTRY_CODE, MEMBER_BY_USER_ID
+
+# Index each lookup must use on members, and access types that mean
+# "a single seek" rather than a scan
+EXPECTED_PLANS = {
+    'entry_code': (MEMBER_BY_ENTRY_CODE, {'entry_code'}),
+    'user_id': (MEMBER_BY_USER_ID, {'idx_user_id_id'}),
+}
+SEEK_TYPES = {'const', 'eq_ref', 'ref'}
+
+
+def seed(db, count):
+    """Insert count synthetic members, some users registering more than once"""
+    users = [random.randint(10 ** 17, 2 ** 63) for _ in range(max(1, count // 2))]
+    records = [
+        {
+            'user_id': random.choice(users),
+            'full_name': f'bench member {i}',
+            'email': f'bench{i}@example.com',
+            'phone': '0700000000',
+            'dob': '01/01/1990',
+            'status': random.choice(['Active', 'Active', 'Inactive']),
+        }
+        for i in range(count)
+    ]
+    for start in range(0, count, 5000):
+        db.save_members_bulk(records[start:start + 5000])
+
+
+def explain(db, query, param):
+    """EXPLAIN rows for query, as dicts keyed by column name"""
+    with db.connection_scope() as connection:
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute("EXPLAIN " + query, (param,))
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+def check_plan(rows, expected_keys):
+    """True if members is read with one index seek and no filesort"""
+    for row in rows:
+        if row['table'] != 'm':
+            continue
+        extra = row.get('Extra') or ''
+        return (
+            row['type'] in SEEK_TYPES
+            and row['key'] in expected_keys
+            and 'filesort' not in extra
+        )
+    return False
+
+
+def time_lookups(db, query, params):
+    timings = []
+    for param in params:
+        started = time.perf_counter()
+        db.execute_query(query, (param,), fetch=True)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that member lookups are single index seeks and time them")
+    parser.add_argument('--seed', type=int, default=0, help="insert this many synthetic members first")
+    parser.add_argument('--lookups', type=int, default=2000, help="lookups to time per query")
+    args = parser.parse_args()
+
+    db = Database()
+    if not db.connection:
+        print("Could not connect to the database")
+        return 1
+    if args.seed:
+        print(f"Seeding {args.seed} members...")
+        seed(db, args.seed)
+
+    sample = db.execute_query(
+        "SELECT entry_code, user_id FROM members ORDER BY RAND() LIMIT %s", (args.lookups,), fetch=True
+    )
+    if not sample:
+        print("No members to look up; run with --seed 100000")
+        return 1
+    total = db.execute_query("SELECT COUNT(*) FROM members", fetch=True)[0][0]
+    print(f"{total} members, timing {len(sample)} lookups per query (cache bypassed)\n")
+
+    ok = True
+    for name, (query, expected_keys) in EXPECTED_PLANS.items():
+        params = [row[0] if name == 'entry_code' else row[1] for row in sample]
+        plan = explain(db, query, params[0])
+        seek = check_plan(plan, expected_keys)
+        ok = ok and seek
+        p50, p99 = time_lookups(db, query, params)
+        print(f"by {name}: {'single index seek' if seek else 'NOT A SINGLE SEEK'}  "
+              f"p50 {p50 * 1e3:.3f} ms  p99 {p99 * 1e3:.3f} ms")
+        for row in plan:
+            print(f"    table={row['table']} type={row['type']} key={row['key']} "
+                  f"rows={row['rows']} extra={row.get('Extra') or ''}")
+    return 0 if ok else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
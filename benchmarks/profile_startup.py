@@ -0,0 +1,61 @@
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should only load when a feature actually needs them
+LAZY_MODULES = ['pandas', 'openpyxl', 'pyarrow', 'PIL']
+
+
+def profile_import(module):
+    """Import module in a fresh interpreter with -X importtime; returns the raw report lines"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return [line for line in result.stderr.splitlines() if line.startswith('import time:')]
+
+
+def parse_report(lines):
+    """[(name, self_us, cumulative_us, depth)] from -X importtime output"""
+    entries = []
+    for line in lines[1:]:  # first line is the header
+        self_us, cumulative_us, name = line.split('|')
+        self_us = int(self_us.split(':')[-1])
+        # -X importtime indents nested imports by two spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), self_us, int(cumulative_us), depth))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show where import time goes when the bot starts")
+    parser.add_argument('module', nargs='?', default='bot')
+    parser.add_argument('--top', type=int, default=15, help="number of top-level imports to list")
+    args = parser.parse_args()
+
+    entries = parse_report(profile_import(args.module))
+    total = next(cumulative for name, _, cumulative, _ in reversed(entries) if name == args.module)
+    loaded = {name for name, _, _, _ in entries}
+
+    # Direct imports of the profiled module are one level below it
+    target_depth = next(depth for name, _, _, depth in reversed(entries) if name == args.module)
+    direct = [entry for entry in entries if entry[3] == target_depth + 1]
+    direct.sort(key=lambda entry: entry[2], reverse=True)
+
+    print(f"import {args.module}: {total / 1000:.1f} ms")
+    print(f"\n{'module':<30} {'cumulative ms':>14}")
+    for name, _, cumulative, _ in direct[:args.top]:
+        print(f"{name:<30} {cumulative / 1000:>14.1f}")
+
+    print("\nDeferred modules:")
+    for name in LAZY_MODULES:
+        print(f"  {name:<10} {'LOADED at import' if name in loaded else 'not loaded'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import os
+import time
+import shutil
+import uuid
+import asyncio
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# members.file_path values that point into the blob store start with this
+REF_PREFIX = 'sha256:'
+
+
+class BlobStore:
+    """Content-addressable store for uploaded files.
+
+    A file lives at <root>/<aa>/<bb>/<sha256>, where aa and bb are the first
+    two byte pairs of its hash, so no directory grows past 256 entries per
+    level. Identical uploads share one blob. Members reference blobs as
+    'sha256:<hex>' in members.file_path, and blobs nobody references are
+    removed by collect_garbage once they are older than the grace period,
+    together with the resized copies post-processing wrote for them under
+    <derived_dir>/<sha256>/.
+    """
+
+    def __init__(self, root=None, gc_grace=None, derived_dir=None):
+        self.root = root or os.getenv('BLOB_DIR', os.path.join('user_uploads', 'blobs'))
+        self.derived_dir = derived_dir or os.getenv('DERIVED_DIR', os.path.join('user_uploads', 'derived'))
+        # Uploads sit unreferenced until onboarding finishes, so the grace
+        # period must outlive an onboarding session
+        self.gc_grace = float(gc_grace if gc_grace is not None else os.getenv('BLOB_GC_GRACE', '172800'))
+        self.tmp_dir = os.path.join(self.root, 'tmp')
+
+        self.stored = 0
+        self.deduplicated = 0
+        self.collected = 0
+        self.collected_bytes = 0
+
+    @staticmethod
+    def ref(sha256):
+        """Value to store in members.file_path for a blob"""
+        return REF_PREFIX + sha256
+
+    @staticmethod
+    def hash_from_ref(ref):
+        """Blob hash for a members.file_path value, or None for legacy paths"""
+        if isinstance(ref, str) and ref.startswith(REF_PREFIX):
+            return ref[len(REF_PREFIX):]
+        return None
+
+    def path_for(self, sha256):
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def resolve(self, ref):
+        """Local file for a members.file_path value (blob ref or legacy path)"""
+        sha256 = self.hash_from_ref(ref)
+        return self.path_for(sha256) if sha256 else ref
+
+    def temp_path(self):
+        """Fresh scratch file for a download in progress"""
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        return os.path.join(self.tmp_dir, f"{uuid.uuid4().hex}.part")
+
+    def put_file(self, temp_path, sha256):
+        """Move a finished download into place; returns (path, deduplicated)"""
+        path = self.path_for(sha256)
+        if os.path.exists(path):
+            os.remove(temp_path)
+            # Refresh the mtime so a blob that was about to be collected survives
+            os.utime(path)
+            self.deduplicated += 1
+            return path, True
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+        self.stored += 1
+        return path, False
+
+    def iter_blobs(self):
+        """Yield (sha256, path, stat) for every stored blob"""
+        if not os.path.isdir(self.root):
+            return
+        for first in os.scandir(self.root):
+            if not first.is_dir() or len(first.name) != 2:
+                continue
+            for second in os.scandir(first.path):
+                if not second.is_dir():
+                    continue
+                for entry in os.scandir(second.path):
+                    if entry.is_file():
+                        yield entry.name, entry.path, entry.stat()
+
+    def collect_garbage(self, referenced, now=None):
+        """
+        Delete blobs not in referenced (a set of hashes) and past the grace
+        period, and their derived files. Returns (removed hashes, bytes freed).
+        """
+        cutoff = (now or time.time()) - self.gc_grace
+        removed = []
+        removed_bytes = 0
+        for sha256, path, stat in self.iter_blobs():
+            if sha256 in referenced or stat.st_mtime > cutoff:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            shutil.rmtree(os.path.join(self.derived_dir, sha256), ignore_errors=True)
+            removed.append(sha256)
+            removed_bytes += stat.st_size
+
+        # Leftovers from downloads that died halfway
+        if os.path.isdir(self.tmp_dir):
+            for entry in os.scandir(self.tmp_dir):
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+
+        self.collected += len(removed)
+        self.collected_bytes += removed_bytes
+        return removed, removed_bytes
+
+    def stats(self):
+        return {
+            'stored': self.stored,
+            'deduplicated': self.deduplicated,
+            'collected': self.collected,
+            'collected_bytes': self.collected_bytes,
+        }
+
+
+async def run_garbage_collector(store, fetch_references, interval=None, on_removed=None):
+    """
+    Periodically remove orphaned blobs. fetch_references is an async
+    callable returning the referenced hashes; on_removed, if given, is
+    awaited with the hashes that were deleted.
+    """
+    interval = float(interval or os.getenv('BLOB_GC_INTERVAL', '3600'))
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            referenced = await fetch_references()
+            removed, removed_bytes = await asyncio.to_thread(store.collect_garbage, referenced)
+            if removed:
+                print(f"Blob GC removed {len(removed)} orphaned file(s), {removed_bytes} bytes")
+                if on_removed is not None:
+                    await on_removed(removed)
+        except Exception as e:
+            print(f"Error collecting orphaned uploads: {e}")
+
+
+# Shared store used by the upload pipeline
+blob_store = BlobStore()
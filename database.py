@@ -1,20 +1,81 @@
 import os
+import time
 import mysql.connector
-from mysql.connector import Error
+from contextlib import contextmanager
+from mysql.connector import Error, errorcode
 from datetime import datetime
 from dotenv import load_dotenv
+import migrations
+from entry_codes import entry_codes
+from status_counters import StatusCounters
+from member_cache import MemberCache
+from search_index import MemberSearchIndex
+from metrics import statement_name, QUERY_SECONDS, QUERY_ERRORS
+from query_profiler import QueryProfiler
 
 # Load environment variables
 load_dotenv()
 
+MEMBER_INSERT = """
+    INSERT INTO members
+    (entry_code, user_id, full_name, email, phone, date_of_birth, file_path, registration_date, status)
+    VALUES """
+MEMBER_ROW_PLACEHOLDERS = "(%s, %s, %s, %s, %s, %s, %s, %s, %s)"
+
+# Hot lookups; benchmarks/bench_member_lookup.py checks their query plans
+MEMBER_BY_ENTRY_CODE = """
+    SELECT m.*, i.id_number, i.passport_number, i.kra_number
+    FROM members m
+    LEFT JOIN identity_info i ON m.id = i.member_id
+    WHERE m.entry_code = %s
+"""
+
+MEMBER_BY_USER_ID = """
+    SELECT m.*, i.id_number, i.passport_number, i.kra_number
+    FROM members m
+    LEFT JOIN identity_info i ON m.id = i.member_id
+    WHERE m.user_id = %s
+    ORDER BY m.id DESC
+    LIMIT 1
+"""
+
+IDENTITY_UPSERT = """
+    INSERT INTO identity_info
+    (member_id, id_number, passport_number, kra_number, last_updated)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        id_number = VALUES(id_number),
+        passport_number = VALUES(passport_number),
+        kra_number = VALUES(kra_number),
+        last_updated = VALUES(last_updated)
+"""
+
+# upload_metadata columns returned by get_upload_metadata
+UPLOAD_METADATA_COLUMNS = (
+    'sha256', 'mime_type', 'size_bytes', 'width', 'height', 'page_count',
+    'display_path', 'thumbnail_path', 'error', 'processed_at',
+)
+
 class Database:
-    def __init__(self):
+    def __init__(self, pool=None, auto_connect=True):
         self.host = os.getenv('DB_HOST', 'localhost')
         self.database = os.getenv('DB_NAME', 'discord_bot_db')
         self.user = os.getenv('DB_USER', 'root')
         self.password = os.getenv('DB_PASSWORD', '') or None  # Empty string becomes None for no password
         self.port = int(os.getenv('DB_PORT', '3306'))
         self.connection = None
+        # When a pool is given every query checks out its own connection,
+        # so the same instance can be used from several threads at once.
+        # Schema setup is then left to the pool owner.
+        self.pool = pool
+        self.entry_codes = entry_codes
+        self.status_counters = StatusCounters()
+        self.member_cache = MemberCache()
+        self.search_index = MemberSearchIndex()
+        self.profiler = QueryProfiler()
+        self.max_entry_code_attempts = 10
+        if pool is not None or not auto_connect:
+            return
         try:
             self.connect()
             self.initialize_database()
@@ -23,155 +84,197 @@ class Database:
             if self.connection:
                 self.connection.close()
 
-    def connect(self):
+    def connection_params(self, with_database=True):
+        """Keyword arguments for mysql.connector.connect"""
+        connection_params = {
+            'host': self.host,
+            'user': self.user,
+            'port': self.port
+        }
+        if self.password:
+            connection_params['password'] = self.password
+        if with_database:
+            connection_params['database'] = self.database
+        return connection_params
+
+    def create_database(self):
+        """Create the database itself if it doesn't exist"""
+        # For XAMPP, we need to connect without a database first to create it if needed
+        connection = mysql.connector.connect(**self.connection_params(with_database=False))
         try:
-            # For XAMPP, we need to connect without a database first to create it if needed
-            connection_params = {
-                'host': self.host,
-                'user': self.user,
-                'port': self.port
-            }
-            if self.password:
-                connection_params['password'] = self.password
-                
-            self.connection = mysql.connector.connect(**connection_params)
-            
-            # Create database if it doesn't exist
-            cursor = self.connection.cursor()
+            cursor = connection.cursor()
             cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.database} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
             cursor.close()
-            
-            # Reconnect with the database selected
-            connection_params['database'] = self.database
-            self.connection = mysql.connector.connect(**connection_params)
+        finally:
+            connection.close()
+
+    def connect(self):
+        try:
+            try:
+                self.connection = mysql.connector.connect(**self.connection_params())
+            except Error as e:
+                if e.errno != errorcode.ER_BAD_DB_ERROR:
+                    raise
+                # First run: create the database, then connect to it
+                self.create_database()
+                self.connection = mysql.connector.connect(**self.connection_params())
             print("Successfully connected to MySQL database")
             return True
         except Error as e:
             print(f"Error connecting to MySQL database: {e}")
             return False
 
+    @contextmanager
+    def connection_scope(self):
+        """Yield the connection a query should run on"""
+        if self.pool is not None:
+            with self.pool.connection() as connection:
+                yield connection
+            return
+        if not self.connection or not hasattr(self.connection, 'is_connected') or not self.connection.is_connected():
+            self.connect()
+        yield self.connection
+
     def execute_query(self, query, params=None, fetch=False, commit=False):
         """Execute a SQL query"""
-        cursor = None
-        try:
-            if not self.connection or not hasattr(self.connection, 'is_connected') or not self.connection.is_connected():
-                self.connect()
-                
-            cursor = self.connection.cursor()
-            cursor.execute(query, params or ())
-            
-            if commit:
-                self.connection.commit()
-                return cursor.lastrowid
+        with self.connection_scope() as connection:
+            cursor = None
+            try:
+                cursor = connection.cursor()
+                rows = self._run_statement(
+                    connection, cursor, query, params,
+                    fetch='all' if fetch and not commit else None, commit=commit
+                )
                 
-            if fetch:
-                return cursor.fetchall()
+                if commit:
+                    return cursor.lastrowid
+                    
+                if fetch:
+                    return rows
+                    
+                return True
                 
-            return True
-            
-        except Error as e:
-            print(f"Error executing query: {e}")
-            if self.connection:
-                self.connection.rollback()
+            except Error as e:
+                print(f"Error executing query: {e}")
+                if connection.is_connected():
+                    connection.rollback()
+                raise
+            finally:
+                if cursor:
+                    cursor.close()
+
+    def _run_statement(self, connection, cursor, query, params=None, fetch=None, commit=False, many=False):
+        """
+        Run one statement on cursor, timing it for db_query_seconds and the
+        query profiler. fetch is None, 'one' or 'all'; many runs executemany
+        over params.
+        """
+        statement = statement_name(query)
+        started = time.perf_counter()
+        rows = None
+        failed = False
+        try:
+            if many:
+                cursor.executemany(query, params)
+            else:
+                cursor.execute(query, params or ())
+            if fetch == 'all':
+                rows = cursor.fetchall()
+            elif fetch == 'one':
+                # Read to the end so the connection has no unread result
+                rows = next(iter(cursor.fetchall()), None)
+            if commit:
+                connection.commit()
+            return rows
+        except Error:
+            failed = True
+            QUERY_ERRORS.inc(statement=statement)
             raise
         finally:
-            if cursor:
-                cursor.close()
+            elapsed = time.perf_counter() - started
+            QUERY_SECONDS.observe(elapsed, statement=statement)
+            if self.profiler.enabled:
+                if fetch == 'all' and rows is not None:
+                    count = len(rows)
+                elif fetch == 'one':
+                    count = int(rows is not None)
+                else:
+                    count = max(cursor.rowcount, 0)
+                # EXPLAIN needs single-statement parameters and no unread result
+                explain_on = None if failed or many else connection
+                self.profiler.record(query, None if many else params, elapsed, count, explain_on, failed)
 
     def initialize_database(self):
-        """Initialize the database and create tables if they don't exist"""
+        """Bring the schema up to date; a no-op when it already is"""
         try:
-            # Create members table
-            # Create database if not exists
-            self.execute_query(f"CREATE DATABASE IF NOT EXISTS {self.database}")
-            self.connection.database = self.database
-            
-            # Create members table
-            members_table = """
-            CREATE TABLE IF NOT EXISTS members (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                entry_code VARCHAR(255) UNIQUE NOT NULL,
-                user_id VARCHAR(255) NOT NULL,
-                full_name VARCHAR(255) NOT NULL,
-                email VARCHAR(255) NOT NULL,
-                phone VARCHAR(50),
-                date_of_birth VARCHAR(50),
-                file_path TEXT,
-                registration_date VARCHAR(50) NOT NULL,
-                status VARCHAR(20) DEFAULT 'Active' CHECK (status IN ('Active', 'Inactive', 'Suspended')),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                INDEX idx_user_id (user_id),
-                INDEX idx_entry_code (entry_code)
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-            """
-            
-            # Create identity_info table for sensitive data
-            identity_table = """
-            CREATE TABLE IF NOT EXISTS identity_info (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                member_id INT,
-                id_number VARCHAR(50),
-                passport_number VARCHAR(50),
-                kra_number VARCHAR(50),
-                last_updated VARCHAR(50) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                FOREIGN KEY (member_id) REFERENCES members(id) ON DELETE CASCADE,
-                UNIQUE (member_id)
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-            """
-            
-            # Enable foreign key checks
-            self.execute_query("SET FOREIGN_KEY_CHECKS=0")
-            
-            # Create tables
-            self.execute_query(members_table)
-            self.execute_query(identity_table)
-            
-            # Enable foreign key checks
-            self.execute_query("SET FOREIGN_KEY_CHECKS=1")
-            
+            with self.connection_scope() as connection:
+                applied = migrations.migrate(connection)
+            if applied:
+                print(f"Database schema migrated to version {applied[-1]}")
         except Error as e:
             print(f"Error initializing database: {e}")
             raise
 
+    def _member_values(self, entry_code, user_id, data):
+        """Column values for a members row, in MEMBER_INSERT order"""
+        return (
+            entry_code,
+            int(user_id),
+            data.get('full_name', '').title(),
+            data.get('email', '').lower(),
+            data.get('phone', ''),
+            data.get('dob', None),
+            data.get('file_path', 'No file uploaded'),
+            data.get('registration_date') or datetime.now().replace(microsecond=0),
+            data.get('status', 'Active')
+        )
+
+    def _identity_values(self, member_id, data):
+        """Column values for an identity_info row, in IDENTITY_UPSERT order"""
+        return (
+            member_id,
+            data.get('id_number'),
+            data.get('passport'),
+            data.get('kra'),
+            data.get('last_updated') or datetime.now().replace(microsecond=0)
+        )
+
+    def _index_member(self, member_id, values):
+        """Add a saved member (values in MEMBER_INSERT order) to the search index"""
+        entry_code, _, full_name, email, phone = values[:5]
+        self.search_index.add(member_id, entry_code, full_name, email, phone)
+
+    def _has_identity(self, data):
+        return any(key in data for key in ['id_number', 'passport', 'kra'])
+
     def save_member(self, user_id, data):
         """Save member data to the database"""
         try:
-            # Check if user exists
-            existing_member = self.execute_query(
-                "SELECT id FROM members WHERE user_id = %s ORDER BY id DESC LIMIT 1",
-                (user_id,),
-                fetch=True
-            )
-            
-            # Always create a new entry
-            entry_code = self._generate_entry_code()
-            
-            # Insert member data
-            member_id = self.execute_query(
-                """
-                INSERT INTO members 
-                (entry_code, user_id, full_name, email, phone, date_of_birth, file_path, registration_date, status)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """,
-                (
-                    entry_code,
-                    str(user_id),
-                    data.get('full_name', '').title(),
-                    data.get('email', '').lower(),
-                    data.get('phone', ''),
-                    data.get('dob', None),
-                    data.get('file_path', 'No file uploaded'),
-                    datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    'Active'
-                ),
-                commit=True
-            )
+            # Always create a new entry. Codes come from the in-memory
+            # allocator and the UNIQUE key catches the rare collision.
+            for _ in range(self.max_entry_code_attempts):
+                entry_code = self.entry_codes.next_code()
+                values = self._member_values(entry_code, user_id, data)
+                try:
+                    member_id = self.execute_query(
+                        MEMBER_INSERT + MEMBER_ROW_PLACEHOLDERS, values, commit=True
+                    )
+                except Error as e:
+                    if not self._is_duplicate_entry_code(e):
+                        raise
+                    self.entry_codes.record_collision(entry_code)
+                    continue
+                self.entry_codes.record_success(entry_code)
+                self.status_counters.record_insert(data.get('status', 'Active'))
+                # The user's latest member row has changed
+                self.member_cache.invalidate(user_id=user_id)
+                self._index_member(member_id, values)
+                break
+            else:
+                raise Error(f"Could not allocate a free entry code after {self.max_entry_code_attempts} attempts")
             
             # Save identity information if available
-            if any(key in data for key in ['id_number', 'passport', 'kra']):
+            if self._has_identity(data):
                 self.save_identity_info(member_id, data)
             
             return entry_code
@@ -183,95 +286,230 @@ class Database:
     def save_identity_info(self, member_id, data):
         """Save identity information for a member"""
         try:
-            # Check if identity info already exists
-            existing = self.execute_query(
-                "SELECT id FROM identity_info WHERE member_id = %s",
-                (member_id,),
-                fetch=True
+            # Insert, or update the existing row for this member
+            self.execute_query(
+                IDENTITY_UPSERT,
+                self._identity_values(member_id, data),
+                commit=True
             )
-            
-            if existing:
-                # Update existing identity info
-                self.execute_query(
-                    """
-                    UPDATE identity_info 
-                    SET id_number = %s, 
-                        passport_number = %s, 
-                        kra_number = %s,
-                        last_updated = %s
-                    WHERE member_id = %s
-                    """,
-                    (
-                        data.get('id_number'),
-                        data.get('passport'),
-                        data.get('kra'),
-                        datetime.now(),
-                        member_id
-                    ),
-                    commit=True
-                )
-            else:
-                # Insert new identity info
-                self.execute_query(
-                    """
-                    INSERT INTO identity_info 
-                    (member_id, id_number, passport_number, kra_number, last_updated)
-                    VALUES (%s, %s, %s, %s, %s)
-                    """,
-                    (
-                        member_id,
-                        data.get('id_number'),
-                        data.get('passport'),
-                        data.get('kra'),
-                        datetime.now()
-                    ),
-                    commit=True
-                )
-                
+            self.member_cache.invalidate(member_id=member_id)
         except Error as e:
             print(f"Error saving identity info: {e}")
             raise
 
+    def save_members_bulk(self, records, chunk_size=500):
+        """
+        Save many onboarding records in a single transaction.
+        Each record is a dict with a 'user_id' plus the usual onboarding
+        fields; 'entry_code', 'registration_date' and 'status' may be given
+        to preserve historical values. Records that bring their own entry
+        code are idempotent: re-running them leaves the member unchanged
+        and only refreshes identity info, and a code repeated for the same
+        user within one call is saved once. A record whose entry code
+        already belongs to a different Discord user, in the table or earlier
+        in the call, is skipped. Returns the entry codes in order, with None
+        for the skipped records.
+        """
+        records = list(records)
+        if not records:
+            return []
+        
+        for attempt in range(self.max_entry_code_attempts):
+            codes = [
+                str(record['entry_code']).strip().upper() if record.get('entry_code')
+                else self.entry_codes.next_code()
+                for record in records
+            ]
+            try:
+                member_ids, conflicts = self._insert_members_bulk(records, codes, chunk_size)
+            except Error as e:
+                if not self._is_duplicate_entry_code(e):
+                    print(f"Error saving members in bulk: {e}")
+                    raise
+                # A generated code collided; the whole batch was rolled back
+                for record, code in zip(records, codes):
+                    if not record.get('entry_code'):
+                        self.entry_codes.record_collision(code)
+                continue
+            for record, code in zip(records, codes):
+                if not record.get('entry_code'):
+                    self.entry_codes.record_success(code)
+            # Some records may have been replays of existing members, so
+            # let the counters reload rather than guess the delta
+            self.status_counters.invalidate()
+            self.member_cache.clear()
+            for record, code in zip(records, codes):
+                if code in member_ids:
+                    self._index_member(member_ids[code], self._member_values(code, record['user_id'], record))
+            if conflicts:
+                print(f"Skipped {len(conflicts)} record(s) whose entry code belongs to another member: "
+                      f"{', '.join(codes[i] for i in sorted(conflicts))}")
+            return [None if i in conflicts else code for i, code in enumerate(codes)]
+        
+        raise Error(f"Could not allocate free entry codes after {self.max_entry_code_attempts} attempts")
+
+    def _insert_members_bulk(self, records, codes, chunk_size):
+        """Insert records in one transaction; returns ({code: member id}, indexes of conflicting records)"""
+        with self.connection_scope() as connection:
+            cursor = connection.cursor()
+            try:
+                # autocommit is off, so everything below is one transaction
+                # until the commit at the end.
+                
+                # Records with a known code may already be present (e.g. a
+                # re-run import). That is only a replay if the existing row
+                # belongs to the same user; otherwise the code is taken and
+                # the record is skipped. Locking the rows keeps the check valid
+                # until the commit.
+                given = [i for i, record in enumerate(records) if record.get('entry_code')]
+                owners = {}
+                for start in range(0, len(given), chunk_size):
+                    chunk = [codes[i] for i in given[start:start + chunk_size]]
+                    owners.update(
+                        (code.upper(), user_id) for code, user_id in self._run_statement(
+                            connection, cursor,
+                            "SELECT entry_code, user_id FROM members WHERE entry_code IN ("
+                            + ", ".join(["%s"] * len(chunk)) + ") FOR UPDATE",
+                            chunk, fetch='all'
+                        )
+                    )
+                conflicts = {
+                    i for i in given
+                    if codes[i] in owners and int(owners[codes[i]]) != int(records[i]['user_id'])
+                }
+                # The same code may also appear more than once in this call.
+                # The first record claims it; a later one for the same user
+                # is the same member and is folded into it, while one for a
+                # different user conflicts like a code already in the table.
+                claimed = {}
+                duplicates = set()
+                for i in given:
+                    if i in conflicts:
+                        continue
+                    first = claimed.setdefault(codes[i], i)
+                    if first == i:
+                        continue
+                    if int(records[first]['user_id']) == int(records[i]['user_id']):
+                        duplicates.add(i)
+                    else:
+                        conflicts.add(i)
+                given = [i for i in given if i not in conflicts and i not in duplicates]
+                
+                # Generated codes must be genuinely new so a collision
+                # surfaces as a duplicate-key error.
+                generated = [i for i, record in enumerate(records) if not record.get('entry_code')]
+                for indexes, suffix in ((given, " ON DUPLICATE KEY UPDATE id = id"), (generated, "")):
+                    for start in range(0, len(indexes), chunk_size):
+                        chunk = indexes[start:start + chunk_size]
+                        params = []
+                        for i in chunk:
+                            params.extend(self._member_values(codes[i], records[i]['user_id'], records[i]))
+                        self._run_statement(
+                            connection, cursor,
+                            MEMBER_INSERT + ", ".join([MEMBER_ROW_PLACEHOLDERS] * len(chunk)) + suffix,
+                            params
+                        )
+                
+                # Map entry codes back to member ids for the identity rows
+                saved_codes = list(dict.fromkeys(code for i, code in enumerate(codes) if i not in conflicts))
+                member_ids = {}
+                for start in range(0, len(saved_codes), chunk_size):
+                    chunk = saved_codes[start:start + chunk_size]
+                    member_ids.update(
+                        (code.upper(), member_id) for code, member_id in self._run_statement(
+                            connection, cursor,
+                            "SELECT entry_code, id FROM members WHERE entry_code IN ("
+                            + ", ".join(["%s"] * len(chunk)) + ")",
+                            chunk, fetch='all'
+                        )
+                    )
+                
+                identity_rows = [
+                    self._identity_values(member_ids[code], record)
+                    for i, (record, code) in enumerate(zip(records, codes))
+                    if i not in conflicts and i not in duplicates and self._has_identity(record)
+                ]
+                for start in range(0, len(identity_rows), chunk_size):
+                    self._run_statement(
+                        connection, cursor, IDENTITY_UPSERT, identity_rows[start:start + chunk_size], many=True
+                    )
+                
+                connection.commit()
+                return member_ids, conflicts
+            except Error:
+                if connection.is_connected():
+                    connection.rollback()
+                raise
+            finally:
+                cursor.close()
+
     def get_member(self, entry_code=None, user_id=None):
-        """Get member data by entry code or user ID"""
+        """Get member data by entry code or user ID (read through the member cache)"""
+        if entry_code:
+            key = ('entry_code', entry_code)
+        elif user_id:
+            key = ('user_id', str(user_id))
+        else:
+            return None
+        
+        rows = self.member_cache.get(key)
+        if rows is not None:
+            return rows
+        token = self.member_cache.begin()
+        rows = self._fetch_member(entry_code=entry_code, user_id=user_id)
+        self.member_cache.put(key, rows, token)
+        return rows
+
+    def _fetch_member(self, entry_code=None, user_id=None):
+        """Query a member straight from the database"""
         try:
             if entry_code:
-                return self.execute_query(
-                    """
-                    SELECT m.*, i.id_number, i.passport_number, i.kra_number
-                    FROM members m
-                    LEFT JOIN identity_info i ON m.id = i.member_id
-                    WHERE m.entry_code = %s
-                    """,
-                    (entry_code,),
-                    fetch=True
-                )
+                return self.execute_query(MEMBER_BY_ENTRY_CODE, (entry_code,), fetch=True)
             elif user_id:
-                return self.execute_query(
-                    """
-                    SELECT m.*, i.id_number, i.passport_number, i.kra_number
-                    FROM members m
-                    LEFT JOIN identity_info i ON m.id = i.member_id
-                    WHERE m.user_id = %s
-                    ORDER BY m.id DESC
-                    LIMIT 1
-                    """,
-                    (str(user_id),),
-                    fetch=True
-                )
+                return self.execute_query(MEMBER_BY_USER_ID, (int(user_id),), fetch=True)
             return None
         except Error as e:
             print(f"Error getting member: {e}")
             raise
 
     def update_member_status(self, entry_code, status):
-        """Update member status"""
+        """Update member status, returning False if the entry code doesn't exist"""
         try:
-            self.execute_query(
-                "UPDATE members SET status = %s WHERE entry_code = %s",
-                (status, entry_code),
-                commit=True
-            )
+            with self.connection_scope() as connection:
+                cursor = connection.cursor()
+                try:
+                    # Lock the row so the counters see the real previous status
+                    row = self._run_statement(
+                        connection, cursor,
+                        "SELECT id, status FROM members WHERE entry_code = %s FOR UPDATE",
+                        (entry_code,), fetch='one'
+                    )
+                    if row is None:
+                        connection.rollback()
+                        return False
+                    self._run_statement(
+                        connection, cursor,
+                        "UPDATE members SET status = %s WHERE id = %s",
+                        (status, row[0])
+                    )
+                    if row[1] != status:
+                        self._run_statement(
+                            connection, cursor,
+                            """
+                            INSERT INTO member_status_history (member_id, old_status, new_status)
+                            VALUES (%s, %s, %s)
+                            """,
+                            (row[0], row[1], status)
+                        )
+                    connection.commit()
+                except Error:
+                    if connection.is_connected():
+                        connection.rollback()
+                    raise
+                finally:
+                    cursor.close()
+            self.status_counters.record_change(row[1], status)
+            self.member_cache.invalidate(member_id=row[0])
             return True
         except Error as e:
             print(f"Error updating member status: {e}")
@@ -284,7 +522,7 @@ class Database:
                 """
                 SELECT m.entry_code, m.full_name, m.email, m.phone, m.registration_date, m.status
                 FROM members m
-                ORDER BY m.registration_date DESC
+                ORDER BY m.id DESC
                 """,
                 fetch=True
             )
@@ -292,25 +530,292 @@ class Database:
             print(f"Error getting all members: {e}")
             return []
 
-    def _generate_entry_code(self, length=8):
-        """Generate a unique entry code"""
-        import string
-        import random
+    def get_members_page(self, before_id=None, after_id=None, limit=10, status=None):
+        """
+        Get one page of members, newest first, using keyset pagination on id.
+        Pass before_id (the last id of the current page) for the next, older
+        page, or after_id (the first id of the current page) for the previous,
+        newer one. Returns (rows, has_more) where rows are
+        (id, entry_code, full_name, email, registration_date, status) and
+        has_more tells whether another page exists in that direction.
+        """
+        conditions = []
+        params = []
+        if status:
+            conditions.append("status = %s")
+            params.append(status)
+        if after_id is not None:
+            conditions.append("id > %s")
+            params.append(after_id)
+            order = "ASC"
+        else:
+            if before_id is not None:
+                conditions.append("id < %s")
+                params.append(before_id)
+            order = "DESC"
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(limit + 1)
         
+        try:
+            rows = self.execute_query(
+                f"""
+                SELECT id, entry_code, full_name, email, registration_date, status
+                FROM members
+                {where}
+                ORDER BY id {order}
+                LIMIT %s
+                """,
+                tuple(params),
+                fetch=True
+            )
+        except Error as e:
+            print(f"Error getting members page: {e}")
+            return [], False
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if order == "ASC":
+            rows.reverse()
+        return rows, has_more
+
+    def iter_members(self, batch_size=1000):
+        """Yield every member, newest first, one keyset page at a time"""
+        before_id = None
         while True:
-            # Generate random code
-            chars = string.ascii_uppercase + string.digits
-            code = ''.join(random.choice(chars) for _ in range(length))
-            
-            # Check if code already exists
-            existing = self.execute_query(
-                "SELECT id FROM members WHERE entry_code = %s",
-                (code,),
+            rows, has_more = self.get_members_page(before_id=before_id, limit=batch_size)
+            yield from rows
+            if not has_more:
+                return
+            before_id = rows[-1][0]
+
+    def get_members_registered_between(self, start=None, end=None, status=None, limit=None):
+        """
+        Members registered in [start, end), oldest first. start and end are
+        datetimes and either may be None for an open range; the filter is a
+        range scan on idx_registration_date. Rows are
+        (id, entry_code, full_name, email, registration_date, status).
+        """
+        conditions = []
+        params = []
+        if start is not None:
+            conditions.append("registration_date >= %s")
+            params.append(start)
+        if end is not None:
+            conditions.append("registration_date < %s")
+            params.append(end)
+        if status:
+            conditions.append("status = %s")
+            params.append(status)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        limit_clause = ""
+        if limit is not None:
+            limit_clause = "LIMIT %s"
+            params.append(limit)
+        try:
+            return self.execute_query(
+                f"""
+                SELECT id, entry_code, full_name, email, registration_date, status
+                FROM members
+                {where}
+                ORDER BY registration_date, id
+                {limit_clause}
+                """,
+                tuple(params),
                 fetch=True
             )
-            
-            if not existing:
-                return code
+        except Error as e:
+            print(f"Error getting members by registration date: {e}")
+            return []
+
+    def get_identity_updated_since(self, since, limit=None):
+        """
+        Members whose identity info changed at or after since, oldest change
+        first, as (member_id, entry_code, full_name, last_updated). Uses
+        idx_last_updated; the identity numbers themselves are not returned.
+        """
+        params = [since]
+        limit_clause = ""
+        if limit is not None:
+            limit_clause = "LIMIT %s"
+            params.append(limit)
+        try:
+            return self.execute_query(
+                f"""
+                SELECT m.id, m.entry_code, m.full_name, i.last_updated
+                FROM identity_info i
+                JOIN members m ON m.id = i.member_id
+                WHERE i.last_updated >= %s
+                ORDER BY i.last_updated, i.member_id
+                {limit_clause}
+                """,
+                tuple(params),
+                fetch=True
+            )
+        except Error as e:
+            print(f"Error getting updated identity info: {e}")
+            return []
+
+    def load_search_index(self, batch_size=5000):
+        """Fill the search index from the members table, one keyset page at a time"""
+        self.search_index.begin_load()
+        last_id = 0
+        while True:
+            rows = self.execute_query(
+                """
+                SELECT id, entry_code, full_name, email, phone
+                FROM members
+                WHERE id > %s
+                ORDER BY id
+                LIMIT %s
+                """,
+                (last_id, batch_size),
+                fetch=True
+            )
+            self.search_index.add_many(rows)
+            if len(rows) < batch_size:
+                break
+            last_id = rows[-1][0]
+        self.search_index.finish_load()
+        return self.search_index.stats()
+
+    def search_members(self, text, limit=10):
+        """Members matching text in name, email or phone, best first"""
+        return self.search_index.search(text, limit)
+
+    def count_members_by_status(self):
+        """Number of members per status value, computed in SQL"""
+        try:
+            rows = self.execute_query(
+                "SELECT status, COUNT(*) FROM members GROUP BY status",
+                fetch=True
+            )
+        except Error as e:
+            print(f"Error counting members: {e}")
+            return {}
+        return {status: count for status, count in rows}
+
+    def get_status_counts(self):
+        """Member totals per status, served from the maintained counters"""
+        counts = self.status_counters.snapshot()
+        if counts is None:
+            self.reconcile_status_counts()
+            counts = self.status_counters.snapshot() or {}
+        return counts
+
+    def reconcile_status_counts(self):
+        """Reload the status counters from the members table"""
+        try:
+            rows = self.execute_query(
+                "SELECT status, COUNT(*) FROM members GROUP BY status",
+                fetch=True
+            )
+        except Error as e:
+            print(f"Error reconciling status counts: {e}")
+            return
+        self.status_counters.load({status: count for status, count in rows})
+
+    def get_blob_references(self):
+        """Hashes of every upload blob referenced from members.file_path"""
+        rows = self.execute_query(
+            "SELECT DISTINCT file_path FROM members WHERE file_path LIKE 'sha256:%'",
+            fetch=True
+        )
+        return {file_path[len('sha256:'):] for (file_path,) in rows}
+
+    def get_user_upload_bytes(self, user_id):
+        """Size of the distinct upload blobs a Discord user's members point at"""
+        rows = self.execute_query(
+            """
+            SELECT COALESCE(SUM(size_bytes), 0) FROM upload_metadata
+            WHERE CONCAT('sha256:', sha256) IN (SELECT file_path FROM members WHERE user_id = %s)
+            """,
+            (user_id,),
+            fetch=True
+        )
+        return int(rows[0][0])
+
+    def save_upload_metadata(self, metadata):
+        """Record post-processing results for an upload blob"""
+        try:
+            self.execute_query(
+                """
+                INSERT INTO upload_metadata
+                (sha256, mime_type, size_bytes, width, height, page_count, display_path, thumbnail_path, error)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    mime_type = VALUES(mime_type),
+                    size_bytes = VALUES(size_bytes),
+                    width = VALUES(width),
+                    height = VALUES(height),
+                    page_count = VALUES(page_count),
+                    display_path = VALUES(display_path),
+                    thumbnail_path = VALUES(thumbnail_path),
+                    error = VALUES(error)
+                """,
+                (
+                    metadata['sha256'],
+                    metadata['mime_type'],
+                    metadata['size_bytes'],
+                    metadata.get('width'),
+                    metadata.get('height'),
+                    metadata.get('page_count'),
+                    metadata.get('display_path'),
+                    metadata.get('thumbnail_path'),
+                    metadata.get('error')
+                ),
+                commit=True
+            )
+        except Error as e:
+            print(f"Error saving upload metadata: {e}")
+            raise
+
+    def delete_upload_metadata(self, hashes, chunk_size=500):
+        """Forget post-processing results for blobs that have been deleted"""
+        hashes = list(hashes)
+        for start in range(0, len(hashes), chunk_size):
+            chunk = hashes[start:start + chunk_size]
+            self.execute_query(
+                "DELETE FROM upload_metadata WHERE sha256 IN (" + ", ".join(["%s"] * len(chunk)) + ")",
+                chunk,
+                commit=True
+            )
+
+    def get_upload_metadata(self, entry_code):
+        """Post-processing results for a member's uploaded file as a dict, or None"""
+        rows = self.execute_query(
+            f"""
+            SELECT {', '.join('u.' + column for column in UPLOAD_METADATA_COLUMNS)}
+            FROM members m
+            JOIN upload_metadata u ON m.file_path = CONCAT('sha256:', u.sha256)
+            WHERE m.entry_code = %s
+            """,
+            (entry_code,),
+            fetch=True
+        )
+        return dict(zip(UPLOAD_METADATA_COLUMNS, rows[0])) if rows else None
+
+    def _is_duplicate_entry_code(self, error):
+        """True if an insert failed because the entry code is already taken"""
+        return (
+            getattr(error, 'errno', None) == errorcode.ER_DUP_ENTRY
+            and 'entry_code' in str(error)
+        )
+
+# Shared synchronous instance, created (and connected) on first use rather
+# than at import time so that importing this module never touches MySQL
+_db = None
+
+
+def get_db():
+    """The shared Database, connecting on first call"""
+    global _db
+    if _db is None:
+        _db = Database()
+    return _db
+
 
-# Create a global database instance
-db = Database()
+def __getattr__(name):
+    # Keep `from database import db` working for older scripts
+    if name == 'db':
+        return get_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
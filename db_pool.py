@@ -0,0 +1,191 @@
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import Error
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available in time"""
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of MySQL connections"""
+
+    def __init__(self, min_size=None, max_size=None, acquire_timeout=None,
+                 health_check_interval=None, **connection_params):
+        self.min_size = int(min_size if min_size is not None else os.getenv('DB_POOL_MIN', '1'))
+        self.max_size = int(max_size if max_size is not None else os.getenv('DB_POOL_MAX', '5'))
+        self.acquire_timeout = float(
+            acquire_timeout if acquire_timeout is not None else os.getenv('DB_POOL_TIMEOUT', '10')
+        )
+        # Idle connections older than this are pinged before being handed out
+        self.health_check_interval = float(
+            health_check_interval if health_check_interval is not None
+            else os.getenv('DB_POOL_HEALTHCHECK', '30')
+        )
+        if self.max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.min_size = max(0, min(self.min_size, self.max_size))
+
+        self.connection_params = connection_params
+        self._idle = deque()  # (connection, last_used) pairs
+        self._size = 0  # connections currently open, idle or checked out
+        self._closed = False
+        self._lock = threading.Condition()
+
+        # Counters for tuning the pool size
+        self.acquired = 0
+        self.timeouts = 0
+        self.discarded = 0
+
+    def _create(self):
+        """Open a new connection to the database"""
+        return mysql.connector.connect(**self.connection_params)
+
+    def _is_healthy(self, connection, last_used):
+        """
+        Check an idle connection before handing it out. Recently used ones
+        are trusted without a round trip (is_connected() would ping too);
+        a connection that dies anyway is discarded when it is released.
+        """
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    def _close_quietly(self, connection):
+        try:
+            connection.close()
+        except Error:
+            pass
+
+    def fill(self):
+        """Open connections until the pool holds at least min_size"""
+        while True:
+            with self._lock:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                connection = self._create()
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                    self._lock.notify()
+                raise
+            with self._lock:
+                self._idle.append((connection, time.monotonic()))
+                self._lock.notify()
+
+    def acquire(self, timeout=None):
+        """Check a connection out of the pool, waiting up to timeout seconds"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            with self._lock:
+                while True:
+                    if self._closed:
+                        raise Error("Connection pool is closed")
+                    if self._idle:
+                        connection, last_used = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        # Reserve a slot and open the connection outside the lock
+                        self._size += 1
+                        connection, last_used = None, None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {timeout}s waiting for a database connection"
+                        )
+                    self._lock.wait(remaining)
+
+            if connection is None:
+                try:
+                    connection = self._create()
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                        self._lock.notify()
+                    raise
+            elif not self._is_healthy(connection, last_used):
+                self._discard(connection)
+                continue
+
+            with self._lock:
+                self.acquired += 1
+            return connection
+
+    def release(self, connection, discard=False):
+        """Return a connection to the pool, or drop it if it is broken"""
+        if discard or self._closed:
+            self._discard(connection)
+            return
+        try:
+            # Never hand a half-finished transaction to the next caller
+            if connection.in_transaction:
+                connection.rollback()
+        except Error:
+            self._discard(connection)
+            return
+        with self._lock:
+            self._idle.append((connection, time.monotonic()))
+            self._lock.notify()
+
+    def _discard(self, connection):
+        self._close_quietly(connection)
+        with self._lock:
+            self._size -= 1
+            self.discarded += 1
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager that checks out a connection and always returns it"""
+        connection = self.acquire(timeout)
+        broken = False
+        try:
+            yield connection
+        except Error:
+            broken = not connection.is_connected()
+            raise
+        finally:
+            self.release(connection, discard=broken)
+
+    def close(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._lock.notify_all()
+        for connection, _ in idle:
+            self._close_quietly(connection)
+
+    def stats(self):
+        """Snapshot of pool usage"""
+        with self._lock:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+                'acquired': self.acquired,
+                'timeouts': self.timeouts,
+                'discarded': self.discarded,
+            }
@@ -0,0 +1,94 @@
+import os
+import asyncio
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+class UserDispatcher:
+    """Runs each user's messages in order while different users run in parallel.
+
+    Every user gets a bounded mailbox and a worker task (an "actor") that
+    handles that user's messages one at a time. Actors exit after
+    idle_timeout seconds without mail, so only active users cost anything.
+    """
+
+    def __init__(self, handler, max_queue=None, idle_timeout=None):
+        self.handler = handler  # coroutine function(message)
+        self.max_queue = int(max_queue or os.getenv('DISPATCH_QUEUE_SIZE', '20'))
+        self.idle_timeout = float(
+            idle_timeout if idle_timeout is not None else os.getenv('DISPATCH_IDLE_TIMEOUT', '60')
+        )
+        self._mailboxes = {}  # user_id -> asyncio.Queue
+        self._actors = {}  # user_id -> asyncio.Task
+        self._closed = False
+
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_depth_seen = 0
+
+    def dispatch(self, user_id, message):
+        """Queue a message for its user's actor; False if the mailbox is full"""
+        mailbox = self._mailboxes.get(user_id)
+        if mailbox is None:
+            mailbox = asyncio.Queue(maxsize=self.max_queue)
+            self._mailboxes[user_id] = mailbox
+            self._actors[user_id] = asyncio.create_task(self._run(user_id, mailbox))
+        try:
+            mailbox.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.max_depth_seen = max(self.max_depth_seen, mailbox.qsize())
+        return True
+
+    async def _run(self, user_id, mailbox):
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(mailbox.get(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    # Nothing arrived while we waited, so retire this actor.
+                    # There is no await between the check and the removal,
+                    # so no message can slip in unnoticed.
+                    if mailbox.empty():
+                        return
+                    continue
+                if self._closed:
+                    # On Python 3.11, wait_for drops a cancel that arrives
+                    # just as the message is taken; don't handle it anyway
+                    return
+                try:
+                    await self.handler(message)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Error handling message from {user_id}: {e}")
+                finally:
+                    self.processed += 1
+        finally:
+            if self._mailboxes.get(user_id) is mailbox:
+                del self._mailboxes[user_id]
+                del self._actors[user_id]
+
+    async def close(self):
+        """Cancel every actor (pending messages are discarded)"""
+        self._closed = True
+        actors = list(self._actors.values())
+        for actor in actors:
+            actor.cancel()
+        await asyncio.gather(*actors, return_exceptions=True)
+
+    def stats(self):
+        """Actor count and mailbox depth metrics"""
+        depths = [mailbox.qsize() for mailbox in self._mailboxes.values()]
+        return {
+            'actors': len(self._actors),
+            'queued': sum(depths),
+            'max_queue_depth': max(depths, default=0),
+            'max_queue_depth_seen': self.max_depth_seen,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'errors': self.errors,
+        }
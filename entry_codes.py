@@ -0,0 +1,84 @@
+import os
+import secrets
+import string
+import threading
+from collections import deque
+from dotenv import load_dotenv
+from metrics import ENTRY_CODE_ATTEMPTS, ENTRY_CODE_COLLISION_RATE
+
+# Load environment variables
+load_dotenv()
+
+ENTRY_CODE_ALPHABET = string.ascii_uppercase + string.digits  # A-Z and 0-9
+
+
+class EntryCodeAllocator:
+    """Hands out random entry codes from a pre-generated in-memory block.
+
+    Codes are never checked against the database up front; the UNIQUE key on
+    members.entry_code is the source of truth and callers report back with
+    record_collision / record_success so the collision rate can be watched
+    as the keyspace fills up.
+    """
+
+    def __init__(self, length=8, block_size=None, window=1000):
+        self.length = length
+        self.block_size = int(block_size or os.getenv('ENTRY_CODE_BLOCK_SIZE', '256'))
+        self.keyspace = len(ENTRY_CODE_ALPHABET) ** length
+        self._block = []
+        self._lock = threading.Lock()
+        # Outcome of the most recent attempts (True = collision)
+        self._recent = deque(maxlen=window)
+
+        self.issued = 0
+        self.collisions = 0
+        self.blocks_reserved = 0
+
+    def _reserve_block(self):
+        """Generate a fresh block of distinct codes"""
+        block = set()
+        while len(block) < self.block_size:
+            block.add(''.join(secrets.choice(ENTRY_CODE_ALPHABET) for _ in range(self.length)))
+        self._block = list(block)
+        self.blocks_reserved += 1
+
+    def next_code(self):
+        """Take the next unused code from the current block"""
+        with self._lock:
+            if not self._block:
+                self._reserve_block()
+            self.issued += 1
+            return self._block.pop()
+
+    def record_success(self, code):
+        """The code was inserted without hitting the unique key"""
+        with self._lock:
+            self._recent.append(False)
+        ENTRY_CODE_ATTEMPTS.inc(outcome='ok')
+
+    def record_collision(self, code):
+        """The code was already taken in the database"""
+        with self._lock:
+            self.collisions += 1
+            self._recent.append(True)
+        ENTRY_CODE_ATTEMPTS.inc(outcome='collision')
+
+    def stats(self):
+        """Collision metrics; recent_collision_rate approximates how full the keyspace is"""
+        with self._lock:
+            attempts = len(self._recent)
+            recent = sum(self._recent) / attempts if attempts else 0.0
+            return {
+                'issued': self.issued,
+                'collisions': self.collisions,
+                'collision_rate': self.collisions / self.issued if self.issued else 0.0,
+                'recent_collision_rate': recent,
+                'estimated_codes_in_use': int(recent * self.keyspace),
+                'keyspace': self.keyspace,
+                'blocks_reserved': self.blocks_reserved,
+            }
+
+
+# Shared allocator used by the database layer and the Excel fallback
+entry_codes = EntryCodeAllocator()
+ENTRY_CODE_COLLISION_RATE.set_function(lambda: entry_codes.stats()['recent_collision_rate'])
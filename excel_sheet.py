@@ -0,0 +1,135 @@
+import os
+from openpyxl import load_workbook, Workbook
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+# Column widths stay between these bounds (in Excel character units)
+MIN_WIDTH = 10
+MAX_WIDTH = 30
+
+
+class IncrementalSheet:
+    """A workbook kept open in memory and changed one row or cell at a time.
+
+    The file is parsed once; after that rows are appended and single cells
+    patched through an in-memory key -> row index, and column widths are
+    grown as values arrive instead of rescanning every cell. The workbook
+    is reloaded only if something else rewrote the file since our last save.
+    """
+
+    def __init__(self, filename, title, headers, key_column, normalize_key=str):
+        self.filename = filename
+        self.title = title
+        self.headers = list(headers)
+        self.key_column = self.headers.index(key_column) + 1
+        self.normalize_key = normalize_key
+        self.book = None
+        self.ws = None
+        self.index = {}  # normalized key -> row number
+        self.widths = {}  # column number -> longest value seen
+        self.dirty = False
+        self._mtime = None
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.filename).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def ensure_loaded(self):
+        """Parse the file on first use, or again if it changed underneath us"""
+        if self.book is not None and self._file_mtime() == self._mtime:
+            return
+        self.load()
+
+    def load(self):
+        """Read the workbook and rebuild the row index and column widths"""
+        self.index = {}
+        self.widths = {}
+        self.dirty = False
+
+        if os.path.exists(self.filename) and os.path.getsize(self.filename) > 0:
+            self.book = load_workbook(self.filename)
+            self.ws = self.book.active
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(self.filename)) or '.', exist_ok=True)
+            self.book = Workbook()
+            self.ws = self.book.active
+            self.ws.title = self.title
+            self.dirty = True
+
+        if self.ws.max_row <= 1 and self.ws.cell(row=1, column=1).value is None:
+            self._write_headers()
+
+        for row_num, row in enumerate(self.ws.iter_rows(values_only=True), 1):
+            for col_num, value in enumerate(row, 1):
+                self._track_width(col_num, value)
+            if row_num > 1 and len(row) >= self.key_column and row[self.key_column - 1] is not None:
+                self.index[self.normalize_key(row[self.key_column - 1])] = row_num
+
+        self._mtime = self._file_mtime()
+
+    def _write_headers(self):
+        for col_num, header in enumerate(self.headers, 1):
+            cell = self.ws.cell(row=1, column=col_num, value=header)
+            cell.font = Font(color='FFFFFF', bold=True)
+            cell.fill = PatternFill(start_color='4F81BD', end_color='4F81BD', fill_type='solid')
+        self.ws.freeze_panes = 'A2'
+        self.dirty = True
+
+    def _track_width(self, col_num, value):
+        length = len(str(value if value is not None else ''))
+        if length > self.widths.get(col_num, 0):
+            self.widths[col_num] = length
+            adjusted_width = (length + 2) * 1.1
+            letter = get_column_letter(col_num)
+            self.ws.column_dimensions[letter].width = min(max(adjusted_width, MIN_WIDTH), MAX_WIDTH)
+
+    def row_for(self, key):
+        """Row number holding this key, or None"""
+        self.ensure_loaded()
+        return self.index.get(self.normalize_key(key))
+
+    def append(self, values):
+        """Add a row at the bottom and index it"""
+        self.ensure_loaded()
+        self.ws.append(values)
+        row_num = self.ws.max_row
+        for col_num, value in enumerate(values, 1):
+            self._track_width(col_num, value)
+        key = values[self.key_column - 1]
+        if key is not None:
+            self.index[self.normalize_key(key)] = row_num
+        self.dirty = True
+        return row_num
+
+    def set_cell(self, row_num, column, value):
+        """Patch a single cell in place"""
+        col_num = self.headers.index(column) + 1
+        self.ws.cell(row=row_num, column=col_num, value=value)
+        self._track_width(col_num, value)
+        self.dirty = True
+
+    def get_cell(self, row_num, column):
+        return self.ws.cell(row=row_num, column=self.headers.index(column) + 1).value
+
+    def upsert(self, values):
+        """Overwrite the row with the same key, or append a new one"""
+        row_num = self.row_for(values[self.key_column - 1])
+        if row_num is None:
+            return self.append(values)
+        for col_num, value in enumerate(values, 1):
+            if col_num != self.key_column:
+                self.ws.cell(row=row_num, column=col_num, value=value)
+                self._track_width(col_num, value)
+        self.dirty = True
+        return row_num
+
+    def save(self):
+        """Write the workbook if anything changed since the last save"""
+        if not self.dirty or self.book is None:
+            return False
+        self.book.save(self.filename)
+        self._mtime = self._file_mtime()
+        self.dirty = False
+        return True
@@ -0,0 +1,261 @@
+import os
+import time
+import queue
+import atexit
+import asyncio
+import threading
+from datetime import datetime
+from dotenv import load_dotenv
+from metrics import EXCEL_FLUSH_SECONDS, EXCEL_JOBS
+
+# Load environment variables
+load_dotenv()
+
+# Column layout of the main onboarding sheet
+MEMBER_COLUMNS = [
+    'Entry Code',
+    'User ID',
+    'Full Name',
+    'Email',
+    'Phone',
+    'Date of Birth',
+    'Registration Date',
+    'Status'
+]
+
+# Column layout of the identity sheet (sensitive data lives in its own file)
+IDENTITY_COLUMNS = ['Full Name', 'ID Number', 'Passport', 'KRA Number', 'Last Updated']
+
+_STOP = object()
+
+
+class ExcelJob:
+    """A single pending change for the workbooks"""
+
+    def __init__(self, kind, payload, loop=None, future=None):
+        self.kind = kind  # 'member' or 'status'
+        self.payload = payload
+        self.loop = loop
+        self.future = future
+
+    def resolve(self, result=None, error=None):
+        """Report the outcome back to the coroutine waiting on this job"""
+        if self.future is None:
+            return
+        if error is not None:
+            self.loop.call_soon_threadsafe(_set_exception, self.future, error)
+        else:
+            self.loop.call_soon_threadsafe(_set_result, self.future, result)
+
+
+def _set_result(future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future, error):
+    if not future.done():
+        future.set_exception(error)
+
+
+def identity_filename_for(filename):
+    """Name of the identity workbook that sits next to the main one"""
+    return f"{os.path.splitext(filename)[0]}_identity.xlsx"
+
+
+def member_row(entry_code, user_id, data):
+    """Build the main sheet row for a completed onboarding"""
+    return [
+        entry_code,
+        str(user_id),
+        data.get('full_name', '').title(),
+        data.get('email', '').lower(),
+        data.get('phone', ''),
+        data.get('dob', ''),
+        datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'Active'
+    ]
+
+
+def identity_row(data):
+    """Build the identity sheet row for a completed onboarding"""
+    return [
+        data.get('full_name', '').title(),
+        data.get('id_number', 'N/A'),
+        data.get('passport', 'N/A'),
+        data.get('kra', 'Not provided'),
+        datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    ]
+
+
+class ExcelWriterWorker:
+    """Background thread that owns every write to the onboarding workbooks.
+
+    Coroutines queue jobs and await the returned future; the worker drains
+    the queue into batches and saves each workbook once per batch, either
+    when batch_size jobs are waiting or flush_interval seconds have passed
+    since the first one arrived. The workbooks stay open on the worker
+    thread between batches (see IncrementalSheet), so a flush never
+    re-parses the file.
+    """
+
+    def __init__(self, filename="onboarding_data.xlsx", batch_size=None, flush_interval=None):
+        self.filename = filename
+        self.identity_filename = identity_filename_for(filename)
+        self.batch_size = int(batch_size or os.getenv('EXCEL_BATCH_SIZE', '50'))
+        self.flush_interval = float(
+            flush_interval if flush_interval is not None else os.getenv('EXCEL_FLUSH_INTERVAL', '2')
+        )
+        self._queue = queue.Queue()
+        self._thread = None
+        self._members = None
+        self._identities = None
+        self._lock = threading.Lock()
+
+        # Counters for monitoring the worker
+        self.flushes = 0
+        self.jobs_written = 0
+        self.last_flush_seconds = 0.0
+
+    def start(self):
+        """Start the writer thread if it isn't running yet"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='excel-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self, timeout=30):
+        """Flush everything still queued and stop the writer thread"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def submit(self, kind, payload):
+        """Queue a job and return a future resolved once it is on disk"""
+        self.start()
+        loop = asyncio.get_running_loop()
+        job = ExcelJob(kind, payload, loop, loop.create_future())
+        self._queue.put(job)
+        return job.future
+
+    def add_member(self, entry_code, user_id, data):
+        """Queue a completed onboarding for both workbooks"""
+        return self.submit('member', {
+            'member': member_row(entry_code, user_id, data),
+            'identity': identity_row(data),
+        })
+
+    def update_status(self, entry_code, status):
+        """Queue a status change; resolves to the member's name or None if not found"""
+        return self.submit('status', {'entry_code': str(entry_code), 'status': status})
+
+    def pending(self):
+        """Number of jobs waiting for the next flush"""
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            batch = [job]
+            stopping = False
+            deadline = time.monotonic() + self.flush_interval
+
+            # Coalesce whatever else arrives before the size or time trigger
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if job is _STOP:
+                    stopping = True
+                    break
+                batch.append(job)
+
+            self._flush(batch)
+            if stopping:
+                return
+
+    def _flush(self, batch):
+        started = time.perf_counter()
+        try:
+            results = self.write_batch(batch)
+        except Exception as e:
+            print(f"Error writing Excel batch: {e}")
+            EXCEL_JOBS.inc(len(batch), outcome='failed')
+            for job in batch:
+                job.resolve(error=e)
+            return
+        for job, result in zip(batch, results):
+            job.resolve(result)
+        self.flushes += 1
+        self.jobs_written += len(batch)
+        self.last_flush_seconds = time.perf_counter() - started
+        EXCEL_FLUSH_SECONDS.observe(self.last_flush_seconds)
+        EXCEL_JOBS.inc(len(batch), outcome='written')
+
+    def _sheets(self):
+        """Open the resident workbooks on first use (runs on the writer thread)"""
+        if self._members is None:
+            from excel_sheet import IncrementalSheet
+
+            # Entry codes match case-insensitively, as they do in MySQL
+            self._members = IncrementalSheet(
+                self.filename, 'Onboarding Data', MEMBER_COLUMNS, key_column='Entry Code',
+                normalize_key=lambda code: str(code).strip().upper()
+            )
+            self._identities = IncrementalSheet(
+                self.identity_filename, 'Identity Data', IDENTITY_COLUMNS,
+                key_column='Full Name', normalize_key=lambda name: str(name).lower()
+            )
+        return self._members, self._identities
+
+    def write_batch(self, batch):
+        """Apply a batch of jobs, then save each workbook that changed once"""
+        members, identities = self._sheets()
+        results = []
+
+        for job in batch:
+            if job.kind == 'member':
+                members.append(job.payload['member'])
+                identities.upsert(job.payload['identity'])
+                results.append(True)
+            elif job.kind == 'status':
+                row_num = members.row_for(job.payload['entry_code'])
+                if row_num is None:
+                    results.append(None)
+                    continue
+                members.set_cell(row_num, 'Status', job.payload['status'])
+                results.append(members.get_cell(row_num, 'Full Name'))
+            else:
+                results.append(None)
+
+        try:
+            members.save()
+            identities.save()
+        except Exception:
+            # Drop the in-memory copies so the next batch starts from disk
+            members.book = None
+            identities.book = None
+            raise
+        return results
+
+    def stats(self):
+        """Snapshot of worker activity"""
+        return {
+            'pending': self.pending(),
+            'flushes': self.flushes,
+            'jobs_written': self.jobs_written,
+            'last_flush_seconds': self.last_flush_seconds,
+        }
+
+
+# Shared writer used by the bot
+excel_writer = ExcelWriterWorker()
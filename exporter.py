@@ -0,0 +1,179 @@
+import os
+import csv
+import time
+import uuid
+import asyncio
+import multiprocessing
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+EXPORT_COLUMNS = [
+    ('entry_code', 'Entry Code'),
+    ('user_id', 'User ID'),
+    ('full_name', 'Full Name'),
+    ('email', 'Email'),
+    ('phone', 'Phone'),
+    ('date_of_birth', 'Date of Birth'),
+    ('registration_date', 'Registration Date'),
+    ('status', 'Status'),
+]
+
+EXPORT_FORMATS = ('xlsx', 'csv')
+
+
+def build_export_query(status=None, date_from=None, date_to=None):
+    """SQL and parameters for the filtered member export (a range scan on idx_registration_date)"""
+    conditions = []
+    params = []
+    if status:
+        conditions.append("status = %s")
+        params.append(status)
+    if date_from:
+        conditions.append("registration_date >= %s")
+        params.append(date_from)
+    if date_to:
+        # date_to is inclusive
+        conditions.append("registration_date < %s")
+        params.append(date_to + timedelta(days=1))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    # With a date filter, reading in index order avoids sorting the range
+    order = "registration_date, id" if date_from or date_to else "id"
+    # Snowflakes exceed what a spreadsheet number can hold exactly
+    columns = ", ".join(
+        "CAST(user_id AS CHAR) AS user_id" if column == 'user_id' else column
+        for column, _ in EXPORT_COLUMNS
+    )
+    return f"SELECT {columns} FROM members {where} ORDER BY {order}", params
+
+
+def export_members(path, fmt, connection_params, status=None, date_from=None, date_to=None,
+                   batch_size=1000):
+    """
+    Write matching members to path as xlsx or csv. Runs in a worker process.
+    Rows stream from an unbuffered cursor into a write-only workbook (or a
+    csv writer), so memory use does not depend on the number of members.
+    Returns the number of rows written.
+    """
+    import mysql.connector
+
+    query, params = build_export_query(status, date_from, date_to)
+    headers = [header for _, header in EXPORT_COLUMNS]
+    connection = mysql.connector.connect(**connection_params)
+    rows_written = 0
+    try:
+        cursor = connection.cursor(buffered=False)
+        cursor.execute(query, params)
+
+        if fmt == 'csv':
+            with open(path, 'w', newline='', encoding='utf-8') as handle:
+                writer = csv.writer(handle)
+                writer.writerow(headers)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    writer.writerows(rows)
+                    rows_written += len(rows)
+        else:
+            from openpyxl import Workbook
+            from openpyxl.cell import WriteOnlyCell
+            from openpyxl.styles import Font, PatternFill
+
+            book = Workbook(write_only=True)
+            ws = book.create_sheet('Onboarding Data')
+            ws.freeze_panes = 'A2'
+            header_cells = []
+            for header in headers:
+                cell = WriteOnlyCell(ws, value=header)
+                cell.font = Font(color='FFFFFF', bold=True)
+                cell.fill = PatternFill(start_color='4F81BD', end_color='4F81BD', fill_type='solid')
+                header_cells.append(cell)
+            ws.append(header_cells)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    ws.append(row)
+                rows_written += len(rows)
+            book.save(path)
+
+        cursor.close()
+    finally:
+        connection.close()
+    return rows_written
+
+
+def parse_export_args(args):
+    """
+    Parse `!export` arguments of the form status=Active from=2025-01-01
+    to=2025-06-30 format=csv. Raises ValueError with a user-facing message.
+    """
+    options = {'status': None, 'date_from': None, 'date_to': None, 'fmt': 'xlsx'}
+    for arg in args:
+        key, sep, value = arg.partition('=')
+        key = key.lower()
+        if not sep or not value:
+            raise ValueError(f"Couldn't understand `{arg}`. Use key=value, e.g. `status=Active`.")
+        if key == 'status':
+            options['status'] = value.title()
+        elif key in ('from', 'to'):
+            try:
+                date = datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                raise ValueError(f"`{value}` is not a date. Use YYYY-MM-DD.")
+            options['date_from' if key == 'from' else 'date_to'] = date
+        elif key == 'format':
+            if value.lower() not in EXPORT_FORMATS:
+                raise ValueError(f"Format must be one of: {', '.join(EXPORT_FORMATS)}.")
+            options['fmt'] = value.lower()
+        else:
+            raise ValueError(f"Unknown option `{key}`. Use status, from, to or format.")
+    return options
+
+
+class Exporter:
+    """Runs member exports in a worker process so the gateway never blocks"""
+
+    def __init__(self, connection_params, export_dir=None, workers=None):
+        self.connection_params = connection_params
+        self.export_dir = export_dir or os.getenv('EXPORT_DIR', 'exports')
+        self.workers = int(workers or os.getenv('EXPORT_WORKERS', '1'))
+        self._executor = None
+        self.running = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            # Spawn rather than fork: the bot's other threads may hold locks
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    async def export(self, status=None, date_from=None, date_to=None, fmt='xlsx'):
+        """Produce an export file; returns (path, rows_written)"""
+        os.makedirs(self.export_dir, exist_ok=True)
+        path = os.path.join(self.export_dir, f"members_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.{fmt}")
+        loop = asyncio.get_running_loop()
+        self.running += 1
+        try:
+            rows = await loop.run_in_executor(
+                self._get_executor(), export_members,
+                path, fmt, self.connection_params, status, date_from, date_to
+            )
+        except BaseException:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        finally:
+            self.running -= 1
+        return path, rows
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
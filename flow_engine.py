@@ -0,0 +1,141 @@
+# Table-driven conversation engine.
+#
+# A flow is a set of named states. Each state has a prompt, optional keyword
+# transitions (yes/no/skip...) and optionally a field that free-text answers
+# are normalised, validated and stored into. The current state name lives in
+# the session under STATE_KEY, so handling a message is one dict lookup for
+# the state and one for the keyword. Flows are plain data: a new conversation
+# (a claims intake, say) needs a new table, not a new handler.
+
+# Session key holding the name of the state waiting for an answer
+STATE_KEY = 'awaiting_input'
+
+# Pseudo-state meaning the conversation is finished
+DONE = None
+
+# Keywords that mean the same thing
+KEYWORD_ALIASES = {
+    'yes': ('yes', 'y'),
+    'no': ('no', 'n'),
+    'skip': ('skip',),
+}
+
+
+class Transition:
+    """Where to go next, and what to write into the session on the way"""
+
+    def __init__(self, target, sets=None, message=None):
+        self.target = target
+        self.sets = dict(sets or {})
+        self.message = message
+
+
+class State:
+    """One question in a flow"""
+
+    def __init__(self, name, prompt, field=None, normalize=str.strip, validate=None,
+                 error=None, next=DONE, choices=None, upload=False):
+        self.name = name
+        self.prompt = prompt
+        self.field = field  # session key free-text answers are stored in
+        self.normalize = normalize
+        self.validate = validate
+        self.error = error or "❌ Invalid answer. Please try again."
+        self.next = next
+        self.choices = choices or {}  # keyword -> target name or Transition
+        self.upload = upload  # answers are attachments handled by the caller
+        self.keywords = {}
+
+
+class StepResult:
+    """Outcome of feeding one message to the engine"""
+
+    def __init__(self, messages=None, done=False, upload=False):
+        self.messages = messages or []  # text to send back, in order
+        self.done = done  # the flow just finished
+        self.upload = upload  # the caller should treat the message as an upload
+
+
+class Flow:
+    """A compiled, immutable conversation definition"""
+
+    def __init__(self, name, start, states):
+        self.name = name
+        self.start = start
+        self.states = {state.name: state for state in states}
+        self._compile()
+
+    def _compile(self):
+        if self.start not in self.states:
+            raise ValueError(f"Flow {self.name}: unknown start state {self.start!r}")
+        for state in self.states.values():
+            targets = [state.next]
+            for keyword, transition in state.choices.items():
+                if not isinstance(transition, Transition):
+                    transition = Transition(transition)
+                targets.append(transition.target)
+                # Expand aliases so dispatch is a single lookup
+                for alias in KEYWORD_ALIASES.get(keyword, (keyword,)):
+                    state.keywords[alias] = transition
+            for target in targets:
+                if target is not DONE and target not in self.states:
+                    raise ValueError(f"Flow {self.name}: state {state.name!r} points at unknown state {target!r}")
+            if state.field is None and not state.keywords and not state.upload:
+                raise ValueError(f"Flow {self.name}: state {state.name!r} can never be answered")
+
+    def prompt_for(self, state_name):
+        state = self.states.get(state_name)
+        return state.prompt if state else None
+
+
+class FlowEngine:
+    """Drives sessions through a Flow one message at a time"""
+
+    def __init__(self, flow):
+        self.flow = flow
+
+    def begin(self, session):
+        """Reset a session to the start state and return the first prompt"""
+        session.clear()
+        session[STATE_KEY] = self.flow.start
+        return self.flow.states[self.flow.start].prompt
+
+    def current_state(self, session):
+        return self.flow.states.get(session.get(STATE_KEY))
+
+    def step(self, session, text):
+        """Apply one incoming message to the session"""
+        state = self.current_state(session)
+        if state is None:
+            return StepResult()
+
+        transition = state.keywords.get(text.strip().lower())
+        if transition is not None:
+            return self._move(session, transition)
+
+        if state.upload:
+            return StepResult(upload=True)
+
+        if state.field is None:
+            return StepResult([state.error])
+
+        value = state.normalize(text) if state.normalize else text
+        if state.validate is not None and not state.validate(value):
+            return StepResult([state.error])
+        session[state.field] = value
+        return self._move(session, Transition(state.next))
+
+    def complete_upload(self, session, sets=None):
+        """Advance past an upload state once the caller has stored the file"""
+        state = self.current_state(session)
+        return self._move(session, Transition(state.next, sets))
+
+    def _move(self, session, transition):
+        session.update(transition.sets)
+        messages = [transition.message] if transition.message else []
+        if transition.target is DONE:
+            session[STATE_KEY] = None
+            return StepResult(messages, done=True)
+        session[STATE_KEY] = transition.target
+        messages.append(self.flow.states[transition.target].prompt)
+        return StepResult(messages)
@@ -0,0 +1,301 @@
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from dotenv import load_dotenv
+from status_counters import STATUS_VALUES
+
+# Load environment variables
+load_dotenv()
+
+# Headers of the legacy workbooks, mapped to onboarding record keys
+MEMBER_HEADERS = {
+    'Entry Code': 'entry_code',
+    'User ID': 'user_id',
+    'Full Name': 'full_name',
+    'Email': 'email',
+    'Phone': 'phone',
+    'Date of Birth': 'dob',
+    'Registration Date': 'registration_date',
+    'Status': 'status',
+}
+
+IDENTITY_HEADERS = {
+    'Full Name': 'full_name',
+    'ID Number': 'id_number',
+    'Passport': 'passport',
+    'KRA Number': 'kra',
+    'Last Updated': 'last_updated',
+}
+
+# Values the old identity sheet used for "not given"
+MISSING_VALUES = {'', 'n/a', 'none', 'not provided', 'nan'}
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def clean(value):
+    """Cell value as a stripped string, or None for blanks and placeholders"""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        # Discord ids and phone numbers often come back as floats
+        value = int(value)
+    text = str(value).strip()
+    return None if text.lower() in MISSING_VALUES else text
+
+
+def format_date(value):
+    """Normalise a date cell to the format the bot writes"""
+    if isinstance(value, datetime):
+        return value.strftime(DATE_FORMAT)
+    text = clean(value)
+    if text is None:
+        return None
+    try:
+        return datetime.fromisoformat(text).strftime(DATE_FORMAT)
+    except ValueError:
+        return None
+
+
+def name_key(name):
+    return str(name).strip().lower()
+
+
+def iter_sheet(path, headers):
+    """Yield (row_number, record) from the first sheet of a workbook, streaming"""
+    from openpyxl import load_workbook
+
+    book = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = book.worksheets[0].iter_rows(values_only=True)
+        header_row = next(rows, None)
+        if header_row is None:
+            return
+        columns = {}
+        for index, header in enumerate(header_row):
+            key = headers.get(str(header).strip()) if header is not None else None
+            if key:
+                columns[key] = index
+        missing = set(headers.values()) - set(columns)
+        if 'entry_code' in missing or 'full_name' in missing:
+            raise ValueError(f"{path} is missing required columns: {', '.join(sorted(missing))}")
+        # Data starts on the second sheet row
+        for row_number, row in enumerate(rows, start=2):
+            if not any(cell is not None for cell in row):
+                continue
+            yield row_number, {
+                key: row[index] if index < len(row) else None
+                for key, index in columns.items()
+            }
+    finally:
+        book.close()
+
+
+def load_identities(path):
+    """Identity rows keyed by lower-cased full name (the old sheet's key)"""
+    identities = {}
+    if not path or not os.path.exists(path):
+        return identities
+    for _, record in iter_sheet(path, IDENTITY_HEADERS):
+        name = clean(record.get('full_name'))
+        if not name:
+            continue
+        identities[name_key(name)] = {
+            'id_number': clean(record.get('id_number')),
+            'passport': clean(record.get('passport')),
+            'kra': clean(record.get('kra')),
+            'last_updated': format_date(record.get('last_updated')),
+        }
+    return identities
+
+
+def validate_batch(batch, identities, seen_codes):
+    """
+    Check a batch of (row_number, raw_record) pairs in one pass.
+    Returns (records ready for save_members_bulk, [(row_number, reason)]).
+    """
+    records = []
+    rejected = []
+    for row_number, raw in batch:
+        entry_code = clean(raw.get('entry_code'))
+        user_id = clean(raw.get('user_id'))
+        full_name = clean(raw.get('full_name'))
+        email = clean(raw.get('email'))
+        registration_date = format_date(raw.get('registration_date'))
+        status = (clean(raw.get('status')) or 'Active').title()
+
+        if not entry_code:
+            rejected.append((row_number, 'missing entry code'))
+        elif len(entry_code) > 8:
+            rejected.append((row_number, f'entry code {entry_code} is longer than 8 characters'))
+        elif entry_code.upper() in seen_codes:
+            rejected.append((row_number, f'duplicate entry code {entry_code}'))
+        elif not user_id or not user_id.isdigit():
+            rejected.append((row_number, 'missing or invalid user id'))
+        elif not full_name:
+            rejected.append((row_number, 'missing full name'))
+        elif not email or '@' not in email:
+            rejected.append((row_number, 'missing or invalid email'))
+        elif registration_date is None:
+            rejected.append((row_number, 'invalid registration date'))
+        elif status not in STATUS_VALUES:
+            rejected.append((row_number, f'unknown status {status}'))
+        else:
+            # Codes match case-insensitively, as save_members_bulk treats them
+            seen_codes.add(entry_code.upper())
+            record = {
+                'entry_code': entry_code,
+                'user_id': user_id,
+                'full_name': full_name,
+                'email': email,
+                'phone': clean(raw.get('phone')) or '',
+                'dob': clean(raw.get('dob')),
+                'registration_date': registration_date,
+                'status': status,
+                'file_path': 'Imported from Excel',
+            }
+            identity = identities.get(name_key(full_name))
+            if identity and any(identity[key] for key in ('id_number', 'passport', 'kra')):
+                record.update(identity)
+            records.append(record)
+    return records, rejected
+
+
+class Checkpoint:
+    """Progress of an import, saved after every committed batch so it can resume"""
+
+    def __init__(self, path, source):
+        self.path = path
+        stat = os.stat(source)
+        # A changed workbook invalidates the checkpoint
+        self.fingerprint = {'source': os.path.abspath(source), 'size': stat.st_size, 'mtime': stat.st_mtime}
+        self.last_row = 0
+        self.imported = 0
+        self.rejected = 0
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as handle:
+                state = json.load(handle)
+        except FileNotFoundError:
+            return False
+        if state.get('fingerprint') != self.fingerprint:
+            print(f"Ignoring checkpoint {self.path}: the workbook has changed since it was written")
+            return False
+        self.last_row = state['last_row']
+        self.imported = state['imported']
+        self.rejected = state['rejected']
+        return True
+
+    def save(self):
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            json.dump({
+                'fingerprint': self.fingerprint,
+                'last_row': self.last_row,
+                'imported': self.imported,
+                'rejected': self.rejected,
+            }, handle, indent=2)
+        os.replace(temp_path, self.path)
+
+
+def import_members(database, source, identity_source=None, batch_size=1000,
+                   checkpoint_path=None, rejects_path=None, resume=True):
+    """
+    Stream the legacy workbook into MySQL, batch_size rows per transaction.
+    Rows carry their original entry codes, so re-importing is harmless;
+    the checkpoint only saves the time of re-reading finished batches.
+    Returns the Checkpoint with the final counts.
+    """
+    checkpoint = Checkpoint(checkpoint_path or f"{source}.import.json", source)
+    if resume and checkpoint.load():
+        print(f"Resuming after sheet row {checkpoint.last_row} "
+              f"({checkpoint.imported} imported, {checkpoint.rejected} rejected so far)")
+
+    identities = load_identities(identity_source)
+    print(f"Loaded {len(identities)} identity row(s)")
+
+    rejects = open(rejects_path or f"{source}.rejects.txt", 'a', encoding='utf-8')
+    seen_codes = set()
+    started = time.perf_counter()
+    batch = []
+
+    def flush():
+        records, rejected = validate_batch(batch, identities, seen_codes)
+        if records:
+            saved = database.save_members_bulk(records)
+            # Codes already used by another Discord user are skipped, not saved
+            rows = {clean(raw.get('entry_code')): row_number for row_number, raw in batch}
+            conflicting = [record for record, code in zip(records, saved) if code is None]
+            for record in conflicting:
+                rejected.append((rows[record['entry_code']],
+                                 f"entry code {record['entry_code']} already belongs to another member"))
+            records = [record for record, code in zip(records, saved) if code is not None]
+        for row_number, reason in rejected:
+            rejects.write(f"row {row_number}: {reason}\n")
+        rejects.flush()
+        checkpoint.last_row = batch[-1][0]
+        checkpoint.imported += len(records)
+        checkpoint.rejected += len(rejected)
+        checkpoint.save()
+        elapsed = time.perf_counter() - started
+        print(f"Row {checkpoint.last_row}: {checkpoint.imported} imported, "
+              f"{checkpoint.rejected} rejected ({elapsed:.1f}s)")
+        batch.clear()
+
+    try:
+        for row_number, raw in iter_sheet(source, MEMBER_HEADERS):
+            if row_number <= checkpoint.last_row:
+                # Still remember the code so later duplicates are caught
+                code = clean(raw.get('entry_code'))
+                if code:
+                    seen_codes.add(code.upper())
+                continue
+            batch.append((row_number, raw))
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    finally:
+        rejects.close()
+    return checkpoint
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import legacy onboarding workbooks into MySQL")
+    parser.add_argument('source', nargs='?', default='onboarding_data.xlsx')
+    parser.add_argument('--identity', help="identity workbook (default: <source>_identity.xlsx)")
+    parser.add_argument('--batch-size', type=int, default=1000, help="rows per transaction")
+    parser.add_argument('--checkpoint', help="checkpoint file (default: <source>.import.json)")
+    parser.add_argument('--restart', action='store_true', help="ignore any existing checkpoint")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.source):
+        print(f"{args.source} not found")
+        return 1
+    identity_source = args.identity or f"{os.path.splitext(args.source)[0]}_identity.xlsx"
+
+    from database import Database
+
+    database = Database()
+    if not database.connection and not database.pool:
+        print("Could not connect to the database")
+        return 1
+    try:
+        checkpoint = import_members(
+            database, args.source, identity_source,
+            batch_size=args.batch_size, checkpoint_path=args.checkpoint,
+            resume=not args.restart
+        )
+    except Exception as e:
+        print(f"Import stopped: {e}. Run again to resume from the last checkpoint.")
+        return 1
+    print(f"Done: {checkpoint.imported} imported, {checkpoint.rejected} rejected")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from dotenv import load_dotenv
+from metrics import LOOP_LAG_SECONDS, LOOP_STALLS
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Frames under this directory (minus site-packages) are the bot's own code
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Innermost frames kept in a logged stack
+STACK_LIMIT = 25
+
+
+def is_project_frame(filename):
+    filename = os.path.abspath(filename)
+    return (
+        filename.startswith(PROJECT_DIR + os.sep)
+        and 'site-packages' not in filename
+        and filename != os.path.abspath(__file__)
+    )
+
+
+def blocking_site(frames):
+    """'file.py:function' of the innermost bot frame in a stack (outermost first), or None"""
+    for frame in reversed(frames):
+        if is_project_frame(frame.filename):
+            return f"{os.path.basename(frame.filename)}:{frame.name}"
+    return None
+
+
+class LoopMonitor:
+    """Reports how long the event loop goes without getting back to its other work.
+
+    A heartbeat task sleeps for `interval` and records how late it woke up
+    (the scheduling delay every other coroutine saw too) in
+    loop_lag_seconds. A watchdog thread notices when the heartbeat is
+    overdue by more than `threshold` and, while the loop is still blocked,
+    takes the loop thread's stack from sys._current_frames(). When the
+    heartbeat resumes, the stall is counted in loop_stalls_total under the
+    innermost frame of the bot's own code (e.g. 'bot.py:get_all_members')
+    and logged as one JSON line with the running task and the stack.
+    """
+
+    def __init__(self, interval=None, threshold_ms=None):
+        self.interval = float(interval or os.getenv('LOOP_MONITOR_INTERVAL', '0.1'))
+        threshold_ms = float(threshold_ms if threshold_ms is not None else os.getenv('LOOP_STALL_MS', '250'))
+        self.threshold = threshold_ms / 1000
+        self.loop = None
+        self._task = None
+        self._thread = None
+        self._stopped = threading.Event()
+        self._loop_thread_id = None
+        # Written by the heartbeat, read by the watchdog
+        self._beat = 0  # heartbeats so far; identifies the stall being sampled
+        self._beat_at = time.monotonic()
+        # Written by the watchdog: (beat, sample) for the stall in progress
+        self._sample = None
+
+        self.stalls = 0
+        self.longest = 0.0
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    def start(self):
+        """Begin monitoring the running loop (idempotent; LOOP_STALL_MS=0 disables)"""
+        if not self.enabled or self._task is not None:
+            return
+        self.loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat_at = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watchdog, name='loop-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            woke = time.monotonic()
+            lag = max(woke - started - self.interval, 0.0)
+            beat = self._beat
+            self._beat = beat + 1
+            self._beat_at = woke
+            LOOP_LAG_SECONDS.observe(lag)
+            if lag >= self.threshold:
+                sample = self._sample
+                self._report(lag, sample[1] if sample and sample[0] == beat else None)
+
+    def _watchdog(self):
+        """Runs on its own thread: sample the loop thread's stack while it is blocked"""
+        poll = min(self.interval, self.threshold) / 2
+        while not self._stopped.wait(poll):
+            beat = self._beat
+            overdue = time.monotonic() - self._beat_at - self.interval
+            if overdue < self.threshold or (self._sample and self._sample[0] == beat):
+                continue
+            sample = self._capture()
+            # Only keep it if the loop was still stuck while we looked
+            if sample is not None and self._beat == beat:
+                self._sample = (beat, sample)
+
+    def _capture(self):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        frames = traceback.extract_stack(frame)
+        task = asyncio.current_task(self.loop)
+        coroutine = task.get_coro() if task is not None else None
+        return {
+            'site': blocking_site(frames),
+            'task': task.get_name() if task is not None else None,
+            'coroutine': getattr(coroutine, '__qualname__', None),
+            'stack': [
+                f"{frame.filename}:{frame.lineno} in {frame.name}" for frame in frames[-STACK_LIMIT:]
+            ],
+        }
+
+    def _report(self, lag, sample):
+        self.stalls += 1
+        self.longest = max(self.longest, lag)
+        site = (sample or {}).get('site') or 'unknown'
+        LOOP_STALLS.inc(site=site)
+        event = {
+            'event': 'loop_stall',
+            'ms': round(lag * 1000, 1),
+            'threshold_ms': round(self.threshold * 1000),
+            'site': site,
+        }
+        if sample:
+            event.update(task=sample['task'], coroutine=sample['coroutine'], stack=sample['stack'])
+        logger.warning(json.dumps(event))
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'stalls': self.stalls,
+            'longest_ms': round(self.longest * 1000, 1),
+        }
@@ -0,0 +1,158 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from metrics import MEMBER_CACHE_LOOKUPS, MEMBER_CACHE_EVICTIONS
+
+# Load environment variables
+load_dotenv()
+
+# Positions of the members columns at the start of every get_member row (m.*)
+MEMBER_ID_COLUMN = 0
+ENTRY_CODE_COLUMN = 1
+USER_ID_COLUMN = 2
+
+
+def normalize_key(key):
+    """Entry codes compare case-insensitively in MySQL, so cache them upper-cased"""
+    kind, value = key
+    if kind == 'entry_code':
+        return kind, str(value).strip().upper()
+    return kind, str(value)
+
+
+def row_links(row):
+    """The member id and the lookup keys that reach a member row"""
+    return (
+        row[MEMBER_ID_COLUMN],
+        normalize_key(('entry_code', row[ENTRY_CODE_COLUMN])),
+        normalize_key(('user_id', row[USER_ID_COLUMN])),
+    )
+
+
+class MemberCache:
+    """Bounded LRU cache with a TTL in front of Database.get_member.
+
+    Entries are keyed by ('entry_code', code) or ('user_id', id). Every
+    cached row is also indexed by its member id, entry code and user id, so
+    a write to one member drops whichever keys point at it. Readers take a
+    token before querying and the result is only stored if no invalidation
+    happened in between, so a slow read can't resurrect stale data.
+    """
+
+    def __init__(self, max_size=None, ttl=None):
+        self.max_size = int(max_size or os.getenv('MEMBER_CACHE_SIZE', '1024'))
+        self.ttl = float(ttl if ttl is not None else os.getenv('MEMBER_CACHE_TTL', '300'))
+        self._entries = OrderedDict()  # key -> (expires_at, rows)
+        self._members = {}  # member id -> set of keys whose rows mention it
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def begin(self):
+        """Token to pass to put() for the read that is about to happen"""
+        with self._lock:
+            return self._generation
+
+    def get(self, key):
+        """Cached rows for key, or None on a miss"""
+        key = normalize_key(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                MEMBER_CACHE_LOOKUPS.inc(outcome='miss')
+                return None
+            expires_at, rows = entry
+            if expires_at <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                MEMBER_CACHE_EVICTIONS.inc(reason='expired')
+                MEMBER_CACHE_LOOKUPS.inc(outcome='miss')
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            MEMBER_CACHE_LOOKUPS.inc(outcome='hit')
+            return rows
+
+    def put(self, key, rows, token):
+        """Store rows unless something was invalidated since token was taken"""
+        if not rows or self.max_size <= 0:
+            return
+        key = normalize_key(key)
+        with self._lock:
+            if token != self._generation:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, rows)
+            for row in rows:
+                # Register every way of reaching the same member
+                for link in row_links(row):
+                    self._members.setdefault(link, set()).add(key)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+                MEMBER_CACHE_EVICTIONS.inc(reason='size')
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for row in entry[1]:
+            for link in row_links(row):
+                keys = self._members.get(link)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._members[link]
+
+    def invalidate(self, member_id=None, entry_code=None, user_id=None):
+        """Drop every cached lookup that involves the given member"""
+        links = []
+        if member_id is not None:
+            links.append(member_id)
+        if entry_code is not None:
+            links.append(normalize_key(('entry_code', entry_code)))
+        if user_id is not None:
+            links.append(normalize_key(('user_id', user_id)))
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            for link in links:
+                # The lookup key itself, plus every entry whose rows mention it
+                keys = set(self._members.get(link, ()))
+                if isinstance(link, tuple):
+                    keys.add(link)
+                for key in keys:
+                    self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            self._entries.clear()
+            self._members.clear()
+
+    def stats(self):
+        """Hit/miss/eviction counters for tuning the cache size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,270 @@
+import os
+import re
+import time
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Prometheus' default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# First table named in a statement
+STATEMENT_TABLE = re.compile(
+    r'\b(?:from|into|update|join|table(?:\s+if\s+not\s+exists)?)\s+`?(\w+)', re.IGNORECASE
+)
+
+
+def statement_name(query):
+    """Short, low-cardinality label for an SQL statement, e.g. 'select members'"""
+    words = query.split(None, 1)
+    if not words:
+        return 'empty'
+    verb = words[0].lower()
+    match = STATEMENT_TABLE.search(query)
+    return f"{verb} {match.group(1).lower()}" if match else verb
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base class: a named family of series keyed by label values"""
+
+    kind = 'untyped'
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = list(self._series.items())
+        for key, value in sorted(series):
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key, value):
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"]
+
+
+class Counter(Metric):
+    """A value that only goes up"""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that goes up and down, or is read from a callback at scrape time"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help, labels=(), function=None):
+        super().__init__(name, help, labels)
+        self.function = function
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        """Read the (unlabelled) value from function() whenever metrics are scraped"""
+        self.function = function
+
+    def render(self):
+        if self.function is not None:
+            try:
+                self.set(self.function())
+            except Exception as e:
+                print(f"Error reading gauge {self.name}: {e}")
+        return super().render()
+
+
+class Histogram(Metric):
+    """Distribution of observed values (usually latencies) in fixed buckets"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [per-bucket counts..., sum]
+                series = self._series[key] = [0] * len(self.buckets) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the with-block takes"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_series(self, key, series):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, series):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+        labels = _format_labels(self.labels, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """All metrics of the process, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=(), function=None):
+        return self.register(Gauge(name, help, labels, function))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+async def start_metrics_server(registry, host=None, port=None):
+    """
+    Serve registry at http://host:port/metrics. Listens on localhost only
+    by default; METRICS_PORT=0 disables it. Returns the aiohttp runner (or
+    None when disabled) so the caller can clean it up.
+    """
+    from aiohttp import web
+
+    host = host or os.getenv('METRICS_HOST', '127.0.0.1')
+    port = int(port if port is not None else os.getenv('METRICS_PORT', '9108'))
+    if not port:
+        return None
+
+    async def handle_metrics(request):
+        return web.Response(
+            text=registry.render(),
+            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+        )
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    print(f"Metrics available at http://{host}:{port}/metrics")
+    return runner
+
+
+# Process-wide registry and the metrics the bot reports
+registry = Registry()
+
+MESSAGES = registry.counter('bot_messages_total', 'Messages handled by on_message', ['outcome'])
+MESSAGE_SECONDS = registry.histogram('bot_message_seconds', 'Time to handle one user message')
+COMMANDS = registry.counter('bot_commands_total', 'Commands invoked', ['command', 'outcome'])
+COMMAND_SECONDS = registry.histogram('bot_command_seconds', 'Command latency', ['command'])
+QUERY_SECONDS = registry.histogram(
+    'db_query_seconds', 'Database query latency by statement', ['statement']
+)
+QUERY_ERRORS = registry.counter('db_query_errors_total', 'Failed queries by statement', ['statement'])
+EXCEL_FLUSH_SECONDS = registry.histogram('excel_flush_seconds', 'Time to write one batch to the workbooks')
+EXCEL_JOBS = registry.counter('excel_jobs_total', 'Excel writer jobs processed', ['outcome'])
+UPLOAD_SECONDS = registry.histogram(
+    'upload_download_seconds', 'Time to stream one attachment into the blob store',
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+)
+UPLOADS = registry.counter('uploads_total', 'Attachments ingested', ['outcome'])
+UPLOAD_BYTES = registry.counter('upload_bytes_total', 'Bytes downloaded from Discord')
+ENTRY_CODE_ATTEMPTS = registry.counter(
+    'entry_code_attempts_total', 'Inserts of a generated entry code by outcome (ok or collision)', ['outcome']
+)
+ENTRY_CODE_COLLISION_RATE = registry.gauge(
+    'entry_code_recent_collision_rate', 'Share of recent generated entry codes that were already taken'
+)
+MEMBER_CACHE_LOOKUPS = registry.counter('member_cache_lookups_total', 'Member cache lookups', ['outcome'])
+MEMBER_CACHE_EVICTIONS = registry.counter(
+    'member_cache_evictions_total', 'Member cache entries dropped for size or age', ['reason']
+)
+ACTIVE_SESSIONS = registry.gauge('onboarding_sessions_active', 'Onboarding sessions currently held')
+DISPATCH_ACTORS = registry.gauge('dispatch_actors', 'Users with a message actor running')
+DISPATCH_QUEUED = registry.gauge('dispatch_queued_messages', 'Messages waiting in per-user queues')
+DISPATCH_MAX_QUEUE_DEPTH = registry.gauge(
+    'dispatch_max_queue_depth', 'Longest per-user message queue right now'
+)
+POSTPROCESS_QUEUE_DEPTH = registry.gauge(
+    'postprocess_queue_depth', 'Uploads submitted for post-processing and not finished yet'
+)
+LOOP_LAG_SECONDS = registry.histogram(
+    'loop_lag_seconds', 'How late the event loop ran a task scheduled to wake up',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+LOOP_STALLS = registry.counter(
+    'loop_stalls_total', 'Event loop stalls over LOOP_STALL_MS by blocking call site', ['site']
+)
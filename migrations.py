@@ -0,0 +1,333 @@
+# Versioned schema migrations.
+#
+# Every schema change is a Migration with a version number, and the versions
+# applied so far are recorded in the schema_version table. migrate() compares
+# the recorded version with LATEST_VERSION and returns after a single query
+# when they match, so a normal start runs no DDL at all.
+#
+# MySQL commits DDL implicitly, so a migration can't be rolled back halfway.
+# Instead every step is safe to run twice (IF NOT EXISTS, or a check against
+# information_schema first) and a migration is only recorded once all of its
+# steps have succeeded; a failed one is simply retried on the next start.
+import re
+import sys
+from mysql.connector import Error, errorcode
+
+MIGRATION_LOCK = 'discord_bot_schema_migrations'
+MIGRATION_LOCK_TIMEOUT = 60
+
+SCHEMA_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+# Errors MySQL/MariaDB raise when an ALTER can't run with the requested
+# ALGORITHM/LOCK, e.g. changing a column's type
+ONLINE_DDL_UNSUPPORTED = (
+    errorcode.ER_ALTER_OPERATION_NOT_SUPPORTED,
+    errorcode.ER_ALTER_OPERATION_NOT_SUPPORTED_REASON,
+)
+
+
+class Migration:
+    """One schema change: a version, a name and the steps that make it.
+
+    A step is either an SQL string or a callable taking a cursor.
+    """
+
+    def __init__(self, version, name, steps):
+        self.version = version
+        self.name = name
+        self.steps = steps
+
+    def apply(self, cursor):
+        for step in self.steps:
+            if callable(step):
+                step(cursor)
+            else:
+                cursor.execute(step)
+
+
+def online_alter(cursor, table, clause):
+    """
+    ALTER TABLE without blocking reads or writes where the server allows it.
+    Falls back to a table copy that still allows reads (LOCK=SHARED) for
+    changes InnoDB can't make in place.
+    """
+    try:
+        cursor.execute(f"ALTER TABLE {table} {clause}, ALGORITHM=INPLACE, LOCK=NONE")
+    except Error as e:
+        if e.errno not in ONLINE_DDL_UNSUPPORTED:
+            raise
+        print(f"Online ALTER not possible for {table} ({e.msg}); copying the table with reads allowed")
+        cursor.execute(f"ALTER TABLE {table} {clause}, ALGORITHM=COPY, LOCK=SHARED")
+
+
+def index_exists(cursor, table, index):
+    cursor.execute(
+        """
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        LIMIT 1
+        """,
+        (table, index)
+    )
+    return cursor.fetchone() is not None
+
+
+def column_type(cursor, table, column):
+    """COLUMN_TYPE of a column (e.g. 'varchar(50)'), or None if it doesn't exist"""
+    cursor.execute(
+        """
+        SELECT column_type FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        """,
+        (table, column)
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    value = row[0]
+    value = (value.decode() if isinstance(value, (bytes, bytearray)) else value).lower()
+    # MySQL 5.7 and MariaDB report integer display widths ('bigint(20) unsigned')
+    return re.sub(r'int\(\d+\)', 'int', value)
+
+
+def add_index(table, index, columns, unique=False):
+    """Step that adds an index online unless it already exists"""
+    def step(cursor):
+        if not index_exists(cursor, table, index):
+            kind = "UNIQUE INDEX" if unique else "INDEX"
+            online_alter(cursor, table, f"ADD {kind} {index} ({columns})")
+    return step
+
+
+def drop_index(table, index):
+    """Step that drops an index online if it exists"""
+    def step(cursor):
+        if index_exists(cursor, table, index):
+            online_alter(cursor, table, f"DROP INDEX {index}")
+    return step
+
+
+def modify_column(table, column, definition, target_type):
+    """Step that changes a column's definition unless it already has target_type"""
+    def step(cursor):
+        if column_type(cursor, table, column) != target_type.lower():
+            online_alter(cursor, table, f"MODIFY COLUMN {column} {definition}")
+    return step
+
+
+def require_no_rows(table, condition, message):
+    """Step that stops the migration if any row matches condition"""
+    def step(cursor):
+        cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE {condition}")
+        count = cursor.fetchone()[0]
+        if count:
+            raise Error(msg=f"{count} row(s) in {table}: {message}. Fix them and restart.")
+    return step
+
+
+def normalize_datetime_strings(table, column):
+    """Step that rewrites a VARCHAR date column into values DATETIME accepts"""
+    def step(cursor):
+        if not (column_type(cursor, table, column) or '').startswith('varchar'):
+            return
+        cursor.execute(
+            f"UPDATE {table} SET {column} = LEFT({column}, 19), updated_at = updated_at "
+            f"WHERE CHAR_LENGTH({column}) > 19"
+        )
+        cursor.execute(
+            f"UPDATE {table} SET {column} = DATE_FORMAT(created_at, '%Y-%m-%d %H:%i:%s'), "
+            f"updated_at = updated_at "
+            f"WHERE {column} IS NULL "
+            f"OR {column} NOT REGEXP '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}( [0-9]{{2}}:[0-9]{{2}}:[0-9]{{2}})?$'"
+        )
+    return step
+
+
+MIGRATIONS = [
+    Migration(1, 'initial schema', [
+        # Tables may already exist from before migrations were tracked.
+        # They are created parents first, so foreign key checks can stay on.
+        """
+        CREATE TABLE IF NOT EXISTS members (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            entry_code VARCHAR(255) UNIQUE NOT NULL,
+            user_id VARCHAR(255) NOT NULL,
+            full_name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            phone VARCHAR(50),
+            date_of_birth VARCHAR(50),
+            file_path TEXT,
+            registration_date VARCHAR(50) NOT NULL,
+            status VARCHAR(20) DEFAULT 'Active' CHECK (status IN ('Active', 'Inactive', 'Suspended')),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_user_id (user_id),
+            INDEX idx_entry_code (entry_code)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """,
+        # Sensitive data lives in its own table
+        """
+        CREATE TABLE IF NOT EXISTS identity_info (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            member_id INT,
+            id_number VARCHAR(50),
+            passport_number VARCHAR(50),
+            kra_number VARCHAR(50),
+            last_updated VARCHAR(50) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            FOREIGN KEY (member_id) REFERENCES members(id) ON DELETE CASCADE,
+            UNIQUE (member_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """,
+        # Post-processing results, keyed by the blob members.file_path points at
+        """
+        CREATE TABLE IF NOT EXISTS upload_metadata (
+            sha256 CHAR(64) PRIMARY KEY,
+            mime_type VARCHAR(100) NOT NULL,
+            size_bytes BIGINT NOT NULL,
+            width INT,
+            height INT,
+            page_count INT,
+            display_path TEXT,
+            thumbnail_path TEXT,
+            error TEXT,
+            processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """,
+        # One row per status change
+        """
+        CREATE TABLE IF NOT EXISTS member_status_history (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            member_id INT NOT NULL,
+            old_status VARCHAR(20),
+            new_status VARCHAR(20) NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            FOREIGN KEY (member_id) REFERENCES members(id) ON DELETE CASCADE,
+            INDEX idx_history_updated_at (updated_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """,
+    ]),
+    Migration(2, 'updated_at indexes for incremental snapshots', [
+        add_index('members', 'idx_updated_at', 'updated_at'),
+        add_index('identity_info', 'idx_identity_updated_at', 'updated_at'),
+    ]),
+    Migration(3, 'DATETIME registration_date and last_updated', [
+        # Old rows hold strings such as '2025-08-15 10:30:00' or, for
+        # last_updated, str(datetime.now()) with microseconds. Trim those to
+        # whole seconds and fall back to created_at for anything unparseable
+        # so the type change can't fail in strict mode. updated_at is kept
+        # as it was so the snapshot job doesn't re-export every row.
+        normalize_datetime_strings('members', 'registration_date'),
+        normalize_datetime_strings('identity_info', 'last_updated'),
+        modify_column('members', 'registration_date', 'DATETIME NOT NULL', 'datetime'),
+        modify_column('identity_info', 'last_updated', 'DATETIME NOT NULL', 'datetime'),
+        add_index('members', 'idx_registration_date', 'registration_date'),
+        add_index('identity_info', 'idx_last_updated', 'last_updated'),
+    ]),
+    Migration(4, 'BIGINT user_id, CHAR(8) entry_code and a (user_id, id) index', [
+        require_no_rows(
+            'members', "user_id NOT REGEXP '^[0-9]{1,20}$'",
+            "members.user_id must hold Discord ids (digits only) before it can become BIGINT"
+        ),
+        require_no_rows(
+            'members', "CHAR_LENGTH(entry_code) > 8",
+            "entry codes longer than 8 characters can't fit in CHAR(8)"
+        ),
+        modify_column('members', 'user_id', 'BIGINT UNSIGNED NOT NULL', 'bigint unsigned'),
+        # Codes are ASCII, so 8 bytes per key instead of up to 1020; the
+        # _ci collation keeps lookups case-insensitive as before
+        modify_column(
+            'members', 'entry_code',
+            'CHAR(8) CHARACTER SET ascii COLLATE ascii_general_ci NOT NULL', 'char(8)'
+        ),
+        # Serves WHERE user_id = ? ORDER BY id DESC LIMIT 1 straight from the index
+        add_index('members', 'idx_user_id_id', 'user_id, id'),
+        drop_index('members', 'idx_user_id'),
+        # Duplicates the UNIQUE key on entry_code
+        drop_index('members', 'idx_entry_code'),
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def current_version(cursor):
+    """Highest applied migration, or 0 on a database that predates migrations"""
+    try:
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+    except Error as e:
+        if e.errno == errorcode.ER_NO_SUCH_TABLE:
+            return 0
+        raise
+    return cursor.fetchone()[0] or 0
+
+
+def migrate(connection, target=None):
+    """
+    Apply pending migrations up to target (default: all).
+    Returns the versions applied; an up-to-date schema costs one SELECT.
+    """
+    target = LATEST_VERSION if target is None else target
+    cursor = connection.cursor(buffered=True)
+    try:
+        if current_version(cursor) >= target:
+            return []
+
+        # Only one process migrates at a time; the others wait, then find
+        # the work already done
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK, MIGRATION_LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            raise Error(msg=f"Timed out waiting for the schema migration lock after {MIGRATION_LOCK_TIMEOUT}s")
+        try:
+            cursor.execute(SCHEMA_VERSION_TABLE)
+            version = current_version(cursor)
+            applied = []
+            for migration in MIGRATIONS:
+                if migration.version <= version or migration.version > target:
+                    continue
+                print(f"Applying migration {migration.version}: {migration.name}")
+                migration.apply(cursor)
+                cursor.execute(
+                    "INSERT INTO schema_version (version, name) VALUES (%s, %s)",
+                    (migration.version, migration.name)
+                )
+                connection.commit()
+                applied.append(migration.version)
+            return applied
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+            cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+def main():
+    from database import Database
+
+    db = Database(auto_connect=False)
+    if not db.connect():
+        return 1
+    try:
+        cursor = db.connection.cursor(buffered=True)
+        version = current_version(cursor)
+        cursor.close()
+        print(f"Schema version {version}, latest {LATEST_VERSION}")
+        if '--status' in sys.argv:
+            return 0
+        applied = migrate(db.connection)
+        print(f"Applied {len(applied)} migration(s)" if applied else "Schema is up to date")
+    finally:
+        db.connection.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+from flow_engine import Flow, State, Transition, FlowEngine, DONE
+
+YES_NO_ERROR = "❌ Please answer with 'yes' or 'no'."
+
+
+def validate_id_number(id_number):
+    """Validate ID number (5-9 digits)"""
+    return id_number.isdigit() and 5 <= len(id_number) <= 9
+
+
+def validate_passport(passport):
+    """Validate passport number (2 letters followed by 5 digits)"""
+    if len(passport) != 7:
+        return False
+    return (passport[:2].isalpha() and
+            passport[2:].isdigit() and
+            len(passport[2:]) == 5)
+
+
+def validate_kra(kra):
+    """Validate KRA number (alphanumeric, 11 characters)"""
+    return len(kra) == 11 and kra.isalnum()
+
+
+def upper(text):
+    return text.strip().upper()
+
+
+def lower(text):
+    return text.strip().lower()
+
+
+# Skipping the upload finishes onboarding without a file
+NO_FILE = {'file_uploaded': False, 'file_path': 'None'}
+
+ONBOARDING_FLOW = Flow('onboarding', start='full_name', states=[
+    State('full_name', "What is your full name?", field='full_name', next='email'),
+    State('email', "What is your email address?", field='email', normalize=lower, next='phone'),
+    State('phone', "What is your phone number?", field='phone', next='dob'),
+    State('dob', "What is your date of birth? (DD/MM/YYYY)", field='dob', next='id_type'),
+    State(
+        'id_type',
+        "Do you have a National ID? (yes/no) - If no, you'll be asked for passport number",
+        error=YES_NO_ERROR,
+        choices={
+            'yes': Transition('id_number', {'id_type': 'yes'}),
+            'no': Transition('passport', {'id_type': 'no'}),
+        },
+    ),
+    State(
+        'id_number', "Please enter your National ID number (5-9 digits):",
+        field='id_number', validate=validate_id_number,
+        error="❌ Invalid ID number. Please enter 5-9 digits.",
+        next='kra_prompt',
+    ),
+    State(
+        'passport', "Please enter your passport number (2 letters followed by 5 digits, e.g., AB12345):",
+        field='passport', normalize=upper, validate=validate_passport,
+        error="❌ Invalid passport number. Format: 2 letters followed by 5 digits (e.g., AB12345).",
+        next='kra_prompt',
+    ),
+    State(
+        'kra_prompt', "Would you like to provide your KRA PIN? (yes/no)",
+        error=YES_NO_ERROR,
+        choices={
+            'yes': Transition('kra', {'kra_prompt': 'yes'}),
+            'no': Transition('ask_file_upload', {'kra_prompt': 'no', 'kra': 'Not provided'}),
+        },
+    ),
+    State(
+        'kra', "Please enter your KRA PIN (11 alphanumeric characters):",
+        field='kra', normalize=upper, validate=validate_kra,
+        error="❌ Invalid KRA PIN. Must be 11 alphanumeric characters. Please try again or type 'skip' to continue without providing KRA PIN.",
+        next='ask_file_upload',
+        choices={'skip': Transition('ask_file_upload', {'kra': 'Not provided'})},
+    ),
+    State(
+        'ask_file_upload', "Would you like to upload a file? (yes/no)",
+        error="Please answer with 'yes' or 'no'.",
+        choices={
+            'yes': 'file_upload',
+            'no': Transition(DONE, NO_FILE),
+            'skip': Transition(DONE, NO_FILE),
+        },
+    ),
+    State(
+        'file_upload', "Please upload your file by dragging and dropping it into this chat.",
+        upload=True, next=DONE,
+        choices={'skip': Transition(DONE, NO_FILE)},
+    ),
+])
+
+onboarding = FlowEngine(ONBOARDING_FLOW)
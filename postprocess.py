@@ -0,0 +1,181 @@
+import os
+import re
+import asyncio
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Leading bytes of the file types people are likely to upload
+SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'%PDF-', 'application/pdf'),
+    (b'PK\x03\x04', 'application/zip'),
+    (b'BM', 'image/bmp'),
+    (b'II*\x00', 'image/tiff'),
+    (b'MM\x00*', 'image/tiff'),
+]
+
+# Recently processed hashes remembered to skip identical uploads
+SEEN_LIMIT = 10000
+
+PDF_PAGE = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+
+
+def sniff_mime(head):
+    """Detect a MIME type from the first bytes of a file"""
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    for signature, mime_type in SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+    try:
+        head.decode('utf-8')
+        return 'text/plain'
+    except UnicodeDecodeError:
+        return 'application/octet-stream'
+
+
+def count_pdf_pages(path):
+    """Rough page count: number of /Type /Page objects in the file"""
+    with open(path, 'rb') as handle:
+        return len(PDF_PAGE.findall(handle.read()))
+
+
+def process_upload(sha256, path, derived_dir, max_dimension, thumbnail_size):
+    """
+    Inspect one uploaded blob. Runs in a worker process.
+    The blob itself is never modified (it is content-addressed); resized
+    copies and thumbnails are written to derived_dir/<sha256>/.
+    """
+    with open(path, 'rb') as handle:
+        head = handle.read(64)
+    metadata = {
+        'sha256': sha256,
+        'mime_type': sniff_mime(head),
+        'size_bytes': os.path.getsize(path),
+    }
+
+    if metadata['mime_type'] == 'application/pdf':
+        metadata['page_count'] = count_pdf_pages(path)
+    elif metadata['mime_type'].startswith('image/'):
+        try:
+            from PIL import Image
+        except ImportError:
+            # Pillow is optional; without it images are only sniffed
+            return metadata
+
+        output_dir = os.path.join(derived_dir, sha256)
+        os.makedirs(output_dir, exist_ok=True)
+        with Image.open(path) as image:
+            metadata['width'], metadata['height'] = image.size
+            image = image.convert('RGB')
+
+            if max(image.size) > max_dimension:
+                display = image.copy()
+                display.thumbnail((max_dimension, max_dimension))
+                metadata['display_path'] = os.path.join(output_dir, 'display.jpg')
+                display.save(metadata['display_path'], 'JPEG', quality=85, optimize=True)
+
+            image.thumbnail((thumbnail_size, thumbnail_size))
+            metadata['thumbnail_path'] = os.path.join(output_dir, 'thumbnail.jpg')
+            image.save(metadata['thumbnail_path'], 'JPEG', quality=80)
+
+    return metadata
+
+
+class PostProcessor:
+    """Runs CPU-heavy upload processing on a process pool.
+
+    submit() returns immediately; the work happens in another process and
+    the results are written to upload_metadata when it finishes.
+    """
+
+    def __init__(self, save_metadata, workers=None, derived_dir=None,
+                 max_dimension=None, thumbnail_size=None):
+        self.save_metadata = save_metadata  # coroutine function(metadata)
+        self.workers = int(workers or os.getenv('POSTPROCESS_WORKERS', '2'))
+        self.derived_dir = derived_dir or os.getenv('DERIVED_DIR', os.path.join('user_uploads', 'derived'))
+        self.max_dimension = int(max_dimension or os.getenv('IMAGE_MAX_DIMENSION', '2048'))
+        self.thumbnail_size = int(thumbnail_size or os.getenv('THUMBNAIL_SIZE', '256'))
+        self._executor = None
+        self._tasks = set()
+        self._seen = OrderedDict()  # recently handled hashes, oldest first
+
+        self.completed = 0
+        self.failed = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            # The bot already runs threads (database pool, Excel writer, loop
+            # monitor); a forked child could inherit one of their locks held
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def submit(self, sha256, path):
+        """Queue a blob for processing; identical uploads are processed once"""
+        if sha256 in self._seen:
+            self._seen.move_to_end(sha256)
+            return None
+        self._seen[sha256] = True
+        while len(self._seen) > SEEN_LIMIT:
+            self._seen.popitem(last=False)
+        task = asyncio.create_task(self._process(sha256, path))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _process(self, sha256, path):
+        loop = asyncio.get_running_loop()
+        try:
+            metadata = await loop.run_in_executor(
+                self._get_executor(), process_upload,
+                sha256, path, self.derived_dir, self.max_dimension, self.thumbnail_size
+            )
+            self.completed += 1
+        except Exception as e:
+            print(f"Error processing upload {sha256}: {e}")
+            self.failed += 1
+            self._seen.pop(sha256, None)
+            metadata = {
+                'sha256': sha256,
+                'mime_type': 'application/octet-stream',
+                'size_bytes': os.path.getsize(path) if os.path.exists(path) else 0,
+                'error': str(e)[:1000],
+            }
+        try:
+            await self.save_metadata(metadata)
+        except Exception as e:
+            print(f"Error recording upload metadata for {sha256}: {e}")
+
+    def forget(self, hashes):
+        """Process these blobs again if they are uploaded again (called after GC deletes them)"""
+        for sha256 in hashes:
+            self._seen.pop(sha256, None)
+
+    def queue_depth(self):
+        """Uploads submitted but not finished yet"""
+        return len(self._tasks)
+
+    async def close(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def stats(self):
+        return {
+            'queue_depth': self.queue_depth(),
+            'workers': self.workers,
+            'completed': self.completed,
+            'failed': self.failed,
+        }
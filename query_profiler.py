@@ -0,0 +1,172 @@
+import os
+import re
+import json
+import time
+import threading
+from datetime import datetime
+from mysql.connector import Error
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Statements MySQL can EXPLAIN without running them
+EXPLAINABLE = ('select', 'update', 'delete')
+
+# Distinct statements tracked; anything beyond is counted under OTHER
+MAX_STATEMENTS = 500
+OTHER = '(other statements)'
+
+# Comments, then string literals, placeholders and numbers; matched in one
+# pass so a '--' or '#' inside a string isn't taken for a comment
+TOKEN = re.compile(
+    r"(?P<comment>/\*.*?\*/|--[^\n]*|#[^\n]*)"
+    r"|'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"|%\(\w+\)s|%s|\b\d+(?:\.\d+)?\b",
+    re.DOTALL
+)
+VALUE_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+REPEATED_LISTS = re.compile(r'(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+')
+WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(query):
+    """Query with literals and placeholders replaced, so calls of one statement group together"""
+    text = TOKEN.sub(lambda match: ' ' if match.group('comment') else '?', query)
+    # IN (?, ?, ?) and multi-row VALUES lists vary in length from call to call
+    text = VALUE_LIST.sub('(...)', text)
+    text = REPEATED_LISTS.sub(r'\1', text)
+    return WHITESPACE.sub(' ', text).strip()
+
+
+class QueryProfiler:
+    """Per-statement timings for the queries Database runs, off unless QUERY_PROFILE=1.
+
+    Calls are grouped by fingerprint (the query with every literal and
+    placeholder replaced by '?'), keeping the call count, failures, total
+    and longest time and rows returned or changed. Calls slower than
+    SLOW_QUERY_MS are appended to SLOW_QUERY_LOG as JSON lines, with the
+    EXPLAIN plan when SLOW_QUERY_EXPLAIN=1 (at most once per statement per
+    SLOW_QUERY_EXPLAIN_INTERVAL). Parameters are never logged: they hold
+    members' personal details.
+    """
+
+    def __init__(self, enabled=None, slow_ms=None, log_path=None, explain=None, explain_interval=None):
+        self.enabled = enabled if enabled is not None else os.getenv('QUERY_PROFILE', '0') == '1'
+        self.slow_seconds = float(slow_ms if slow_ms is not None else os.getenv('SLOW_QUERY_MS', '200')) / 1000
+        self.log_path = log_path if log_path is not None else os.getenv('SLOW_QUERY_LOG', 'slow_queries.log')
+        self.explain = explain if explain is not None else os.getenv('SLOW_QUERY_EXPLAIN', '0') == '1'
+        self.explain_interval = float(
+            explain_interval if explain_interval is not None else os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', '300')
+        )
+        self._fingerprints = {}  # query text -> fingerprint; the bot's queries are mostly constants
+        self._statements = {}  # fingerprint -> stats dict
+        self._explained = {}  # fingerprint -> monotonic time of the last EXPLAIN
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self.started_at = time.time()
+
+    def _fingerprint(self, query):
+        cached = self._fingerprints.get(query)
+        if cached is None:
+            cached = fingerprint(query)
+            if len(self._fingerprints) < MAX_STATEMENTS * 4:
+                self._fingerprints[query] = cached
+        return cached
+
+    def record(self, query, params, seconds, rows, connection=None, failed=False):
+        """Account one statement; connection is only used to EXPLAIN slow ones"""
+        if not self.enabled:
+            return
+        key = self._fingerprint(query)
+        slow = seconds >= self.slow_seconds
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                if len(self._statements) >= MAX_STATEMENTS:
+                    key = OTHER
+                stats = self._statements.setdefault(key, {
+                    'calls': 0, 'errors': 0, 'slow': 0, 'total': 0.0, 'max': 0.0, 'rows': 0,
+                })
+            stats['calls'] += 1
+            stats['total'] += seconds
+            stats['rows'] += rows
+            if seconds > stats['max']:
+                stats['max'] = seconds
+            if failed:
+                stats['errors'] += 1
+            if slow:
+                stats['slow'] += 1
+            explain = slow and not failed and connection is not None and self._should_explain(key, query)
+        if slow:
+            plan = self._explain(connection, query, params) if explain else None
+            self._log_slow(key, seconds, rows, failed, plan)
+
+    def _should_explain(self, key, query):
+        """Called with the lock held"""
+        if not self.explain or key == OTHER:
+            return False
+        if query.lstrip().split(None, 1)[0].lower() not in EXPLAINABLE:
+            return False
+        now = time.monotonic()
+        last = self._explained.get(key)
+        if last is not None and now - last < self.explain_interval:
+            return False
+        self._explained[key] = now
+        return True
+
+    def _explain(self, connection, query, params):
+        """EXPLAIN rows for query as dicts, or None if MySQL refuses"""
+        cursor = None
+        try:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("EXPLAIN " + query, params or ())
+            return [
+                {name: value for name, value in row.items() if value is not None}
+                for row in cursor.fetchall()
+            ]
+        except Error as e:
+            print(f"Error explaining slow query: {e}")
+            return None
+        finally:
+            if cursor:
+                cursor.close()
+
+    def _log_slow(self, key, seconds, rows, failed, plan):
+        if not self.log_path:
+            return
+        entry = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'ms': round(seconds * 1000, 2),
+            'rows': rows,
+            'failed': failed,
+            'statement': key,
+        }
+        if plan is not None:
+            entry['plan'] = plan
+        try:
+            with self._log_lock, open(self.log_path, 'a', encoding='utf-8') as handle:
+                handle.write(json.dumps(entry, default=str) + '\n')
+        except OSError as e:
+            print(f"Error writing slow query log: {e}")
+
+    def top(self, limit=10):
+        """The statements with the most total time, as dicts, slowest first"""
+        with self._lock:
+            statements = [dict(stats, statement=key) for key, stats in self._statements.items()]
+        statements.sort(key=lambda stats: stats['total'], reverse=True)
+        return statements[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._explained.clear()
+            self.started_at = time.time()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'statements': len(self._statements),
+                'calls': sum(stats['calls'] for stats in self._statements.values()),
+                'slow': sum(stats['slow'] for stats in self._statements.values()),
+            }
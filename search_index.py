@@ -0,0 +1,191 @@
+import re
+import heapq
+import bisect
+import threading
+from array import array
+
+# Words are runs of letters and digits; everything else separates them
+WORD = re.compile(r'[^\W_]+')
+
+# Ranking of how a query word matched a member's word
+EXACT, PREFIX, SUBSTRING = 3, 2, 1
+
+# The newest INTERSECT_ABOVE candidates are scored directly; older ones
+# are first intersected with up to MAX_INTERSECTIONS more posting lists
+INTERSECT_ABOVE = 2000
+MAX_INTERSECTIONS = 3
+
+
+def words(text):
+    """Lower-cased words of a name, email or phone number"""
+    return WORD.findall(str(text or '').lower())
+
+
+def word_trigrams(word):
+    """Trigrams of a word padded like pg_trgm, so the first ones mark word starts"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def query_trigrams(word):
+    """Trigrams a matching member must have for one query word"""
+    if len(word) >= 3:
+        # Substring match: only the unpadded trigrams
+        return {word[i:i + 3] for i in range(len(word) - 2)}
+    # One or two characters: a word starting with them
+    return {f"  {word}"[-3:]}
+
+
+class MemberSearchIndex:
+    """In-memory trigram index over members' full_name, email and phone.
+
+    Each trigram maps to a compact array of member ids. A search takes the
+    rarest trigram of the query as its candidate set, confirms each
+    candidate with a substring check, and ranks exact word matches above
+    word prefixes above substrings, newest member first. Members are only
+    ever added (nothing in the bot deletes one or changes these fields).
+    Posting lists are kept in ascending id order, even when a member saved
+    during the initial load arrives before older ids.
+    """
+
+    def __init__(self):
+        self._postings = {}  # trigram -> array of member ids
+        self._docs = {}  # member id -> (entry_code, full_name, email, phone, searchable text)
+        self._lock = threading.Lock()
+        self.loading = False
+        self.loaded = False
+
+        self.searches = 0
+
+    def begin_load(self):
+        """Start accepting additions; call before reading the members table"""
+        with self._lock:
+            self.loading = True
+
+    def finish_load(self):
+        with self._lock:
+            self.loaded = True
+
+    def add(self, member_id, entry_code, full_name, email, phone):
+        """Index one member (ignored until loading has begun, and for ids already indexed)"""
+        with self._lock:
+            self._add(member_id, entry_code, full_name, email, phone)
+
+    def add_many(self, rows):
+        """Index (id, entry_code, full_name, email, phone) rows"""
+        with self._lock:
+            for row in rows:
+                self._add(*row)
+
+    def _add(self, member_id, entry_code, full_name, email, phone):
+        if not self.loading or member_id in self._docs:
+            return
+        tokens = words(full_name) + words(email) + words(phone)
+        # Space-delimited so word starts and whole words are substring tests
+        searchable = f" {' '.join(tokens)} "
+        self._docs[member_id] = (entry_code, full_name, email, phone, searchable)
+        trigrams = set()
+        for token in tokens:
+            trigrams.update(word_trigrams(token))
+        postings = self._postings
+        for trigram in trigrams:
+            posting = postings.get(trigram)
+            if posting is None:
+                posting = postings[trigram] = array('i')  # members.id is a 32-bit INT
+            if posting and posting[-1] > member_id:
+                # A member saved while the table was still being loaded got
+                # in ahead of older ids; search relies on ascending order
+                posting.insert(bisect.bisect_left(posting, member_id), member_id)
+            else:
+                posting.append(member_id)
+
+    def search(self, text, limit=10):
+        """Best matches for text as [(entry_code, full_name, email, phone)]"""
+        query = words(text)
+        if not query:
+            return []
+        with self._lock:
+            self.searches += 1
+            postings = []
+            for word in query:
+                for trigram in query_trigrams(word):
+                    posting = self._postings.get(trigram)
+                    if posting is None:
+                        return []  # some trigram appears in no member at all
+                    postings.append(posting)
+            postings.sort(key=len)
+            candidates = postings[0]
+            best_possible = sum(self._best_score(word) for word in query)
+
+            # Ids are appended in ascending order, so walking backwards
+            # visits the newest members first. Once `limit` of them have the
+            # best possible score nothing older can outrank them, which
+            # settles broad queries ("gmail") after a handful of members.
+            top = []  # min-heap of (score, member_id)
+            newest = candidates[-INTERSECT_ABOVE:]
+            done = self._rank(query, reversed(newest), best_possible, limit, top)
+            if not done and len(candidates) > len(newest):
+                rest = candidates[:-INTERSECT_ABOVE]
+                if len(postings) > 1:
+                    # Narrow the older candidates with the next rarest
+                    # trigrams instead of scoring every one of them
+                    narrowed = set(rest)
+                    for posting in postings[1:MAX_INTERSECTIONS + 1]:
+                        narrowed.intersection_update(posting)
+                    rest = sorted(narrowed)
+                self._rank(query, reversed(rest), best_possible, limit, top)
+            top.sort(reverse=True)
+            return [self._docs[member_id][:4] for _, member_id in top]
+
+    def _rank(self, query, member_ids, best_possible, limit, top):
+        """Score member_ids into the top heap; True once the result can't improve"""
+        docs = self._docs
+        perfect = sum(1 for score, _ in top if score >= best_possible)
+        for member_id in member_ids:
+            score = self._score(query, docs[member_id][4])
+            if not score:
+                continue
+            if len(top) < limit:
+                heapq.heappush(top, (score, member_id))
+            elif score > top[0][0]:
+                heapq.heapreplace(top, (score, member_id))
+            if score >= best_possible:
+                perfect += 1
+                if perfect >= limit:
+                    return True
+        return False
+
+    def _best_score(self, word):
+        """Highest score any member could get for word, judged from the boundary trigrams"""
+        padded = f"  {word} "
+        if (padded[1:4] if len(word) >= 2 else padded[:3]) not in self._postings:
+            return SUBSTRING
+        if padded[-3:] not in self._postings:
+            return PREFIX
+        return EXACT
+
+    @staticmethod
+    def _score(query, searchable):
+        """Sum of the best match type of each query word, or 0 if one doesn't match"""
+        total = 0
+        for word in query:
+            if f" {word} " in searchable:
+                total += EXACT
+            elif f" {word}" in searchable:
+                total += PREFIX
+            elif len(word) >= 3 and word in searchable:
+                # Short words only match at the start of a word
+                total += SUBSTRING
+            else:
+                return 0
+        return total
+
+    def stats(self):
+        with self._lock:
+            return {
+                'members': len(self._docs),
+                'trigrams': len(self._postings),
+                'postings': sum(len(posting) for posting in self._postings.values()),
+                'loaded': self.loaded,
+                'searches': self.searches,
+            }
@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+class SessionStore:
+    """In-memory store for in-flight onboarding conversations.
+
+    Behaves like a dict of user_id -> session dict, but remembers when each
+    session was last touched so idle ones can be evicted, and caps the
+    number of live sessions. Handlers mutate the session dict in place and
+    call save(user_id) once they are done with a message.
+    """
+
+    def __init__(self, ttl=None, max_sessions=None, sweep_interval=60):
+        self.ttl = float(ttl if ttl is not None else os.getenv('SESSION_TTL', '86400'))
+        self.max_sessions = int(max_sessions or os.getenv('SESSION_MAX', '10000'))
+        self.sweep_interval = sweep_interval
+        self._sessions = OrderedDict()  # user_id -> session, least recently used first
+        self._last_active = {}
+        self._sweeper = None
+        self.evicted = 0
+
+    # Dict-style access used throughout bot.py
+    def __contains__(self, user_id):
+        return user_id in self._sessions
+
+    def __getitem__(self, user_id):
+        return self._sessions[user_id]
+
+    def __setitem__(self, user_id, session):
+        self._sessions[user_id] = session
+        self.save(user_id)
+
+    def __delitem__(self, user_id):
+        self.delete(user_id)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, user_id, default=None):
+        return self._sessions.get(user_id, default)
+
+    def save(self, user_id):
+        """Record that a session changed (and is still alive)"""
+        if user_id not in self._sessions:
+            return
+        self._sessions.move_to_end(user_id)
+        self._last_active[user_id] = time.time()
+        self._enforce_limit()
+
+    def delete(self, user_id):
+        self._sessions.pop(user_id, None)
+        self._last_active.pop(user_id, None)
+
+    def _enforce_limit(self):
+        while len(self._sessions) > self.max_sessions:
+            user_id = next(iter(self._sessions))
+            self._evict(user_id)
+
+    def _evict(self, user_id):
+        self.delete(user_id)
+        self.evicted += 1
+
+    def evict_idle(self, now=None):
+        """Drop sessions nobody has touched for ttl seconds"""
+        cutoff = (now or time.time()) - self.ttl
+        idle = [user_id for user_id, last in self._last_active.items() if last < cutoff]
+        for user_id in idle:
+            self._evict(user_id)
+        return idle
+
+    async def open(self):
+        """Start background housekeeping (idempotent)"""
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def close(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            idle = self.evict_idle()
+            if idle:
+                print(f"Evicted {len(idle)} idle onboarding session(s)")
+
+    def stats(self):
+        return {'active': len(self._sessions), 'evicted': self.evicted}
+
+
+class SQLiteSessionStore(SessionStore):
+    """Session store that survives restarts.
+
+    Sessions are served from memory; changes are written behind to a
+    SQLite file every flush_interval seconds in one transaction, and live
+    sessions are loaded back from it when the bot starts.
+    """
+
+    def __init__(self, path=None, flush_interval=None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path or os.getenv('SESSION_DB_PATH', 'sessions.db')
+        self.flush_interval = float(
+            flush_interval if flush_interval is not None else os.getenv('SESSION_FLUSH_INTERVAL', '1')
+        )
+        self._dirty = set()
+        self._deleted = set()
+        self._connection = None
+        self._db_lock = threading.Lock()
+        self._flusher = None
+        self._opened = False
+
+    def save(self, user_id):
+        super().save(user_id)
+        if user_id in self._sessions:
+            self._dirty.add(user_id)
+            self._deleted.discard(user_id)
+
+    def delete(self, user_id):
+        super().delete(user_id)
+        self._dirty.discard(user_id)
+        self._deleted.add(user_id)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS onboarding_sessions (
+                user_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                last_active REAL NOT NULL
+            )
+            """
+        )
+        connection.commit()
+        return connection
+
+    def _load(self):
+        """Read every session that hasn't expired yet (runs in a thread)"""
+        with self._db_lock:
+            if self._connection is None:
+                self._connection = self._connect()
+            cutoff = time.time() - self.ttl
+            self._connection.execute("DELETE FROM onboarding_sessions WHERE last_active < ?", (cutoff,))
+            self._connection.commit()
+            return self._connection.execute(
+                "SELECT user_id, data, last_active FROM onboarding_sessions ORDER BY last_active"
+            ).fetchall()
+
+    def _write(self, upserts, deletes):
+        """Persist one batch of changes (runs in a thread)"""
+        with self._db_lock:
+            with self._connection:
+                self._connection.executemany(
+                    """
+                    INSERT INTO onboarding_sessions (user_id, data, last_active) VALUES (?, ?, ?)
+                    ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, last_active = excluded.last_active
+                    """,
+                    upserts
+                )
+                self._connection.executemany(
+                    "DELETE FROM onboarding_sessions WHERE user_id = ?",
+                    [(user_id,) for user_id in deletes]
+                )
+
+    async def open(self):
+        """Rehydrate saved sessions and start the write-behind flusher"""
+        if self._opened:
+            return
+        # Only count as opened once the load worked, so a failed open is
+        # retried on the next on_ready instead of leaving the flusher off
+        rows = await asyncio.to_thread(self._load)
+        self._opened = True
+        for user_id, data, last_active in rows:
+            if user_id in self._sessions:
+                continue
+            self._sessions[user_id] = json.loads(data)
+            self._last_active[user_id] = last_active
+        self._enforce_limit()
+        if rows:
+            print(f"Restored {len(rows)} onboarding session(s) from {self.path}")
+        self._flusher = asyncio.create_task(self._flush_loop())
+        await super().open()
+
+    async def flush(self):
+        """Write every changed session to disk now"""
+        if not self._dirty and not self._deleted:
+            return
+        # Serialise on the event loop so the snapshot is consistent
+        upserts = [
+            (user_id, json.dumps(self._sessions[user_id]), self._last_active[user_id])
+            for user_id in self._dirty
+            if user_id in self._sessions
+        ]
+        deletes = list(self._deleted)
+        self._dirty.clear()
+        self._deleted.clear()
+        try:
+            await asyncio.to_thread(self._write, upserts, deletes)
+        except Exception as e:
+            print(f"Error saving onboarding sessions: {e}")
+            # Try again on the next flush
+            self._dirty.update(user_id for user_id, _, _ in upserts)
+            self._deleted.update(user_id for user_id in deletes if user_id not in self._sessions)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def close(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await super().close()
+        if self._connection is not None:
+            await self.flush()
+            with self._db_lock:
+                self._connection.close()
+                self._connection = None
+        self._opened = False
+
+    def stats(self):
+        stats = super().stats()
+        stats['pending_writes'] = len(self._dirty) + len(self._deleted)
+        return stats
+
+
+def create_session_store():
+    """Build the session store selected by SESSION_BACKEND (memory or sqlite)"""
+    backend = os.getenv('SESSION_BACKEND', 'sqlite').lower()
+    if backend == 'memory':
+        return SessionStore()
+    return SQLiteSessionStore()
@@ -0,0 +1,238 @@
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Columns written for each table, in order, with their Arrow type names.
+# Every table is read by its updated_at watermark.
+SNAPSHOT_TABLES = {
+    'members': [
+        ('id', 'int64'),
+        ('entry_code', 'string'),
+        ('user_id', 'string'),
+        ('full_name', 'string'),
+        ('email', 'string'),
+        ('phone', 'string'),
+        ('date_of_birth', 'string'),
+        ('file_path', 'string'),
+        ('registration_date', 'timestamp'),
+        ('status', 'string'),
+        ('created_at', 'timestamp'),
+        ('updated_at', 'timestamp'),
+    ],
+    'identity_info': [
+        ('id', 'int64'),
+        ('member_id', 'int64'),
+        ('id_number', 'string'),
+        ('passport_number', 'string'),
+        ('kra_number', 'string'),
+        ('last_updated', 'timestamp'),
+        ('created_at', 'timestamp'),
+        ('updated_at', 'timestamp'),
+    ],
+    'member_status_history': [
+        ('id', 'int64'),
+        ('member_id', 'int64'),
+        ('old_status', 'string'),
+        ('new_status', 'string'),
+        ('changed_at', 'timestamp'),
+        ('updated_at', 'timestamp'),
+    ],
+}
+
+# Identity numbers never leave the database in full
+MASKED_COLUMNS = {
+    'identity_info': ('id_number', 'passport_number', 'kra_number'),
+}
+
+WATERMARK_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def mask_value(value, visible=3):
+    """Replace all but the last few characters with '*'"""
+    if value is None or value == 'N/A':
+        return None
+    value = str(value)
+    if len(value) <= visible:
+        return '*' * len(value)
+    return '*' * (len(value) - visible) + value[-visible:]
+
+
+def to_datetime(value):
+    """DATETIME columns arrive as datetimes; parse strings from a database not migrated yet"""
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def arrow_schema(table):
+    import pyarrow as pa
+
+    types = {'int64': pa.int64(), 'string': pa.string(), 'timestamp': pa.timestamp('s')}
+    return pa.schema([(name, types[kind]) for name, kind in SNAPSHOT_TABLES[table]])
+
+
+def to_record_batch(table, rows, schema):
+    """Turn a list of result tuples into an Arrow record batch"""
+    import pyarrow as pa
+
+    columns = list(zip(*rows))
+    masked = MASKED_COLUMNS.get(table, ())
+    arrays = []
+    for index, (name, kind) in enumerate(SNAPSHOT_TABLES[table]):
+        values = columns[index]
+        if name in masked:
+            values = [mask_value(value) for value in values]
+        elif kind == 'timestamp':
+            values = [to_datetime(value) for value in values]
+        elif kind == 'string':
+            values = [None if value is None else str(value) for value in values]
+        arrays.append(pa.array(values, type=schema.field(name).type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class SnapshotJob:
+    """Incremental Parquet snapshots of the member tables for analytics.
+
+    Each run writes the rows whose updated_at falls between the previous
+    run's watermark and now (minus a small lag, so transactions still in
+    flight are picked up next time) into
+    <out_dir>/<table>/dt=<YYYY-MM-DD>/part-<run>.parquet. A row updated
+    several times appears in several parts; readers keep the copy with the
+    latest updated_at per id. Watermarks live in <out_dir>/_watermarks.json.
+    """
+
+    def __init__(self, connection_params, out_dir=None, lag=None, batch_size=5000):
+        self.connection_params = connection_params
+        self.out_dir = out_dir or os.getenv('SNAPSHOT_DIR', 'snapshots')
+        self.lag = int(lag if lag is not None else os.getenv('SNAPSHOT_LAG', '5'))
+        self.batch_size = batch_size
+        self.state_path = os.path.join(self.out_dir, '_watermarks.json')
+
+    def load_watermarks(self):
+        try:
+            with open(self.state_path, encoding='utf-8') as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return {}
+
+    def save_watermarks(self, watermarks):
+        os.makedirs(self.out_dir, exist_ok=True)
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            json.dump(watermarks, handle, indent=2)
+        os.replace(temp_path, self.state_path)
+
+    def run(self):
+        """Snapshot every table once; returns {table: rows_written}"""
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("Parquet snapshots need the optional pyarrow package (pip install pyarrow)")
+        import mysql.connector
+
+        connection = mysql.connector.connect(**self.connection_params)
+        try:
+            cursor = connection.cursor()
+            # Use the server clock, since updated_at is set by the server
+            cursor.execute("SELECT NOW()")
+            now = cursor.fetchone()[0]
+            cursor.close()
+            high = (now - timedelta(seconds=self.lag)).strftime(WATERMARK_FORMAT)
+            run_id = f"{now.strftime('%H%M%S')}-{uuid.uuid4().hex[:8]}"
+            partition = f"dt={now.strftime('%Y-%m-%d')}"
+
+            watermarks = self.load_watermarks()
+            written = {}
+            for table in SNAPSHOT_TABLES:
+                low = watermarks.get(table)
+                written[table] = self._snapshot_table(connection, table, low, high, partition, run_id)
+                watermarks[table] = high
+                self.save_watermarks(watermarks)
+            return written
+        finally:
+            connection.close()
+
+    def _snapshot_table(self, connection, table, low, high, partition, run_id):
+        import pyarrow.parquet as pq
+
+        columns = ", ".join(name for name, _ in SNAPSHOT_TABLES[table])
+        query = f"SELECT {columns} FROM {table} WHERE updated_at < %s"
+        params = [high]
+        if low:
+            query += " AND updated_at >= %s"
+            params.append(low)
+
+        schema = arrow_schema(table)
+        directory = os.path.join(self.out_dir, table, partition)
+        path = os.path.join(directory, f"part-{run_id}.parquet")
+        temp_path = f"{path}.tmp"
+        writer = None
+        rows_written = 0
+        cursor = connection.cursor(buffered=False)
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                if writer is None:
+                    os.makedirs(directory, exist_ok=True)
+                    writer = pq.ParquetWriter(temp_path, schema, compression='snappy')
+                writer.write_batch(to_record_batch(table, rows, schema))
+                rows_written += len(rows)
+        except BaseException:
+            if writer is not None:
+                writer.close()
+                os.remove(temp_path)
+            raise
+        finally:
+            cursor.close()
+
+        if writer is not None:
+            writer.close()
+            # Readers only ever see complete files
+            os.replace(temp_path, path)
+        return rows_written
+
+
+async def run_snapshot_loop(job, interval=None):
+    """Run job every SNAPSHOT_INTERVAL seconds in a worker thread"""
+    interval = float(interval or os.getenv('SNAPSHOT_INTERVAL', '3600'))
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            started = time.perf_counter()
+            written = await asyncio.to_thread(job.run)
+            if any(written.values()):
+                print(f"Snapshot wrote {written} in {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            print(f"Error writing snapshot: {e}")
+
+
+def main():
+    from database import Database
+
+    job = SnapshotJob(Database(auto_connect=False).connection_params())
+    try:
+        written = job.run()
+    except Exception as e:
+        print(f"Snapshot failed: {e}")
+        return 1
+    for table, rows in written.items():
+        print(f"{table}: {rows} row(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+import threading
+
+# Every value the members.status CHECK constraint allows
+STATUS_VALUES = ('Active', 'Inactive', 'Suspended')
+
+
+class StatusCounters:
+    """In-process member totals per status, kept current by the write paths.
+
+    The counts are seeded from a GROUP BY query and then adjusted on every
+    insert and status change, so reading them costs nothing. Anything that
+    cannot cheaply report an exact delta (bulk loads, failed writes) calls
+    invalidate() and the next read or the periodic reconciliation reloads
+    them from the database.
+    """
+
+    def __init__(self):
+        self._counts = None
+        self._lock = threading.Lock()
+        self.reconciliations = 0
+        self.drift = 0  # total correction applied by the last reconciliation
+
+    @property
+    def loaded(self):
+        return self._counts is not None
+
+    def load(self, counts):
+        """Replace the counts with authoritative values from the database"""
+        fresh = {status: 0 for status in STATUS_VALUES}
+        fresh.update(counts)
+        with self._lock:
+            if self._counts is not None:
+                self.drift = sum(
+                    abs(fresh.get(status, 0) - self._counts.get(status, 0))
+                    for status in set(fresh) | set(self._counts)
+                )
+            self._counts = fresh
+            self.reconciliations += 1
+
+    def invalidate(self):
+        """Forget the counts so they are reloaded before the next read"""
+        with self._lock:
+            self._counts = None
+
+    def record_insert(self, status, count=1):
+        with self._lock:
+            if self._counts is not None:
+                self._counts[status] = self._counts.get(status, 0) + count
+
+    def record_change(self, old_status, new_status):
+        if old_status == new_status:
+            return
+        with self._lock:
+            if self._counts is not None:
+                self._counts[old_status] = self._counts.get(old_status, 0) - 1
+                self._counts[new_status] = self._counts.get(new_status, 0) + 1
+
+    def snapshot(self):
+        """Copy of the current counts, or None if they need reloading"""
+        with self._lock:
+            return dict(self._counts) if self._counts is not None else None
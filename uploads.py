@@ -0,0 +1,186 @@
+import os
+import time
+import asyncio
+import hashlib
+import aiohttp
+from dotenv import load_dotenv
+from blob_store import blob_store as default_blob_store
+from metrics import UPLOADS, UPLOAD_BYTES, UPLOAD_SECONDS
+
+# Load environment variables
+load_dotenv()
+
+MB = 1024 * 1024
+
+
+class UploadRejected(Exception):
+    """The upload breaks a size or quota limit; the message is safe to show the user"""
+
+
+class UploadResult:
+    """Where an ingested attachment ended up"""
+
+    def __init__(self, path, sha256, size, filename, ref, deduplicated=False):
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+        self.filename = filename
+        self.ref = ref  # value for members.file_path
+        self.deduplicated = deduplicated
+
+
+class UploadPipeline:
+    """Streams Discord attachments into the blob store in chunks.
+
+    Downloads share one HTTP session, are hashed as they arrive, and are
+    capped per file and per user. A global semaphore limits how many run
+    at once so a burst of large uploads can't exhaust memory or file
+    descriptors.
+    """
+
+    def __init__(self, blob_store=None, max_file_bytes=None, max_user_bytes=None,
+                 max_concurrent=None, chunk_size=64 * 1024, stored_usage=None):
+        self.blob_store = blob_store or default_blob_store
+        self.max_file_bytes = int(max_file_bytes or float(os.getenv('UPLOAD_MAX_FILE_MB', '10')) * MB)
+        self.max_user_bytes = int(max_user_bytes or float(os.getenv('UPLOAD_MAX_USER_MB', '50')) * MB)
+        self.max_concurrent = int(max_concurrent or os.getenv('UPLOAD_CONCURRENCY', '4'))
+        self.chunk_size = chunk_size
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._session = None
+        # user_id -> bytes counted against the quota: what the user's saved
+        # members already store (read once via stored_usage, a coroutine
+        # function of user_id) plus what they uploaded since the bot started
+        self.stored_usage = stored_usage
+        self._usage = {}
+        self._seeded = set()
+
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+        self.bytes_downloaded = 0
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=300))
+        return self._session
+
+    def _reserve(self, user_id, size):
+        """Claim quota for a download, raising UploadRejected if it won't fit"""
+        usage = self._usage.get(user_id, 0)
+        if usage + size > self.max_user_bytes:
+            raise UploadRejected(
+                f"You have reached your upload limit of {self.max_user_bytes // MB} MB."
+            )
+        self._usage[user_id] = usage + size
+
+    async def _seed_usage(self, user_id):
+        """Count uploads saved before this process started, once per user"""
+        if self.stored_usage is None or user_id in self._seeded:
+            return
+        try:
+            stored = await self.stored_usage(user_id)
+        except Exception as e:
+            # Don't block uploads on the database; try again next time
+            print(f"Error reading stored upload usage for {user_id}: {e}")
+            return
+        self._seeded.add(user_id)
+        self._usage[user_id] = self._usage.get(user_id, 0) + stored
+
+    def _release(self, user_id, size):
+        self._usage[user_id] = max(0, self._usage.get(user_id, 0) - size)
+
+    async def ingest(self, attachment, user_id):
+        """Download an attachment into the blob store"""
+        user_id = str(user_id)
+        declared = attachment.size or 0
+        if declared > self.max_file_bytes:
+            self.rejected += 1
+            UPLOADS.inc(outcome='rejected')
+            raise UploadRejected(
+                f"That file is too large. The limit is {self.max_file_bytes // MB} MB per file."
+            )
+        # A user's messages are handled one at a time, so this can't race
+        await self._seed_usage(user_id)
+        try:
+            self._reserve(user_id, declared)
+        except UploadRejected:
+            self.rejected += 1
+            UPLOADS.inc(outcome='rejected')
+            raise
+
+        filename = os.path.basename(attachment.filename) or 'upload'
+        received = 0
+        temp_path = None
+
+        try:
+            async with self._semaphore:
+                self.active += 1
+                started = time.perf_counter()
+                try:
+                    temp_path = await asyncio.to_thread(self.blob_store.temp_path)
+                    received, digest = await self._download(attachment.url, temp_path)
+                finally:
+                    self.active -= 1
+                UPLOAD_SECONDS.observe(time.perf_counter() - started)
+            path, deduplicated = await asyncio.to_thread(self.blob_store.put_file, temp_path, digest)
+        except BaseException as e:
+            UPLOADS.inc(outcome='rejected' if isinstance(e, UploadRejected) else 'failed')
+            self._release(user_id, declared)
+            if temp_path is not None:
+                await asyncio.to_thread(_remove_quietly, temp_path)
+            raise
+
+        # Correct the reservation if Discord's size was off
+        self._usage[user_id] += received - declared
+        self.completed += 1
+        UPLOADS.inc(outcome='deduplicated' if deduplicated else 'stored')
+        return UploadResult(path, digest, received, filename, self.blob_store.ref(digest), deduplicated)
+
+    async def _download(self, url, temp_path):
+        """Stream url to temp_path, hashing as we go"""
+        sha256 = hashlib.sha256()
+        received = 0
+        handle = await asyncio.to_thread(open, temp_path, 'wb')
+        try:
+            async with self._get_session().get(url) as response:
+                response.raise_for_status()
+                async for chunk in response.content.iter_chunked(self.chunk_size):
+                    received += len(chunk)
+                    if received > self.max_file_bytes:
+                        self.rejected += 1
+                        raise UploadRejected(
+                            f"That file is too large. The limit is {self.max_file_bytes // MB} MB per file."
+                        )
+                    sha256.update(chunk)
+                    await asyncio.to_thread(handle.write, chunk)
+                    self.bytes_downloaded += len(chunk)
+                    UPLOAD_BYTES.inc(len(chunk))
+        finally:
+            await asyncio.to_thread(handle.close)
+        return received, sha256.hexdigest()
+
+    async def close(self):
+        """Close the shared HTTP session (a later upload opens a new one)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def stats(self):
+        return {
+            'active': self.active,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'bytes_downloaded': self.bytes_downloaded,
+            'max_concurrent': self.max_concurrent,
+        }
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# Shared pipeline used by the bot
+upload_pipeline = UploadPipeline()
@@ -0,0 +1,138 @@
+import discord
+
+from async_database import async_db
+
+PAGE_SIZE = 10
+
+# Discord rejects messages longer than this
+MESSAGE_LIMIT = 2000
+
+# Longest name or email shown in a list line; keeps a full page of
+# members well under MESSAGE_LIMIT whatever was typed during onboarding
+FIELD_LIMIT = 40
+
+STATUS_USAGE = (
+    "\n**Usage:**\n"
+    "- `!status` - Show this summary\n"
+    "- `!status [entry_code]` - Show member details\n"
+    "- `!status [entry_code] [activate|deactivate]` - Update status"
+)
+
+
+def status_emoji(status):
+    return "🟢" if str(status).lower() == 'active' else "🔴"
+
+
+def format_summary(counts):
+    """Header block with the member totals"""
+    total = sum(counts.values())
+    message = "**📊 Member Status (From Database)**\n\n"
+    message += f"👥 **Total Members:** {total}\n"
+    message += f"🟢 **Active:** {counts.get('Active', 0)}\n"
+    message += f"🔴 **Inactive:** {counts.get('Inactive', 0)}\n"
+    message += f"⛔ **Suspended:** {counts.get('Suspended', 0)}\n\n"
+    return message
+
+
+def clamp(value, limit=FIELD_LIMIT):
+    """Shorten a field for a list line, marking the cut with an ellipsis"""
+    value = str(value)
+    return value if len(value) <= limit else value[:limit - 1] + "…"
+
+
+def format_page(rows, page_number):
+    """Member list block for one page"""
+    message = f"**Member List (page {page_number}):**\n\n"
+    for member_id, entry_code, full_name, email, registration_date, status in rows:
+        message += f"`{entry_code}` - {clamp(full_name)} ({clamp(email)}) - {status_emoji(status)} {status}\n"
+    return message
+
+
+def format_size(size):
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    return f"{size / 1024:.1f} KB"
+
+
+def format_upload(entry_code, metadata):
+    """What post-processing found out about a member's uploaded file"""
+    message = f"**📎 Upload for `{entry_code}`**\n\n"
+    message += f"**Type:** {metadata['mime_type']}\n"
+    message += f"**Size:** {format_size(metadata['size_bytes'])}\n"
+    if metadata.get('width') and metadata.get('height'):
+        message += f"**Dimensions:** {metadata['width']} × {metadata['height']}\n"
+    if metadata.get('page_count'):
+        message += f"**Pages:** {metadata['page_count']}\n"
+    message += f"**SHA-256:** `{metadata['sha256'][:16]}…`\n"
+    if metadata.get('processed_at'):
+        message += f"**Checked:** {metadata['processed_at']}\n"
+    if metadata.get('error'):
+        message += f"⚠️ **Processing failed:** {clamp(metadata['error'], 300)}\n"
+    return message
+
+
+class MemberPageView(discord.ui.View):
+    """Previous/Next buttons for browsing members a page at a time"""
+
+    def __init__(self, author_id, summary, rows, has_more, page_size=PAGE_SIZE, timeout=180):
+        super().__init__(timeout=timeout)
+        self.author_id = author_id
+        self.summary = summary
+        self.rows = rows
+        self.page_size = page_size
+        self.page_number = 1
+        self.message = None
+        self.has_older = has_more
+        self.has_newer = False
+        self._sync_buttons()
+
+    def render(self):
+        message = self.summary + format_page(self.rows, self.page_number) + STATUS_USAGE
+        # Fields are clamped, so this only guards against future changes
+        return message if len(message) <= MESSAGE_LIMIT else message[:MESSAGE_LIMIT - 1] + "…"
+
+    def _sync_buttons(self):
+        self.previous_page.disabled = not self.has_newer
+        self.next_page.disabled = not self.has_older
+
+    async def interaction_check(self, interaction):
+        # Only the admin who ran the command can page through the list
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("These buttons belong to someone else's `!status`.", ephemeral=True)
+            return False
+        return True
+
+    async def _show(self, interaction, rows, newer):
+        if not rows:
+            await interaction.response.defer()
+            return
+        self.rows = rows
+        if newer:
+            self.page_number -= 1
+            self.has_older = True
+        else:
+            self.page_number += 1
+            self.has_newer = True
+        self._sync_buttons()
+        await interaction.response.edit_message(content=self.render(), view=self)
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction, button):
+        rows, has_more = await async_db.get_members_page(after_id=self.rows[0][0], limit=self.page_size)
+        self.has_newer = has_more
+        await self._show(interaction, rows, newer=True)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction, button):
+        rows, has_more = await async_db.get_members_page(before_id=self.rows[-1][0], limit=self.page_size)
+        self.has_older = has_more
+        await self._show(interaction, rows, newer=False)
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass